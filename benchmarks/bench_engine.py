@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+bench_engine.py
+
+End-to-end benchmark of recommend_courses across catalog sizes.
+
+For each size a synthetic catalog and student population (see synthetic.py)
+is written to a scratch directory and measured in a fresh interpreter
+pointed at it (AIU_ADVISOR_DATA_DIR):
+  - import time of inference_engine and first catalog load
+  - per-call latency percentiles with the cache off (every call evaluates)
+  - throughput with the cache off, with a warm cache, and through
+    recommend_courses_batch
+  - peak RSS of the process
+'real' benchmarks the shipped data/courses.csv instead of a synthetic one.
+Results are written as JSON; --compare prints the change against an
+earlier results file, e.g. from the previous commit. The run fails (exit
+status 1) if recommend_courses_batch is not faster than per-student calls
+at any size, since that is the batch path's reason to exist.
+
+    python benchmarks/bench_engine.py --sizes real 500 2000 --students 1000 --json engine.json
+    python benchmarks/bench_engine.py --compare engine.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.join(HERE, '..')
+SRC = os.path.join(ROOT, 'src')
+sys.path.insert(0, SRC)
+
+from synthetic import generate_catalog, generate_students, write_catalog, write_students
+
+# (key, column, higher is better). --compare marks changes of more than
+# REGRESSION percent in the wrong direction with '!'.
+REGRESSION = 10.0
+METRICS = (
+    ('import_ms',        'import ms',  False),
+    ('load_ms',          'load ms',    False),
+    ('p50_us',           'p50 us',     False),
+    ('p90_us',           'p90 us',     False),
+    ('p99_us',           'p99 us',     False),
+    ('per_s',            'rec/s',      True),
+    ('cached_per_s',     'cached/s',   True),
+    ('batch_per_s',      'batch/s',    True),
+    ('rss_mb',           'rss MB',     False),
+)
+
+WORKER = r'''
+import json, resource, sys, time
+t0 = time.perf_counter()
+import inference_engine
+from batch_advisor import recommend_courses_batch
+from KnowledgeBase import get_catalog
+t1 = time.perf_counter()
+get_catalog()
+t2 = time.perf_counter()
+
+with open(sys.argv[1], encoding='utf-8') as f:
+    students = [json.loads(line) for line in f]
+for s in students:
+    s.pop('student_id', None)
+selector = sys.argv[2] or None
+recommend = inference_engine.recommend_courses
+
+def run(use_cache):
+    times = []
+    start = time.perf_counter()
+    for s in students:
+        t = time.perf_counter()
+        recommend(**s, use_cache=use_cache, selector=selector)
+        times.append(time.perf_counter() - t)
+    return time.perf_counter() - start, times
+
+for s in students[:20]:  # warm up code paths
+    recommend(**s, use_cache=False, selector=selector)
+elapsed, times = run(False)
+times.sort()
+pct = lambda q: times[min(len(times) - 1, int(q * len(times)))] * 1e6
+run(True)                      # fill the cache
+cached, _ = run(True)
+start = time.perf_counter()
+for _ in recommend_courses_batch(students, selector=selector):
+    pass
+batch = time.perf_counter() - start
+
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+if sys.platform == 'darwin':
+    rss //= 1024
+n = len(students)
+print(json.dumps({
+    'courses':      len(get_catalog()),
+    'students':     n,
+    'import_ms':    (t1 - t0) * 1e3,
+    'load_ms':      (t2 - t1) * 1e3,
+    'p50_us':       pct(0.50),
+    'p90_us':       pct(0.90),
+    'p99_us':       pct(0.99),
+    'max_us':       times[-1] * 1e6,
+    'per_s':        n / elapsed,
+    'cached_per_s': n / cached,
+    'batch_per_s':  n / batch,
+    'rss_mb':       rss / 1024,
+}))
+'''
+
+
+def prepare(size, workdir, args) -> tuple:
+    """(data dir, roster path) for one catalog size."""
+    data = os.path.join(workdir, str(size))
+    if size == 'real':
+        os.makedirs(data)
+        for name in ('courses.csv', 'policies.json'):
+            shutil.copy(os.path.join(ROOT, 'data', name), data)
+    else:
+        write_catalog(data, generate_catalog(int(size), fan_in=args.fan_in,
+                                             depth=args.depth, seed=args.seed))
+    from catalog_snapshot import read_course_rows
+    rows = read_course_rows(os.path.join(data, 'courses.csv'))
+    roster = os.path.join(data, 'roster.jsonl')
+    write_students(roster, generate_students(rows, args.students, seed=args.seed))
+    return data, roster
+
+
+def measure(data, roster, selector) -> dict:
+    env = dict(os.environ, AIU_ADVISOR_DATA_DIR=data, AIU_ADVISOR_KB_BACKEND='csv')
+    out = subprocess.run([sys.executable, '-c', WORKER, roster, selector or ''],
+                         cwd=SRC, env=env, check=True, capture_output=True,
+                         text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_table(results, baseline=None):
+    print(f"{'courses':>8} " + ' '.join(f"{label:>10}" for _, label, _ in METRICS))
+    for size, r in results.items():
+        print(f"{r['courses']:>8} " + ' '.join(f"{r[key]:>10.1f}" for key, _, _ in METRICS))
+        old = (baseline or {}).get(size)
+        if old:
+            cells = []
+            for key, _, higher_better in METRICS:
+                change = (r[key] - old[key]) / old[key] * 100 if old[key] else 0.0
+                worse = -change if higher_better else change
+                flag = '!' if worse > REGRESSION else ' '
+                cells.append(f"{change:>+8.1f}%{flag}")
+            print(f"{'vs base':>8} " + ' '.join(cells))
+
+
+def main():
+    p = argparse.ArgumentParser(description="recommend_courses benchmark across catalog sizes")
+    p.add_argument('--sizes', nargs='+', default=['real', '200', '1000', '5000'],
+                   help="Course counts, or 'real' for data/courses.csv")
+    p.add_argument('--students', type=int, default=500, help='Students per size')
+    p.add_argument('--fan-in', type=int, default=2)
+    p.add_argument('--depth', type=int, default=1)
+    p.add_argument('--selector', choices=['greedy', 'optimal'])
+    p.add_argument('--seed', type=int, default=0)
+    p.add_argument('--json', help='Write results to this file')
+    p.add_argument('--compare', help='Earlier results file to compare against')
+    args = p.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        print(f"Baseline: commit {baseline['meta'].get('commit')} "
+              f"({baseline['meta'].get('timestamp')})")
+        baseline = baseline['results']
+
+    results = {}
+    workdir = tempfile.mkdtemp(prefix='aiu-bench-')
+    try:
+        for size in args.sizes:
+            data, roster = prepare(size, workdir, args)
+            results[size] = measure(data, roster, args.selector)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print_table(results, baseline)
+    slower = [r['courses'] for r in results.values() if r['batch_per_s'] <= r['per_s']]
+    if args.json:
+        meta = {
+            'commit':    git_commit(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python':    sys.version.split()[0],
+            'platform':  platform.platform(),
+            'args':      vars(args),
+        }
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'meta': meta, 'results': results}, f, indent=2)
+    if slower:
+        print(f"FAIL: batch path is not faster than per-call at "
+              f"{', '.join(map(str, slower))} courses", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+bench_selection.py
+
+Compares the 'greedy' and 'optimal' credit-cap selectors on synthetic
+eligible sets of growing size: objective value reached, credit hours used
+and time per selection.
+
+    python benchmarks/bench_selection.py --sizes 10 50 200 400 --caps 12 18
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from course_selection import DEFAULT_WEIGHTS, select_greedy, select_optimal
+
+
+def synthetic_eligibles(n, rng):
+    """Eligible dicts sorted like _finalize sorts them, plus their values."""
+    eligibles = []
+    values = []
+    for i in range(n):
+        credits = rng.choice((2, 2, 3, 3, 3, 4))
+        level = rng.randint(1, 4)
+        retake = rng.random() < 0.1
+        unlocks = rng.choice((0, 0, 0, 1, 1, 2, 3, 5))
+        eligibles.append({'course_code': f'C{i}', 'credits': credits, 'level': level})
+        values.append(
+            DEFAULT_WEIGHTS['credit'] * credits
+            + DEFAULT_WEIGHTS['level'] * (4 - level)
+            + DEFAULT_WEIGHTS['unlock'] * unlocks
+            + (DEFAULT_WEIGHTS['retake'] if retake else 0)
+        )
+    order = sorted(range(n), key=lambda i: (eligibles[i]['level'], -eligibles[i]['credits']))
+    return [eligibles[i] for i in order], [values[i] for i in order]
+
+
+def measure(func, eligibles, cap, values, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        chosen = func(eligibles, cap, values)
+    elapsed = (time.perf_counter() - start) / repeat
+    picked = {id(e) for e in chosen}
+    value = sum(v for e, v in zip(eligibles, values) if id(e) in picked)
+    credits = sum(e['credits'] for e in chosen)
+    return value, credits, elapsed
+
+
+def main():
+    p = argparse.ArgumentParser(description="Greedy vs optimal selector benchmark")
+    p.add_argument('--sizes', type=int, nargs='+', default=[10, 25, 50, 100, 200, 400])
+    p.add_argument('--caps', type=int, nargs='+', default=[12, 15, 18])
+    p.add_argument('--trials', type=int, default=20, help='Random sets per size/cap')
+    p.add_argument('--repeat', type=int, default=5, help='Timing repetitions per set')
+    p.add_argument('--seed', type=int, default=0)
+    args = p.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'size':>5} {'cap':>4} | {'greedy val':>10} {'cr':>5} {'us':>8} | "
+          f"{'optimal val':>11} {'cr':>5} {'us':>8} | {'gain':>6}")
+    for n in args.sizes:
+        for cap in args.caps:
+            totals = {'greedy': [0, 0, 0.0], 'optimal': [0, 0, 0.0]}
+            for _ in range(args.trials):
+                eligibles, values = synthetic_eligibles(n, rng)
+                for name, func in (('greedy', select_greedy), ('optimal', select_optimal)):
+                    value, credits, elapsed = measure(func, eligibles, cap, values, args.repeat)
+                    t = totals[name]
+                    t[0] += value
+                    t[1] += credits
+                    t[2] += elapsed
+            g, o = totals['greedy'], totals['optimal']
+            k = args.trials
+            gain = (o[0] - g[0]) / g[0] * 100 if g[0] else 0.0
+            print(f"{n:>5} {cap:>4} | {g[0] / k:>10.1f} {g[1] / k:>5.1f} {g[2] / k * 1e6:>8.1f} | "
+                  f"{o[0] / k:>11.1f} {o[1] / k:>5.1f} {o[2] / k * 1e6:>8.1f} | {gain:>5.1f}%")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+bench_startup.py
+
+Cold-start regression gate. Each scenario runs in a fresh interpreter and
+reports import time, time to the first recommendation, peak RSS and whether
+pandas/experta were pulled in. Exits non-zero when a limit is exceeded.
+
+    python benchmarks/bench_startup.py --max-import-ms 150 --max-rss-mb 60 --json startup.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+# Scenario name -> (modules to import, code timed as "first use")
+SCENARIOS = {
+    'KnowledgeBase':    ('import KnowledgeBase', 'KnowledgeBase.get_catalog()'),
+    'inference_engine': ('import inference_engine',
+                         "inference_engine.recommend_courses(3.2, ['CSE014'], [], 'Fall', 'All')"),
+    'KB_Editor':        ('import KB_Editor', 'KB_Editor.kb.get_store().list_rows()'),
+    'bulk_advise':      ('import bulk_advise', 'bulk_advise.init_worker()'),
+}
+
+PROBE = '''
+import json, resource, sys, time
+t0 = time.perf_counter()
+{imports}
+t1 = time.perf_counter()
+{first_use}
+t2 = time.perf_counter()
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+if sys.platform == 'darwin':
+    rss //= 1024
+print(json.dumps({{
+    'import_ms': (t1 - t0) * 1e3,
+    'first_use_ms': (t2 - t1) * 1e3,
+    'rss_mb': rss / 1024,
+    'pandas': 'pandas' in sys.modules,
+    'experta': 'experta' in sys.modules,
+}}))
+'''
+
+
+def run_probe(imports, first_use) -> dict:
+    code = PROBE.format(imports=imports, first_use=first_use)
+    out = subprocess.run([sys.executable, '-c', code], cwd=SRC, check=True,
+                         capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    p = argparse.ArgumentParser(description="Cold import time / RSS benchmark")
+    p.add_argument('--runs', type=int, default=5, help='Fresh interpreters per scenario')
+    p.add_argument('--scenarios', nargs='+', choices=list(SCENARIOS), default=list(SCENARIOS))
+    p.add_argument('--max-import-ms', type=float, help='Fail if median import time exceeds this')
+    p.add_argument('--max-rss-mb', type=float, help='Fail if median peak RSS exceeds this')
+    p.add_argument('--forbid', nargs='*', default=['pandas', 'experta'],
+                   help='Modules that must not be loaded by any scenario')
+    p.add_argument('--json', help='Write results to this file')
+    args = p.parse_args()
+
+    results = {}
+    failures = []
+    print(f"{'scenario':<18} {'import ms':>10} {'first use ms':>13} {'rss MB':>8}  loaded")
+    for name in args.scenarios:
+        runs = [run_probe(*SCENARIOS[name]) for _ in range(args.runs)]
+        summary = {
+            key: statistics.median(r[key] for r in runs)
+            for key in ('import_ms', 'first_use_ms', 'rss_mb')
+        }
+        summary['loaded'] = [m for m in ('pandas', 'experta') if any(r[m] for r in runs)]
+        results[name] = summary
+        print(f"{name:<18} {summary['import_ms']:>10.1f} {summary['first_use_ms']:>13.1f} "
+              f"{summary['rss_mb']:>8.1f}  {', '.join(summary['loaded']) or '-'}")
+
+        if args.max_import_ms is not None and summary['import_ms'] > args.max_import_ms:
+            failures.append(f"{name}: import {summary['import_ms']:.1f} ms > {args.max_import_ms} ms")
+        if args.max_rss_mb is not None and summary['rss_mb'] > args.max_rss_mb:
+            failures.append(f"{name}: RSS {summary['rss_mb']:.1f} MB > {args.max_rss_mb} MB")
+        for module in set(summary['loaded']) & set(args.forbid):
+            failures.append(f"{name}: imported {module}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'python': sys.version.split()[0], 'results': results}, f, indent=2)
+    for failure in failures:
+        print(f"FAIL {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+synthetic.py
+
+Synthetic catalogs and student populations for the benchmarks.
+
+Catalogs follow the shape of data/courses.csv: courses spread over levels,
+prerequisites drawn from lower levels (fan-in and how many levels back a
+prerequisite may reach are configurable), a share of track-specific
+courses and mostly single-semester offerings. Students get a realistic
+history by simulating past terms under the advising rules: each term they
+take a load of eligible courses, pass most of them (per-student pass rate)
+and fail the rest, and their CGPA follows their pass rate.
+
+    python benchmarks/synthetic.py catalog --courses 1000 -o /tmp/cat1000
+    python benchmarks/synthetic.py students /tmp/cat1000 -n 5000 -o roster.jsonl
+    python benchmarks/synthetic.py transcript /tmp/cat1000 -n 20000 -o export.csv.gz
+
+The student file is a bulk_advise roster (JSONL). The transcript is a
+registrar-style export (one row per course attempt, see roster_import.py),
+optionally with a share of noisy rows to exercise validation.
+"""
+
+import argparse
+import csv
+import gzip
+import json
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from catalog_snapshot import COLUMNS, read_course_rows
+
+TRACKS = ('Artificial Intelligence Science', 'Software Engineering', 'Data Science')
+POLICIES = {
+    'credit_limits': [
+        {'min_cgpa': 0.0, 'max_cgpa': 1.99, 'max_credits': 12},
+        {'min_cgpa': 2.0, 'max_cgpa': 2.99, 'max_credits': 15},
+        {'min_cgpa': 3.0, 'max_cgpa': 4.0, 'max_credits': 18},
+    ],
+    'retake_failed_priority': True,
+}
+
+
+def generate_catalog(n_courses, levels=(0.25, 0.25, 0.25, 0.25), fan_in=2,
+                     depth=1, tracks=TRACKS[:1], track_share=0.35,
+                     coreq_rate=0.02, seed=0) -> list:
+    """
+    Course rows (dicts keyed by COLUMNS).
+
+    levels      share of courses per level (level 1 first)
+    fan_in      max prerequisites per course above level 1
+    depth       how many levels below its own a prerequisite may sit
+    tracks      track names used for track-specific courses
+    track_share fraction of courses above level 1 tied to a track
+    coreq_rate  chance a course also gets a co-requisite
+    """
+    rng = random.Random(seed)
+    counts = [int(round(share * n_courses)) for share in levels]
+    counts[0] += n_courses - sum(counts)
+    rows = []
+    by_level = {}
+    for level, count in enumerate(counts, start=1):
+        for _ in range(count):
+            code = f"S{level}{len(rows):05d}"
+            track = 'All'
+            if level > 1 and rng.random() < track_share:
+                track = rng.choice(tracks)
+            pool = [c for lev in range(max(1, level - depth), level)
+                    for c in by_level.get(lev, ())
+                    if c[1] in ('All', track)]
+            prereqs = []
+            if pool:
+                k = rng.randint(0, fan_in) if rng.random() < 0.7 else 0
+                prereqs = [c[0] for c in rng.sample(pool, min(k, len(pool)))]
+            coreqs = []
+            if pool and rng.random() < coreq_rate:
+                coreqs = [rng.choice(pool)[0]]
+            rows.append({
+                'Course Code':      code,
+                'Course Name':      f"Synthetic Course {len(rows)}",
+                'Prerequisites':    ','.join(prereqs),
+                'Co-requisites':    ','.join(c for c in coreqs if c not in prereqs),
+                'Credit Hours':     rng.choice((2, 3, 3, 3, 3, 4)),
+                'Semester Offered': rng.choices(('Fall', 'Spring', 'Both'), (10, 10, 1))[0],
+                'Track':            track,
+                'Level':            level,
+            })
+            by_level.setdefault(level, []).append((code, track))
+    return rows
+
+
+def write_catalog(path, rows, policies=POLICIES):
+    """Write courses.csv and policies.json into directory path."""
+    os.makedirs(path, exist_ok=True)
+    with open(os.path.join(path, 'courses.csv'), 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=COLUMNS, lineterminator='\n')
+        writer.writeheader()
+        writer.writerows(rows)
+    with open(os.path.join(path, 'policies.json'), 'w', encoding='utf-8') as f:
+        json.dump(policies, f, indent=2)
+
+
+def generate_students(rows, n_students, max_terms=8, load=15, seed=0):
+    """
+    Yield roster records (cgpa, passed, failed, semester, track) whose
+    passed/failed histories come from simulating up to max_terms terms.
+    """
+    from KnowledgeBase import Catalog
+    from prereq_graph import iter_bits
+
+    rng = random.Random(seed)
+    catalog = Catalog.from_records(rows)
+    graph = catalog.graph
+    courses = catalog.courses
+    tracks = sorted({c.track for c in courses} - {'All'}) or ['All']
+    offered = {t: graph.encode(c.code for c in courses if c.semester in (t, 'Both'))
+               for t in ('Fall', 'Spring')}
+    open_to = {t: graph.encode(c.code for c in courses if c.track in (t, 'All'))
+               for t in tracks}
+    top = max(c.level for c in courses)
+    up_to_level = {}  # current level -> courses its level gate allows
+    for c in courses:
+        for lev in range(c.level - 1, top + 1):
+            up_to_level[lev] = up_to_level.get(lev, 0) | 1 << c.index
+    for _ in range(n_students):
+        track = rng.choice(tracks)
+        pass_rate = min(0.99, max(0.4, rng.gauss(0.85, 0.12)))
+        passed = failed = 0
+        level = 0
+        semester = 'Fall'
+        for _ in range(rng.randint(0, max_terms)):
+            mask = offered[semester] & open_to[track] & up_to_level[level] & ~passed
+            candidates = [courses[i] for i in iter_bits(mask)
+                          if not graph.req_mask[i] & ~passed]
+            rng.shuffle(candidates)
+            # retakes first, then lower levels, like an advisor would
+            candidates.sort(key=lambda c: (not failed >> c.index & 1, c.level))
+            credits = 0
+            for c in candidates:
+                if credits + c.credits > load:
+                    continue
+                credits += c.credits
+                if rng.random() < pass_rate:
+                    passed |= 1 << c.index
+                    failed &= ~(1 << c.index)
+                    level = max(level, c.level)
+                else:
+                    failed |= 1 << c.index
+            semester = 'Spring' if semester == 'Fall' else 'Fall'
+        cgpa = min(4.0, max(0.0, rng.gauss(4.0 * pass_rate - 0.4, 0.3)))
+        yield {
+            'cgpa':     round(cgpa, 2),
+            'passed':   [courses[i].code for i in iter_bits(passed)],
+            'failed':   [courses[i].code for i in iter_bits(failed)],
+            'semester': semester,
+            'track':    track,
+        }
+
+
+def write_students(path, students):
+    with open(path, 'w', encoding='utf-8') as f:
+        for i, student in enumerate(students, start=1):
+            f.write(json.dumps({'student_id': f"S{i:06d}", **student}) + '\n')
+
+
+TRANSCRIPT_COLUMNS = ['student_id', 'term', 'course_code', 'grade', 'cgpa']
+PASS_GRADES = ('A', 'A-', 'B+', 'B', 'B-', 'C+', 'C', 'D')
+
+
+def write_transcript(path, students, noise=0.0, seed=0):
+    """
+    Write students as one row per attempt: failed courses get an F (and
+    some passed ones an F a term before the pass), terms count back from
+    Fall 2025. A noise share of rows gets a mangled or unknown course code.
+    Gzip-compressed if path ends in .gz. Returns the number of rows.
+    """
+    rng = random.Random(seed)
+    opener = gzip.open if path.endswith('.gz') else open
+    rows = 0
+    with opener(path, 'wt', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(TRANSCRIPT_COLUMNS)
+        for i, student in enumerate(students, start=1):
+            sid = f"S{i:06d}"
+            attempts = [(c, rng.choice(PASS_GRADES)) for c in student['passed']]
+            attempts += [(c, 'F') for c in student['failed']]
+            attempts += [(c, 'F') for c in student['passed'] if rng.random() < 0.05]
+            rng.shuffle(attempts)
+            # passes after the failed attempts of the same course
+            attempts.sort(key=lambda a: a[1] != 'F')
+            terms = max(1, len(attempts) // 5)
+            for n, (code, grade) in enumerate(attempts):
+                back = terms - 1 - n * terms // max(len(attempts), 1)
+                year = 2025 - (back + 1) // 2
+                season = 'Fall' if back % 2 == 0 else 'Spring'
+                if rng.random() < noise:
+                    code = rng.choice([code.lower(), code[:-1] + ' ' + code[-1], 'XX' + code])
+                writer.writerow([sid, f"{season} {year}", code, grade, student['cgpa']])
+                rows += 1
+    return rows
+
+
+def main():
+    p = argparse.ArgumentParser(description="Synthetic catalogs and student rosters")
+    sub = p.add_subparsers(dest='cmd', required=True)
+
+    p_cat = sub.add_parser('catalog', help='Write courses.csv + policies.json')
+    p_cat.add_argument('--courses', type=int, default=500)
+    p_cat.add_argument('--levels', type=float, nargs='+', default=[0.25] * 4,
+                       help='Share of courses per level')
+    p_cat.add_argument('--fan-in', type=int, default=2, help='Max prerequisites per course')
+    p_cat.add_argument('--depth', type=int, default=1,
+                       help='Levels below a course its prerequisites may come from')
+    p_cat.add_argument('--tracks', nargs='+', default=list(TRACKS[:1]))
+    p_cat.add_argument('--track-share', type=float, default=0.35)
+    p_cat.add_argument('--seed', type=int, default=0)
+    p_cat.add_argument('-o', '--output', required=True, help='Output directory')
+
+    p_stu = sub.add_parser('students', help='Write a JSONL roster for a catalog')
+    p_stu.add_argument('catalog', help='Directory holding courses.csv')
+    p_stu.add_argument('-n', '--students', type=int, default=1000)
+    p_stu.add_argument('--max-terms', type=int, default=8)
+    p_stu.add_argument('--seed', type=int, default=0)
+    p_stu.add_argument('-o', '--output', required=True, help='Output .jsonl')
+
+    p_tr = sub.add_parser('transcript', help='Write a registrar-style transcript export')
+    p_tr.add_argument('catalog', help='Directory holding courses.csv')
+    p_tr.add_argument('-n', '--students', type=int, default=20000)
+    p_tr.add_argument('--max-terms', type=int, default=8)
+    p_tr.add_argument('--noise', type=float, default=0.0, help='Share of mangled rows')
+    p_tr.add_argument('--seed', type=int, default=0)
+    p_tr.add_argument('-o', '--output', required=True, help='Output .csv or .csv.gz')
+
+    args = p.parse_args()
+    if args.cmd == 'catalog':
+        rows = generate_catalog(args.courses, args.levels, args.fan_in, args.depth,
+                                args.tracks, args.track_share, seed=args.seed)
+        write_catalog(args.output, rows)
+        print(f"Wrote {len(rows)} courses to {args.output}")
+    elif args.cmd == 'transcript':
+        rows = read_course_rows(os.path.join(args.catalog, 'courses.csv'))
+        n = write_transcript(args.output, generate_students(
+            rows, args.students, args.max_terms, seed=args.seed), args.noise, args.seed)
+        print(f"Wrote {n} rows for {args.students} students to {args.output}")
+    else:
+        rows = read_course_rows(os.path.join(args.catalog, 'courses.csv'))
+        write_students(args.output, generate_students(
+            rows, args.students, args.max_terms, seed=args.seed))
+        print(f"Wrote {args.students} students to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
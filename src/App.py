@@ -1,8 +1,8 @@
 import streamlit as st
 import pandas as pd
 
-from KnowledgeBase import list_all_courses, get_course
-from inference_engine import recommend_courses
+from KnowledgeBase import InvalidCatalog, add_course, delete_course, list_all_courses, get_course
+from advisor_session import AdvisorSession
 
 st.set_page_config(page_title="AIU Course Advisor", layout="wide")
 
@@ -71,14 +71,20 @@ with tab1:
         if cgpa < 0.0 or cgpa > 4.0:
             st.error("CGPA must be between 0.0 and 4.0.")
         else:
-            # Call engine, unpacking recommendations and explanations
-            recs, explanations = recommend_courses(
+            # Reuse this student's advisor session so that only the courses
+            # affected by the latest edits are re-evaluated
+            profile = dict(
                 cgpa=cgpa,
                 passed=passed,
                 failed=failed,
                 semester=semester_sel,
                 track="Ais"
             )
+            if 'advisor_session' not in st.session_state:
+                st.session_state.advisor_session = AdvisorSession(**profile)
+            else:
+                st.session_state.advisor_session.update(**profile)
+            recs, explanations = st.session_state.advisor_session.recommend()
 
             if not recs:
                 st.info("No courses can be recommended with the given inputs.")
@@ -135,6 +141,7 @@ with tab2:
                     new_track = st.selectbox("Track*", ["All", "Artificial Intelligence Science"])
                     new_prereqs = st.text_input("Prerequisites (comma-separated)", placeholder="e.g., CSE101, CSE102")
                     new_coreqs = st.text_input("Co-requisites (comma-separated)", placeholder="e.g., CSE103, CSE104")
+                new_description = st.text_area("Description", placeholder="Short course summary")
                 
                 submit_add = st.form_submit_button("Add Course")
                 if submit_add:
@@ -155,15 +162,19 @@ with tab2:
                                 'Credit Hours': new_credits,
                                 'Semester Offered': new_semester,
                                 'Track': new_track,
-                                'Level': new_level
+                                'Level': new_level,
+                                'Description': new_description
                             }
                             
                             try:
-                                # Append to CSV
-                                df = pd.DataFrame([new_course])
-                                df.to_csv('data/courses.csv', mode='a', header=False, index=False)
+                                # Atomic, locked insert through the KB store
+                                add_course(new_course)
                                 st.success(f"Added course {new_code} successfully!")
                                 st.rerun()  # Refresh the page to show the new course
+                            except InvalidCatalog as e:
+                                st.error("Course not added; it would make the catalog inconsistent:")
+                                for issue in e.issues:
+                                    st.write(f"- {issue.code}: {issue.detail}")
                             except Exception as e:
                                 st.error(f"Error adding course: {str(e)}")
             
@@ -190,10 +201,8 @@ with tab2:
                         st.error("Please confirm the deletion")
                     else:
                         try:
-                            # Remove course from DataFrame and save
-                            df = pd.DataFrame(courses)
-                            df = df[df['Course Code'] != del_code]
-                            df.to_csv('data/courses.csv', index=False)
+                            # Atomic, locked delete through the KB store
+                            delete_course(del_code)
                             st.success(f"Deleted course {del_code} successfully!")
                             st.rerun()  # Refresh the page to show the changes
                         except Exception as e:
@@ -1,28 +1,41 @@
-
-import pandas as pd
 import argparse
+import csv
+import json
 import sys
 
-KB_PATH = r"../data/courses.csv"
+import KnowledgeBase as kb
+from catalog_validator import format_issue, validate_rows
+from kb_store import apply_edits, read_csv_rows
+
+def fail(exc):
+    print(f"Error: {exc}", file=sys.stderr)
+    sys.exit(1)
 
-def load_kb():
-    return pd.read_csv(KB_PATH, dtype=str).fillna('')
+def fail_invalid(exc):
+    print(f"Error: edit rejected, it would introduce {len(exc.issues)} catalog error(s):",
+          file=sys.stderr)
+    for issue in exc.issues:
+        print(f"  {format_issue(issue)}", file=sys.stderr)
+    print("Fix the course data, or pass --no-validate to save anyway.", file=sys.stderr)
+    sys.exit(1)
 
-def save_kb(df):
-    df.to_csv(KB_PATH, index=False)
-    print(f"KB updated: {KB_PATH}")
+def saved():
+    print(f"KB updated: {kb.get_store().path} (version {kb.kb_version()})")
 
 def list_courses(args):
-    df = load_kb()
+    import pandas as pd  # only needed for the markdown table
+    store = kb.get_store()
     if args.code:
-        df = df[df['Course Code'] == args.code]
-    print(df.to_markdown(index=False))
+        row = store.get(args.code)
+        rows = [row] if row else []
+    else:
+        rows = store.list_rows()
+    columns = list(kb.COLUMNS)
+    if any(r.get('Description') for r in rows):
+        columns.append('Description')
+    print(pd.DataFrame(rows, columns=columns).to_markdown(index=False))
 
 def add_course(args):
-    df = load_kb()
-    if args.code in df['Course Code'].values:
-        print(f"Error: Course {args.code} already exists.", file=sys.stderr)
-        sys.exit(1)
     new = {
         'Course Code': args.code,
         'Course Name': args.name,
@@ -34,40 +47,102 @@ def add_course(args):
         'Level': args.level,
         'Description': args.description or ''
     }
-    df = pd.concat([df, pd.DataFrame([new])], ignore_index=True)
-    save_kb(df)
+    try:
+        kb.add_course(new)
+    except kb.InvalidCatalog as exc:
+        fail_invalid(exc)
+    except kb.KBStoreError as exc:
+        fail(exc)
+    saved()
 
 def edit_course(args):
-    df = load_kb()
-    idx = df.index[df['Course Code'] == args.code]
-    if len(idx) == 0:
-        print(f"Error: Course {args.code} not found.", file=sys.stderr)
-        sys.exit(1)
-    i = idx[0]
-    for field, val in {
-        'Course Name': args.name,
-        'Prerequisites': args.reprereqs,
-        'Co-requisites': args.recoreqs,
-        'Credit Hours': args.credits,
-        'Semester Offered': args.semester,
-        'Track': args.track,
-        'Level': args.level,
-        'Description': args.description
-    }.items():
-        if val is not None:
-            df.at[i, field] = val
-    save_kb(df)
+    changes = {
+        field: val
+        for field, val in {
+            'Course Name': args.name,
+            'Prerequisites': args.reprereqs,
+            'Co-requisites': args.recoreqs,
+            'Credit Hours': args.credits,
+            'Semester Offered': args.semester,
+            'Track': args.track,
+            'Level': args.level,
+            'Description': args.description
+        }.items()
+        if val is not None
+    }
+    try:
+        kb.update_course(args.code, changes)
+    except kb.InvalidCatalog as exc:
+        fail_invalid(exc)
+    except kb.KBStoreError as exc:
+        fail(exc)
+    saved()
 
 def delete_course(args):
-    df = load_kb()
-    if args.code not in df['Course Code'].values:
-        print(f"Error: Course {args.code} not found.", file=sys.stderr)
-        sys.exit(1)
-    df = df[df['Course Code'] != args.code]
-    save_kb(df)
+    try:
+        kb.delete_course(args.code)
+    except kb.InvalidCatalog as exc:
+        fail_invalid(exc)
+    except kb.KBStoreError as exc:
+        fail(exc)
+    saved()
+
+def import_courses(args):
+    try:
+        kb.get_store().import_csv(args.path)
+    except kb.InvalidCatalog as exc:
+        fail_invalid(exc)
+    except kb.KBStoreError as exc:
+        fail(exc)
+    saved()
+
+def read_edits(path):
+    """Edits from a JSONL file or a CSV with an 'op' column; empty CSV cells are left unchanged."""
+    with open(path, newline='', encoding='utf-8') as f:
+        if path.endswith(('.jsonl', '.ndjson')):
+            return [json.loads(line) for line in f if line.strip()]
+        return [{k: v for k, v in row.items() if k and v not in (None, '')}
+                for row in csv.DictReader(f)]
+
+def apply_courses(args):
+    edits = read_edits(args.path)
+    try:
+        kb.apply_course_edits(edits)
+    except kb.InvalidCatalog as exc:
+        fail_invalid(exc)
+    except kb.KBStoreError as exc:
+        fail(exc)
+    print(f"Applied {len(edits)} edit(s).")
+    saved()
+
+def validate(args):
+    rows = read_csv_rows(args.file)[1] if args.file else kb.get_store().list_rows()
+    if args.edits:
+        try:
+            rows = apply_edits(rows, read_edits(args.edits))
+        except kb.KBStoreError as exc:
+            fail(exc)
+    issues = validate_rows(rows)
+    if args.errors_only:
+        issues = [i for i in issues if i.severity == 'error']
+    if args.json:
+        print(json.dumps([i._asdict() for i in issues], indent=2))
+    else:
+        for issue in issues:
+            print(format_issue(issue))
+        n_errors = sum(i.severity == 'error' for i in issues)
+        print(f"{len(rows)} courses checked: {n_errors} error(s), "
+              f"{len(issues) - n_errors} warning(s)")
+    sys.exit(1 if any(i.severity == 'error' for i in issues) else 0)
+
+def export_courses(args):
+    kb.get_store().export_csv(args.path)
+    print(f"Exported KB to {args.path}")
 
 def main():
     p = argparse.ArgumentParser(description="KB Editor for courses_kb.csv")
+    p.add_argument('--no-validate', action='store_true',
+                   help='Save edits even if they introduce catalog errors')
     sub = p.add_subparsers(dest='cmd', required=True)
 
     # list
@@ -106,7 +181,28 @@ def main():
     p_del.add_argument('code')
     p_del.set_defaults(func=delete_course)
 
+    # import / export
+    p_imp = sub.add_parser('import', help='Replace all courses with a CSV file')
+    p_imp.add_argument('path')
+    p_imp.set_defaults(func=import_courses)
+    p_exp = sub.add_parser('export', help='Write all courses to a CSV file')
+    p_exp.add_argument('path')
+    p_exp.set_defaults(func=export_courses)
+
+    # bulk edits / validation
+    p_apply = sub.add_parser('apply', help='Apply a file of add/edit/delete edits in one write')
+    p_apply.add_argument('path', help=".jsonl or .csv with an 'op' column (add, edit, delete)")
+    p_apply.set_defaults(func=apply_courses)
+    p_val = sub.add_parser('validate', help='Check the catalog for consistency errors')
+    p_val.add_argument('--file', help='Check this CSV instead of the KB')
+    p_val.add_argument('--edits', help='Check the catalog as it would be after these edits')
+    p_val.add_argument('--errors-only', action='store_true')
+    p_val.add_argument('--json', action='store_true')
+    p_val.set_defaults(func=validate)
+
     args = p.parse_args()
+    if args.no_validate:
+        kb.get_store().validator = None
     args.func(args)
 
 if __name__ == '__main__':
@@ -1,23 +1,337 @@
-import pandas as pd
+import contextlib
+import contextvars
 import json
+import logging
+import os
+import struct
+import threading
+import time
+from collections.abc import Mapping
 
-# 1. Load files
-_courses_df = pd.read_csv( r"../data/courses.csv").fillna('')
-with open(r"../data/policies.json") as f:
-    _policies = json.load(f)
+from catalog_snapshot import COLUMNS, open_snapshot, split_codes
+from catalog_validator import check_edit
+from kb_store import (CsvKBStore, CourseNotFound, DuplicateCourse, InvalidCatalog,
+                      KBStoreError, open_store)
+from prereq_graph import CatalogError, PrereqGraph
+
+logger = logging.getLogger(__name__)
+
+
+class Course(Mapping):
+    """
+    Compiled, immutable catalog record.
+
+    Attribute access (``course.level``) is the fast path used by the engine;
+    mapping access (``course['Level']``) keeps the CSV column names working
+    for the UI and any code written against the old dict records.
+    """
+    __slots__ = ('index', 'code', 'name', 'prerequisites', 'corequisites',
+                 'credits', 'semester', 'track', 'level')
+
+    def __init__(self, index, code, name, prerequisites, corequisites,
+                 credits, semester, track, level):
+        setter = object.__setattr__
+        setter(self, 'index', index)
+        setter(self, 'code', code)
+        setter(self, 'name', name)
+        setter(self, 'prerequisites', tuple(prerequisites))
+        setter(self, 'corequisites', tuple(corequisites))
+        setter(self, 'credits', int(credits))
+        setter(self, 'semester', semester)
+        setter(self, 'track', track)
+        setter(self, 'level', int(level))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Course records are immutable")
+
+    def __getitem__(self, key):
+        if key == 'Course Code':
+            return self.code
+        if key == 'Course Name':
+            return self.name
+        if key == 'Prerequisites':
+            return ','.join(self.prerequisites)
+        if key == 'Co-requisites':
+            return ','.join(self.corequisites)
+        if key == 'Credit Hours':
+            return self.credits
+        if key == 'Semester Offered':
+            return self.semester
+        if key == 'Track':
+            return self.track
+        if key == 'Level':
+            return self.level
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(COLUMNS)
+
+    def __len__(self):
+        return len(COLUMNS)
+
+    def __repr__(self):
+        return f"Course({self.code!r}, level={self.level}, credits={self.credits})"
+
+
+class Catalog:
+    """
+    Immutable course catalog with O(1) lookup by course code.
+
+    Compiling a catalog also builds its PrereqGraph, which raises CatalogError
+    for requirement cycles and prereq/coreq codes missing from the catalog.
+    """
+    __slots__ = ('courses', 'codes', '_by_code', 'graph')
+
+    def __init__(self, courses):
+        courses = tuple(courses)
+        object.__setattr__(self, 'courses', courses)
+        object.__setattr__(self, 'codes', tuple(c.code for c in courses))
+        object.__setattr__(self, '_by_code', {c.code: c for c in courses})
+        object.__setattr__(self, 'graph', PrereqGraph(self))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Catalog is immutable")
+
+    @classmethod
+    def from_records(cls, records):
+        """Compile raw CSV rows (dicts keyed by column name) into a catalog."""
+        return cls(
+            Course(
+                index=i,
+                code=str(r['Course Code']).strip(),
+                name=r['Course Name'],
+                prerequisites=split_codes(r['Prerequisites']),
+                corequisites=split_codes(r['Co-requisites']),
+                credits=r['Credit Hours'],
+                semester=r['Semester Offered'],
+                track=r['Track'],
+                level=r['Level'],
+            )
+            for i, r in enumerate(records)
+        )
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        """Materialize course records from a memory-mapped CatalogSnapshot."""
+        return cls(
+            Course(i, *snapshot.course(i))
+            for i in range(snapshot.n_courses)
+        )
+
+    def get(self, code):
+        return self._by_code.get(code)
+
+    def __contains__(self, code):
+        return code in self._by_code
+
+    def __iter__(self):
+        return iter(self.courses)
+
+    def __len__(self):
+        return len(self.courses)
+
+
+# Data files live in ../data relative to this module, not the working
+# directory; AIU_ADVISOR_DATA_DIR points the advisor at another copy.
+DATA_DIR = os.environ.get(
+    'AIU_ADVISOR_DATA_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+)
+COURSES_PATH = os.path.join(DATA_DIR, 'courses.csv')
+POLICIES_PATH = os.path.join(DATA_DIR, 'policies.json')
+# Optional seat limits per course for cohort_allocation (Course Code, Capacity)
+CAPACITIES_PATH = os.path.join(DATA_DIR, 'capacities.csv')
+
+# 1. Load files lazily: nothing is read until the catalog or a policy is
+#    first needed. After that the CatalogHolder polls the sources (store
+#    version, policy file stat) at most every RELOAD_INTERVAL seconds and
+#    atomically swaps in a freshly compiled KBState when they changed.
+RELOAD_INTERVAL = float(os.environ.get('AIU_ADVISOR_RELOAD_INTERVAL', 2.0))
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_store():
+    """
+    Editable KB backend (kb_store), chosen by AIU_ADVISOR_KB_BACKEND. Edits
+    that would add catalog errors raise InvalidCatalog (catalog_validator).
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = open_store(COURSES_PATH, validator=check_edit)
+    return _store
+
+def data_signature() -> tuple:
+    """KB store version and policy file (mtime_ns, size); changes on any edit."""
+    try:
+        st = os.stat(POLICIES_PATH)
+        policies = (st.st_mtime_ns, st.st_size)
+    except OSError:
+        policies = None
+    try:
+        courses = kb_version()
+    except (OSError, KBStoreError):
+        courses = None
+    return (courses, policies)
+
+
+class KBState:
+    """One immutable, consistent version of the catalog and policies."""
+    __slots__ = ('catalog', 'policies', 'version', 'source')
+
+    def __init__(self, catalog, policies, version, source):
+        self.catalog = catalog
+        self.policies = policies
+        self.version = version  # bumps on every swap in this process
+        self.source = source    # content hash (CSV) or store version (SQLite)
+
+    def credit_band(self, cgpa: float) -> int:
+        for i, band in enumerate(self.policies['credit_limits']):
+            if band['min_cgpa'] <= cgpa <= band['max_cgpa']:
+                return i
+        raise ValueError(f"CGPA {cgpa} out of range")
+
+    def max_credits_for_cgpa(self, cgpa: float) -> int:
+        return self.policies['credit_limits'][self.credit_band(cgpa)]['max_credits']
+
+    def retake_failed_first(self) -> bool:
+        return self.policies.get('retake_failed_priority', False)
+
+
+def _load(signature) -> tuple:
+    """(catalog, policies, source) compiled from the current sources."""
+    store = get_store()
+    if isinstance(store, CsvKBStore):
+        snapshot = open_snapshot(COURSES_PATH, POLICIES_PATH)
+        try:
+            return (Catalog.from_snapshot(snapshot), snapshot.policies(),
+                    snapshot.source_hash)
+        finally:
+            snapshot.close()
+    with open(POLICIES_PATH, encoding='utf-8') as f:
+        policies = json.load(f)
+    return Catalog.from_records(store.list_rows()), policies, signature
+
+
+class CatalogHolder:
+    """
+    Holds the current KBState and hot-reloads it when the sources change.
+
+    Readers just take holder.current(); a reload builds the new state off to
+    the side and replaces the reference in one assignment, so a caller that
+    already holds a KBState keeps a consistent view. If a reload fails (e.g.
+    an edit introduced a requirement cycle) the previous state stays live.
+    """
+
+    def __init__(self, poll_interval: float = RELOAD_INTERVAL):
+        self.poll_interval = poll_interval
+        self._state = None
+        self._signature = None
+        self._polled_at = float('-inf')
+        self._lock = threading.Lock()
+
+    def current(self) -> KBState:
+        state = self._state
+        if state is None or time.monotonic() - self._polled_at >= self.poll_interval:
+            state = self.poll()
+        return state
+
+    def poll(self) -> KBState:
+        """Check the sources now and reload if they changed."""
+        with self._lock:
+            self._polled_at = time.monotonic()
+            signature = data_signature()
+            if self._state is not None and signature == self._signature:
+                return self._state
+            try:
+                catalog, policies, source = _load(signature)
+            except (OSError, ValueError, struct.error, KBStoreError) as exc:
+                if self._state is None:
+                    raise
+                self._signature = signature  # warn once per bad edit
+                logger.warning(f"Catalog reload failed, keeping version "
+                               f"{self._state.version}: {exc}")
+                return self._state
+            self._signature = signature
+            if self._state is not None and source == self._state.source:
+                return self._state  # touched but identical
+            version = self._state.version + 1 if self._state else 1
+            self._state = KBState(catalog, policies, version, source)
+            return self._state
+
+    def invalidate(self):
+        """Force the next current() to check the sources."""
+        self._polled_at = float('-inf')
+
+
+_holder = CatalogHolder()
+_pinned = contextvars.ContextVar('kb_state', default=None)
+
+def current_state() -> KBState:
+    """The pinned KBState of this call, else the holder's current one."""
+    return _pinned.get() or _holder.current()
+
+@contextlib.contextmanager
+def pinned_state(state: KBState = None):
+    """
+    Pin one KBState for the duration of a request, so every catalog/policy
+    lookup inside it sees the same version even if a reload happens. An
+    enclosing pin is reused; pass state to re-pin one captured earlier.
+    """
+    if state is None:
+        state = _pinned.get()
+        if state is not None:
+            yield state
+            return
+        state = _holder.current()
+    token = _pinned.set(state)
+    try:
+        yield state
+    finally:
+        _pinned.reset(token)
+
+def catalog_version() -> int:
+    return current_state().version
+
+def get_catalog() -> Catalog:
+    return current_state().catalog
 
 def list_all_courses():
-    return _courses_df.to_dict(orient='records')
+    return list(get_catalog().courses)
 
 def get_course(code):
-    row = _courses_df[_courses_df['Course Code'] == code]
-    return row.to_dict('records')[0] if not row.empty else None
+    return get_catalog().get(code)
+
+def credit_band(cgpa: float) -> int:
+    """Index of the credit_limits band containing cgpa."""
+    return current_state().credit_band(cgpa)
 
 def max_credits_for_cgpa(cgpa: float) -> int:
-    for band in _policies['credit_limits']:
-        if band['min_cgpa'] <= cgpa <= band['max_cgpa']:
-            return band['max_credits']
-    raise ValueError(f"CGPA {cgpa} out of range")
+    return current_state().max_credits_for_cgpa(cgpa)
 
 def retake_failed_first() -> bool:
-    return _policies.get('retake_failed_priority', False)
+    return current_state().retake_failed_first()
+
+# 2. Edits go through the store, which makes each one atomic and serialized
+def add_course(row: dict):
+    get_store().add(row)
+    _holder.invalidate()
+
+def update_course(code: str, changes: dict):
+    get_store().update(code, changes)
+    _holder.invalidate()
+
+def delete_course(code: str):
+    get_store().delete(code)
+    _holder.invalidate()
+
+def apply_course_edits(edits):
+    """Add/edit/delete many courses in one validated write (kb_store.apply_edits)."""
+    get_store().apply(edits)
+    _holder.invalidate()
+
+def kb_version():
+    """Cheap change marker of the stored KB (int for SQLite, stat for CSV)."""
+    return get_store().version()
@@ -0,0 +1,287 @@
+"""
+advisor_metrics.py
+
+Per-stage instrumentation for the advisor.
+
+Call sites open a Trace per request, mark the end of each stage and add
+counts; finished traces go to the registered sinks:
+  - LoggingSink:        one structured log record per sampled trace
+  - HistogramSink:      in-memory per-stage latency histograms and counters
+  - PrometheusFileSink: the same aggregates, periodically written in the
+                        Prometheus text format (node_exporter textfile)
+
+With no sinks registered metrics.trace() returns a shared no-op trace, so
+disabled instrumentation costs one attribute check per request. Only a
+sample_rate share of requests is traced when sinks are present.
+
+Configured from the environment:
+    AIU_ADVISOR_METRICS=log,histogram,prometheus:/var/lib/node_exporter/aiu.prom
+    AIU_ADVISOR_METRICS_SAMPLE=0.1
+or in code: metrics.add_sink(HistogramSink()); metrics.sample_rate = 1.0
+"""
+
+import atexit
+import logging
+import os
+import random
+import threading
+import time
+from bisect import bisect_left
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the latency histogram buckets; +Inf is implied.
+BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+           0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+class Trace:
+    """Timings, counts and notes of one request."""
+    __slots__ = ('op', 'stages', 'counts', 'notes', 'total',
+                 '_registry', '_start', '_last')
+
+    def __init__(self, op, registry):
+        self.op = op
+        self.stages = {}
+        self.counts = {}
+        self.notes = {}
+        self.total = None
+        self._registry = registry
+        self._start = self._last = time.perf_counter()
+
+    def mark(self, stage):
+        """Attribute the time since the previous mark to stage."""
+        now = time.perf_counter()
+        self.stages[stage] = self.stages.get(stage, 0.0) + now - self._last
+        self._last = now
+
+    def count(self, name, n=1):
+        self.counts[name] = self.counts.get(name, 0) + n
+
+    def note(self, name, value):
+        self.notes[name] = value
+
+    def finish(self):
+        self.total = time.perf_counter() - self._start
+        self._registry.emit(self)
+
+
+class _NullTrace:
+    """Stand-in when instrumentation is off or the request is not sampled."""
+    __slots__ = ()
+
+    def mark(self, stage):
+        pass
+
+    def count(self, name, n=1):
+        pass
+
+    def note(self, name, value):
+        pass
+
+    def finish(self):
+        pass
+
+
+NULL_TRACE = _NullTrace()
+
+
+class Histogram:
+    __slots__ = ('counts', 'sum', 'n')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.n = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.sum += value
+        self.n += 1
+
+    def quantile(self, q) -> float:
+        """Upper bound of the bucket holding the q-quantile."""
+        if not self.n:
+            return 0.0
+        rank = q * self.n
+        seen = 0
+        for bound, count in zip(BUCKETS + (float('inf'),), self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+
+class LoggingSink:
+
+    def __init__(self, log=logger, level=logging.INFO):
+        self.log = log
+        self.level = level
+
+    def emit(self, trace):
+        if not self.log.isEnabledFor(self.level):
+            return
+        stages = ' '.join(f"{k}={v * 1e3:.3f}ms" for k, v in trace.stages.items())
+        extra = ' '.join(f"{k}={v}" for k, v in {**trace.counts, **trace.notes}.items())
+        self.log.log(self.level, f"{trace.op} total={trace.total * 1e3:.3f}ms {stages} {extra}",
+                     extra={'advisor_trace': {
+                         'op': trace.op, 'total': trace.total, 'stages': trace.stages,
+                         'counts': trace.counts, 'notes': trace.notes}})
+
+
+class HistogramSink:
+    """Aggregates traces: histograms per (op, stage), counters per (op, name)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.histograms = {}
+        self.counters = {}
+
+    def emit(self, trace):
+        with self._lock:
+            for stage, seconds in (*trace.stages.items(), ('total', trace.total)):
+                hist = self.histograms.get((trace.op, stage))
+                if hist is None:
+                    hist = self.histograms[(trace.op, stage)] = Histogram()
+                hist.observe(seconds)
+            key = (trace.op, 'traces')
+            self.counters[key] = self.counters.get(key, 0) + 1
+            for name, n in trace.counts.items():
+                self.counters[(trace.op, name)] = self.counters.get((trace.op, name), 0) + n
+
+    def snapshot(self) -> dict:
+        """{op: {'stages': {stage: {count, mean_ms, p50_ms, p99_ms}}, 'counts': {...}}}"""
+        out = {}
+        with self._lock:
+            for (op, stage), h in self.histograms.items():
+                out.setdefault(op, {'stages': {}, 'counts': {}})['stages'][stage] = {
+                    'count':   h.n,
+                    'mean_ms': h.sum / h.n * 1e3 if h.n else 0.0,
+                    'p50_ms':  h.quantile(0.5) * 1e3,
+                    'p99_ms':  h.quantile(0.99) * 1e3,
+                }
+            for (op, name), n in self.counters.items():
+                out.setdefault(op, {'stages': {}, 'counts': {}})['counts'][name] = n
+        return out
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+            self.counters.clear()
+
+
+class PrometheusFileSink(HistogramSink):
+    """
+    HistogramSink that rewrites path (atomically) at most every interval
+    seconds, plus once at exit, in the Prometheus text exposition format.
+    Registered gauges (metrics.register_gauges) are included.
+    """
+
+    def __init__(self, path, interval: float = 10.0, registry=None,
+                 prefix='aiu_advisor'):
+        super().__init__()
+        self.path = path
+        self.interval = interval
+        self.registry = registry
+        self.prefix = prefix
+        self._written = time.monotonic()
+        atexit.register(self.flush)
+
+    def emit(self, trace):
+        super().emit(trace)
+        if time.monotonic() - self._written >= self.interval:
+            self.flush()
+
+    def render(self) -> str:
+        p = self.prefix
+        lines = [f"# TYPE {p}_stage_seconds histogram"]
+        with self._lock:
+            for (op, stage), h in sorted(self.histograms.items()):
+                labels = f'op="{op}",stage="{stage}"'
+                seen = 0
+                for bound, count in zip(BUCKETS, h.counts):
+                    seen += count
+                    lines.append(f'{p}_stage_seconds_bucket{{{labels},le="{bound}"}} {seen}')
+                lines.append(f'{p}_stage_seconds_bucket{{{labels},le="+Inf"}} {h.n}')
+                lines.append(f'{p}_stage_seconds_sum{{{labels}}} {h.sum:.9f}')
+                lines.append(f'{p}_stage_seconds_count{{{labels}}} {h.n}')
+            lines.append(f"# TYPE {p}_events_total counter")
+            for (op, name), n in sorted(self.counters.items()):
+                lines.append(f'{p}_events_total{{op="{op}",event="{name}"}} {n}')
+        gauges = self.registry.gauges() if self.registry else {}
+        if gauges:
+            lines.append(f"# TYPE {p}_gauge gauge")
+            for name, value in sorted(gauges.items()):
+                lines.append(f'{p}_gauge{{name="{name}"}} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def flush(self):
+        self._written = time.monotonic()
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                f.write(self.render())
+            os.replace(tmp, self.path)
+        except OSError as exc:
+            logger.warning(f"Could not write metrics to {self.path}: {exc}")
+
+
+class Metrics:
+    """Sink registry and sampler; use the module-level ``metrics``."""
+
+    def __init__(self, sample_rate: float = 1.0):
+        self.sinks = []
+        self.sample_rate = sample_rate
+        self._gauges = {}
+
+    def add_sink(self, sink):
+        self.sinks.append(sink)
+        return sink
+
+    def remove_sink(self, sink):
+        self.sinks.remove(sink)
+
+    def trace(self, op) -> Trace:
+        if not self.sinks:
+            return NULL_TRACE
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return NULL_TRACE
+        return Trace(op, self)
+
+    def emit(self, trace):
+        for sink in self.sinks:
+            try:
+                sink.emit(trace)
+            except Exception:
+                logger.exception(f"Metrics sink {sink!r} failed")
+
+    def register_gauges(self, prefix, func):
+        """func() -> {name: number}, read when a sink exports gauges."""
+        self._gauges[prefix] = func
+
+    def gauges(self) -> dict:
+        out = {}
+        for prefix, func in self._gauges.items():
+            for name, value in func().items():
+                if isinstance(value, (int, float)):
+                    out[f"{prefix}_{name}"] = value
+        return out
+
+
+def configure_from_env(registry) -> None:
+    """Add the sinks named in AIU_ADVISOR_METRICS (see module docstring)."""
+    registry.sample_rate = float(os.environ.get('AIU_ADVISOR_METRICS_SAMPLE', 1.0))
+    for spec in filter(None, os.environ.get('AIU_ADVISOR_METRICS', '').split(',')):
+        kind, _, arg = spec.strip().partition(':')
+        if kind == 'log':
+            registry.add_sink(LoggingSink())
+        elif kind == 'histogram':
+            registry.add_sink(HistogramSink())
+        elif kind == 'prometheus' and arg:
+            registry.add_sink(PrometheusFileSink(arg, registry=registry))
+        else:
+            raise ValueError(f"Unknown metrics sink {spec!r} in AIU_ADVISOR_METRICS")
+
+
+metrics = Metrics()
+configure_from_env(metrics)
@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+advisor_service.py
+
+Asyncio JSON API around the advisor, so the Streamlit app and other campus
+systems can share one warm engine.
+
+Endpoints:
+    GET  /health                  liveness, catalog version, load and counters
+    GET  /courses                 every catalog course
+    GET  /courses/<code>          one course (404 if unknown)
+    POST /recommend               {cgpa, passed, failed, semester, track[, selector]}
+                                  -> {recommendations, explanations}
+    POST /recommend/batch         {students: [...][, selector]}
+                                  -> {results: [{row, student_id, status, ...}]}
+
+Evaluation runs in a process pool (or thread pool, --pool thread) whose
+workers compile the catalog once at start-up; the event loop only parses
+requests and never touches the catalog (lookups for /health and /courses
+run in the pool too, as they may reload it). Identical concurrent
+/recommend requests (same passed/failed sets, semester, track, CGPA and
+selector) are coalesced into one evaluation.
+Backpressure: at most --max-pending evaluations may be queued on the pool;
+beyond that requests get 503 with Retry-After instead of piling up. Bodies
+over --max-body bytes and batches over --max-batch students are refused.
+
+Example:
+    python advisor_service.py --port 8080 --workers 4
+    curl -s localhost:8080/recommend -d '{"cgpa": 3.2, "passed": ["CSE014"],
+         "semester": "Fall", "track": "All"}'
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import unquote
+
+from KnowledgeBase import catalog_version, get_catalog
+from batch_advisor import iter_chunks
+from bulk_advise import advise_chunk, init_worker, parse_student
+from course_selection import SELECTORS
+
+logger = logging.getLogger(__name__)
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = HTTPStatus(status)
+        self.headers = headers or {}
+
+
+def _recommend_one(student, selector) -> dict:
+    """Worker entry point for /recommend."""
+    from inference_engine import recommend_courses
+    recs, notes = recommend_courses(**student, selector=selector)
+    return {'recommendations': recs, 'explanations': list(notes)}
+
+
+def _catalog_info() -> dict:
+    """Worker entry point for /health."""
+    return {'catalog_version': catalog_version(), 'courses': len(get_catalog())}
+
+
+def _course_info(code=None):
+    """Worker entry point for /courses: every course, one course or None."""
+    catalog = get_catalog()
+    if code is None:
+        return {'version': catalog_version(), 'courses': [dict(c) for c in catalog]}
+    course = catalog.get(code)
+    return None if course is None else dict(course)
+
+
+def _selector(body):
+    """The request's credit-cap selector (None: the default), else 422."""
+    selector = body.get('selector')
+    if selector is not None and not (isinstance(selector, str) and selector in SELECTORS):
+        raise HTTPError(422, f"'selector' must be one of {', '.join(SELECTORS)}.")
+    return selector
+
+
+class AdvisorService:
+
+    def __init__(self, workers: int = None, pool: str = 'process',
+                 max_pending: int = 256, max_body: int = 1 << 20,
+                 max_batch: int = 5000, chunk_size: int = 250,
+                 read_timeout: float = 30.0):
+        workers = workers or os.cpu_count() or 1
+        if pool == 'process':
+            self.executor = ProcessPoolExecutor(workers, initializer=init_worker)
+        else:
+            init_worker()
+            self.executor = ThreadPoolExecutor(workers)
+        self.workers = workers
+        self.pool = pool
+        self.max_pending = max_pending
+        self.max_body = max_body
+        self.max_batch = max_batch
+        self.chunk_size = chunk_size
+        self.read_timeout = read_timeout
+
+        self.pending = 0
+        self._inflight = {}  # profile key -> future of the running evaluation
+        self.started = time.monotonic()
+        self.counters = {'requests': 0, 'evaluations': 0, 'coalesced': 0,
+                         'rejected': 0, 'errors': 0}
+
+    # -- pool ----------------------------------------------------------
+
+    def _reserve(self, n=1):
+        if self.pending + n > self.max_pending:
+            self.counters['rejected'] += 1
+            raise HTTPError(503, 'Advisor is at capacity, retry shortly.',
+                            {'Retry-After': '1'})
+        self.pending += n
+
+    async def _submit(self, fn, *args):
+        """Run fn in the pool; the caller must have reserved a slot."""
+        loop = asyncio.get_running_loop()
+        self.counters['evaluations'] += 1
+        try:
+            return await loop.run_in_executor(self.executor, fn, *args)
+        finally:
+            self.pending -= 1
+
+    async def _lookup(self, fn, *args):
+        """Run a read-only catalog lookup in the pool, off the event loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, fn, *args)
+
+    async def recommend(self, body) -> dict:
+        selector = _selector(body)
+        try:
+            student = parse_student(body)
+        except (ValueError, TypeError, KeyError) as exc:
+            raise HTTPError(422, str(exc)) from None
+        # Exact profile, not recommendation_cache.profile_key: that one polls
+        # the catalog, which must not happen on the event loop
+        key = (frozenset(student['passed']), frozenset(student['failed']),
+               student['semester'], student['track'], student['cgpa'], selector)
+
+        future = self._inflight.get(key)
+        if future is not None:
+            self.counters['coalesced'] += 1
+        else:
+            self._reserve()
+            future = asyncio.ensure_future(self._submit(_recommend_one, student, selector))
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        try:
+            # shield: one client disconnecting must not cancel the others' result
+            return await asyncio.shield(future)
+        except ValueError as exc:
+            raise HTTPError(422, str(exc)) from None
+
+    async def recommend_batch(self, body) -> dict:
+        students = body.get('students')
+        if not isinstance(students, list):
+            raise HTTPError(400, "'students' must be a list.")
+        if len(students) > self.max_batch:
+            raise HTTPError(413, f"At most {self.max_batch} students per batch.")
+        if not all(isinstance(s, dict) for s in students):
+            raise HTTPError(400, "Each student must be an object.")
+        selector = _selector(body)
+        chunks = list(iter_chunks(enumerate(students, start=1), self.chunk_size))
+        self._reserve(len(chunks))
+        parts = await asyncio.gather(*(self._submit(advise_chunk, chunk, selector)
+                                       for chunk in chunks))
+        return {'results': [r for part in parts for r in part]}
+
+    # -- read-only endpoints -------------------------------------------
+
+    async def health(self) -> dict:
+        return {
+            'status':          'ok' if self.pending < self.max_pending else 'saturated',
+            **await self._lookup(_catalog_info),
+            'pool':            self.pool,
+            'workers':         self.workers,
+            'pending':         self.pending,
+            'max_pending':     self.max_pending,
+            'inflight_keys':   len(self._inflight),
+            'uptime_s':        round(time.monotonic() - self.started, 1),
+            **self.counters,
+        }
+
+    async def courses(self, code=None):
+        result = await self._lookup(_course_info, code)
+        if result is None:
+            raise HTTPError(404, f"Course {code} not found.")
+        return result
+
+    async def route(self, method, path, body):
+        path = path.split('?', 1)[0].rstrip('/') or '/'
+        if path == '/health' and method == 'GET':
+            return await self.health()
+        if path == '/courses' and method == 'GET':
+            return await self.courses()
+        if path.startswith('/courses/') and method == 'GET':
+            return await self.courses(unquote(path[len('/courses/'):]))
+        if path in ('/recommend', '/recommend/batch'):
+            if method != 'POST':
+                raise HTTPError(405, 'Use POST.', {'Allow': 'POST'})
+            try:
+                payload = json.loads(body or b'{}')
+            except ValueError:
+                raise HTTPError(400, 'Body is not valid JSON.') from None
+            if not isinstance(payload, dict):
+                raise HTTPError(400, 'Body must be a JSON object.')
+            if path == '/recommend':
+                return await self.recommend(payload)
+            return await self.recommend_batch(payload)
+        raise HTTPError(404, f"No route for {method} {path}.")
+
+    # -- HTTP/1.1 ------------------------------------------------------
+
+    async def _read_request(self, reader):
+        line = await reader.readline()
+        if not line:
+            return None
+        try:
+            method, path, version = line.decode('latin-1').split()
+        except ValueError:
+            raise HTTPError(400, 'Malformed request line.') from None
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        if 'chunked' in headers.get('transfer-encoding', '').lower():
+            raise HTTPError(411, 'Send a Content-Length body.')
+        try:
+            length = int(headers.get('content-length') or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            raise HTTPError(400, 'Malformed Content-Length.')
+        if length > self.max_body:
+            raise HTTPError(413, f"Body larger than {self.max_body} bytes.")
+        body = await reader.readexactly(length) if length else b''
+        keep_alive = (version == 'HTTP/1.1'
+                      and headers.get('connection', '').lower() != 'close')
+        return method, path, body, keep_alive
+
+    @staticmethod
+    async def _respond(writer, status, payload, headers=(), keep_alive=True):
+        data = json.dumps(payload).encode('utf-8')
+        head = [f"HTTP/1.1 {status.value} {status.phrase}",
+                'Content-Type: application/json',
+                f"Content-Length: {len(data)}",
+                f"Connection: {'keep-alive' if keep_alive else 'close'}",
+                *(f"{k}: {v}" for k, v in dict(headers).items())]
+        writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + data)
+        await writer.drain()
+
+    async def handle(self, reader, writer):
+        keep_alive = True
+        try:
+            while keep_alive:
+                try:
+                    request = await asyncio.wait_for(self._read_request(reader),
+                                                     self.read_timeout)
+                except HTTPError as exc:
+                    await self._respond(writer, exc.status, {'error': str(exc)},
+                                        exc.headers, keep_alive=False)
+                    break
+                if request is None:
+                    break
+                method, path, body, keep_alive = request
+                self.counters['requests'] += 1
+                try:
+                    status, payload, headers = (
+                        HTTPStatus.OK, await self.route(method, path, body), {})
+                except HTTPError as exc:
+                    status, payload, headers = exc.status, {'error': str(exc)}, exc.headers
+                except Exception as exc:
+                    logger.exception(f"{method} {path} failed")
+                    self.counters['errors'] += 1
+                    status, payload, headers = (
+                        HTTPStatus.INTERNAL_SERVER_ERROR, {'error': str(exc)}, {})
+                await self._respond(writer, status, payload, headers, keep_alive)
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError,
+                ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host='127.0.0.1', port=8080):
+        server = await asyncio.start_server(self.handle, host, port)
+        addr = ', '.join(str(s.getsockname()) for s in server.sockets)
+        logger.info(f"Advisor service on {addr} ({self.workers} {self.pool} workers)")
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def main():
+    p = argparse.ArgumentParser(description="Async JSON API for course advising")
+    p.add_argument('--host', default='127.0.0.1')
+    p.add_argument('--port', type=int, default=8080)
+    p.add_argument('-w', '--workers', type=int, default=os.cpu_count() or 1,
+                   help='Pool size')
+    p.add_argument('--pool', choices=['process', 'thread'], default='process',
+                   help='Evaluate in worker processes (default) or threads')
+    p.add_argument('--max-pending', type=int, default=256,
+                   help='Queued evaluations before answering 503')
+    p.add_argument('--max-body', type=int, default=1 << 20, help='Max request body bytes')
+    p.add_argument('--max-batch', type=int, default=5000, help='Max students per batch')
+    p.add_argument('--chunk-size', type=int, default=250,
+                   help='Students per pool task in batch requests')
+    args = p.parse_args()
+    if min(args.workers, args.max_pending, args.chunk_size) < 1:
+        p.error('--workers, --max-pending and --chunk-size must be positive')
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(message)s')
+    service = AdvisorService(args.workers, args.pool, args.max_pending,
+                             args.max_body, args.max_batch, args.chunk_size)
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,221 @@
+"""
+advisor_session.py
+
+Incremental advising for one student.
+
+An AdvisorSession keeps the rule-eligibility of every catalog course as a
+bitset. Profile edits only re-check the courses they can affect:
+  - passing/un-passing X: X itself and the courses that require X
+    (PrereqGraph.unlocks), plus any level whose progression gate moved
+  - semester/track change: courses not offered in 'Both' / not for 'All'
+  - failed courses and CGPA: no eligibility change (reason text / credit cap)
+The rejection reason bits of the other courses (see explanations) are kept
+alongside and re-checked with them, and the StudentProfile is rebuilt only
+after an edit, so recommend() costs no full catalog pass. It returns exactly
+what recommend_courses would for the same profile.
+A session built on the live catalog rebuilds itself when a reload publishes
+a new catalog version.
+"""
+
+from KnowledgeBase import get_catalog, pinned_state
+from explanations import rejection_mask
+from inference_engine import _finalize, eligibility_reason
+from prereq_graph import iter_bits
+from student_profile import StudentProfile
+
+
+class AdvisorSession:
+
+    def __init__(self, cgpa: float, passed=(), failed=(),
+                 semester: str = 'Fall', track: str = 'All', catalog=None):
+        self.follow_reloads = catalog is None
+        self.catalog = catalog or get_catalog()
+        self.graph = self.catalog.graph
+        courses = self.catalog.courses
+
+        self.cgpa = cgpa
+        self.semester = semester
+        self.track = track
+        self.passed = set(passed)
+        self.failed = set(failed)
+        self.passed_mask = self.graph.encode(self.passed)
+
+        # Static course groupings used to find what an edit can affect
+        self.level_mask = {}
+        self.seasonal_mask = 0  # not offered in 'Both'
+        self.tracked_mask = 0   # not open to 'All'
+        for c in courses:
+            self.level_mask[c.level] = self.level_mask.get(c.level, 0) | 1 << c.index
+            if c.semester != 'Both':
+                self.seasonal_mask |= 1 << c.index
+            if c.track != 'All':
+                self.tracked_mask |= 1 << c.index
+
+        self.level_counts = {}
+        for i in iter_bits(self.passed_mask):
+            lev = courses[i].level
+            self.level_counts[lev] = self.level_counts.get(lev, 0) + 1
+        self.current_level = max(self.level_counts, default=0)
+
+        self.all_mask = (1 << len(courses)) - 1
+        self.eligible_mask = 0
+        self.rejections = {}  # catalog index -> reason bits, not-passed courses
+        self._profile = None
+        self.recomputed = 0  # courses re-checked by the last edit
+        self._refresh(self.all_mask)
+
+    # -- eligibility ---------------------------------------------------
+
+    def _refresh(self, affected):
+        courses = self.catalog.courses
+        count = 0
+        for i in iter_bits(affected):
+            count += 1
+            if self.passed_mask >> i & 1:
+                reasons = 0
+                self.eligible_mask &= ~(1 << i)
+            else:
+                reasons = rejection_mask(courses[i], self.graph, self.passed_mask,
+                                         self.semester, self.track, self.current_level)
+                if reasons:
+                    self.eligible_mask &= ~(1 << i)
+                else:
+                    self.eligible_mask |= 1 << i
+            if reasons:
+                self.rejections[i] = reasons
+            else:
+                self.rejections.pop(i, None)
+        self.recomputed = count
+        self._profile = None
+
+    def _levels_between(self, old, new) -> int:
+        """Courses whose level gate flips when current level moves old -> new."""
+        lo, hi = sorted((old, new))
+        mask = 0
+        for lev in range(lo + 2, hi + 2):
+            mask |= self.level_mask.get(lev, 0)
+        return mask
+
+    # -- edits ---------------------------------------------------------
+
+    def _set_passed(self, code, passed: bool):
+        i = self.graph.index.get(code)
+        if passed:
+            self.passed.add(code)
+        else:
+            self.passed.discard(code)
+        self._profile = None
+        if i is None:
+            self.recomputed = 0
+            return
+        if bool(self.passed_mask >> i & 1) == passed:
+            self.recomputed = 0
+            return
+
+        lev = self.catalog.courses[i].level
+        self.level_counts[lev] = self.level_counts.get(lev, 0) + (1 if passed else -1)
+        if not self.level_counts[lev]:
+            del self.level_counts[lev]
+        old_level = self.current_level
+        self.current_level = max(self.level_counts, default=0)
+        self.passed_mask ^= 1 << i
+
+        affected = 1 << i
+        for j in self.graph.unlocks[i]:
+            affected |= 1 << j
+        if self.current_level != old_level:
+            affected |= self._levels_between(old_level, self.current_level)
+        self._refresh(affected)
+
+    def add_passed(self, code):
+        self._set_passed(code, True)
+
+    def remove_passed(self, code):
+        self._set_passed(code, False)
+
+    def add_failed(self, code):
+        self.failed.add(code)
+        self.recomputed = 0
+        self._profile = None
+
+    def remove_failed(self, code):
+        self.failed.discard(code)
+        self.recomputed = 0
+        self._profile = None
+
+    def set_semester(self, semester):
+        if semester != self.semester:
+            self.semester = semester
+            self._refresh(self.seasonal_mask)
+
+    def set_track(self, track):
+        if track != self.track:
+            self.track = track
+            self._refresh(self.tracked_mask)
+
+    def set_cgpa(self, cgpa):
+        self.cgpa = cgpa
+        self.recomputed = 0
+        self._profile = None
+
+    def update(self, cgpa=None, passed=None, failed=None,
+               semester=None, track=None):
+        """Apply a whole new profile as a set of incremental edits."""
+        total = 0
+        if semester is not None:
+            self.set_semester(semester)
+            total += self.recomputed
+        if track is not None:
+            self.set_track(track)
+            total += self.recomputed
+        if passed is not None:
+            passed = set(passed)
+            for code in self.passed - passed:
+                self.remove_passed(code)
+                total += self.recomputed
+            for code in passed - self.passed:
+                self.add_passed(code)
+                total += self.recomputed
+        if failed is not None:
+            self.failed = set(failed)
+        if cgpa is not None:
+            self.cgpa = cgpa
+        self.recomputed = total
+        self._profile = None
+
+    # -- results -------------------------------------------------------
+
+    def eligible_codes(self) -> list:
+        return [self.catalog.codes[i] for i in iter_bits(self.eligible_mask)]
+
+    def recommend(self, selector: str = None) -> tuple:
+        """(recommendations, explanations), as recommend_courses returns."""
+        with pinned_state() as state:
+            if self.follow_reloads and state.catalog is not self.catalog:
+                self.__init__(self.cgpa, self.passed, self.failed,
+                              self.semester, self.track)
+            return self._recommend(selector)
+
+    def _recommend(self, selector) -> tuple:
+        courses = self.catalog.courses
+        eligibles = [
+            {
+                'course_code': c.code,
+                'credits':     c.credits,
+                'level':       c.level,
+                'reason':      eligibility_reason(c.code, c.prerequisites, self.failed)
+            }
+            # engine declaration order, see _eligible_fast
+            for c in (courses[i] for i in sorted(iter_bits(self.eligible_mask),
+                                                 reverse=True))
+        ]
+        # _finalize adds the credit-cap records, so it gets a copy
+        return _finalize(eligibles, dict(self.rejections), self.profile(), selector,
+                         catalog=self.catalog)
+
+    def profile(self) -> StudentProfile:
+        """Snapshot of the current profile, as recommend_courses builds it."""
+        if self._profile is None:
+            self._profile = StudentProfile(self.catalog, self.cgpa, self.passed,
+                                           self.failed, self.semester, self.track)
+        return self._profile
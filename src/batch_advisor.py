@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+batch_advisor.py
+
+Vectorized advising for whole cohorts. Students are processed in chunks:
+passed courses become a boolean matrix over the catalog index, and the
+semester/track/prerequisite/corequisite/level filters of
+CourseAdvisorEngine._evaluate are computed for the whole chunk with NumPy.
+Requirements are stored as CSR edge lists, so that check costs
+O(students x requirement edges) instead of a dense courses x courses product.
+The credit cap and explanations are then applied per student, and results
+are yielded as soon as their chunk is done, so memory stays bounded by
+chunk_size.
+"""
+
+import numpy as np
+
+from KnowledgeBase import get_catalog, pinned_state
+from advisor_metrics import metrics
+from explanations import LEVEL_GAP, UNMET_COREQ, UNMET_PREREQ, WRONG_SEMESTER, WRONG_TRACK
+from inference_engine import _finalize, eligibility_reason
+from student_profile import StudentProfile
+
+
+class _RequirementIndex:
+    """
+    One kind of requirement as CSR arrays: the courses that have any
+    (courses), where each one's run of required columns starts in cols
+    (starts), and the required columns themselves (cols).
+    """
+
+    def __init__(self, catalog, attr, column):
+        courses, starts, cols = [], [], []
+        for course in catalog:
+            reqs = getattr(course, attr)
+            if reqs:
+                courses.append(course.index)
+                starts.append(len(cols))
+                cols.extend(column[code] for code in reqs)
+        self.n = len(catalog)
+        self.courses = np.array(courses, dtype=np.intp)
+        self.starts = np.array(starts, dtype=np.intp)
+        self.cols = np.array(cols, dtype=np.intp)
+
+    def unmet(self, missing) -> np.ndarray:
+        """Boolean matrix (students x courses): some requirement is in missing."""
+        out = np.zeros((missing.shape[0], self.n), dtype=bool)
+        if self.cols.size:
+            out[:, self.courses] = np.logical_or.reduceat(
+                missing[:, self.cols], self.starts, axis=1)
+        return out
+
+
+class BatchIndex:
+    """NumPy view of a compiled Catalog, built once and reused across chunks."""
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+        n = len(catalog)
+
+        # Column index: catalog courses first, then any code that is only
+        # referenced as a prereq/coreq (so such requirements stay satisfiable
+        # exactly when the student lists that code as passed).
+        self.column = {code: i for i, code in enumerate(catalog.codes)}
+        for course in catalog:
+            for code in course.prerequisites + course.corequisites:
+                self.column.setdefault(code, len(self.column))
+        width = len(self.column)
+
+        self.levels = np.array([c.level for c in catalog], dtype=np.int16)
+        self.semesters = np.array([c.semester for c in catalog], dtype=object)
+        self.tracks = np.array([c.track for c in catalog], dtype=object)
+
+        # Requirement edges in CSR form (see _RequirementIndex), so checking
+        # them costs O(students x edges) rather than O(students x courses^2)
+        self.prereqs = _RequirementIndex(catalog, 'prerequisites', self.column)
+        self.coreqs = _RequirementIndex(catalog, 'corequisites', self.column)
+
+        # Engine declaration order (reverse catalog), see _eligible_fast
+        self.order = np.arange(n - 1, -1, -1)
+
+    def encode_passed(self, students) -> np.ndarray:
+        """Boolean matrix (students x columns) of passed courses."""
+        passed = np.zeros((len(students), len(self.column)), dtype=bool)
+        get = self.column.get
+        rows, cols = [], []
+        for row, student in enumerate(students):
+            for code in student['passed']:
+                col = get(code)
+                if col is not None:
+                    rows.append(row)
+                    cols.append(col)
+        passed[rows, cols] = True  # one scatter for the whole chunk
+        return passed
+
+    def decode_masks(self, masks) -> np.ndarray:
+        """encode_passed for catalog bitsets (StudentProfile.passed_mask), in C."""
+        nbytes = (len(self.column) + 7) // 8
+        buf = np.frombuffer(b''.join(m.to_bytes(nbytes, 'little') for m in masks),
+                            dtype=np.uint8).reshape(len(masks), nbytes)
+        bits = np.unpackbits(buf, axis=1, bitorder='little')[:, :len(self.column)]
+        return bits.astype(bool)
+
+    def evaluate(self, students, passed_masks=None) -> tuple:
+        """
+        (taken, reasons): boolean matrix of passed catalog courses and a
+        uint8 matrix (students x courses) of explanations reason bits;
+        a course is eligible when it is not taken and has no reasons.
+        passed_masks, when the caller already has them, skips re-encoding.
+        """
+        n = len(self.catalog)
+        if passed_masks is not None and len(self.column) == n:
+            passed = self.decode_masks(passed_masks)
+        else:
+            passed = self.encode_passed(students)
+        taken = passed[:, :n]
+
+        # Prerequisites and corequisites: no required column left unpassed
+        missing = ~passed
+        pre_ok = ~self.prereqs.unmet(missing)
+        co_ok = ~self.coreqs.unmet(missing)
+
+        # Semester and track masks: one row per distinct value, gathered
+        sem_ok = self._rows_for([s['semester'] for s in students], self.semesters, 'Both')
+        trk_ok = self._rows_for([s['track'] for s in students], self.tracks, 'All')
+
+        # Level progression: at most one above the highest passed level
+        current = np.where(taken, self.levels, 0).max(axis=1, initial=0)
+        level_ok = self.levels <= (current[:, None] + 1)
+
+        reasons = np.zeros(taken.shape, dtype=np.uint8)
+        for ok, bit in ((sem_ok, WRONG_SEMESTER), (trk_ok, WRONG_TRACK),
+                        (pre_ok, UNMET_PREREQ), (co_ok, UNMET_COREQ),
+                        (level_ok, LEVEL_GAP)):
+            reasons |= np.where(ok, 0, bit).astype(np.uint8)
+        return taken, reasons
+
+    @staticmethod
+    def _rows_for(values, column, wildcard) -> np.ndarray:
+        """Boolean matrix (students x courses): column equals the student's value or wildcard."""
+        distinct, inverse = np.unique(np.array(values, dtype=object), return_inverse=True)
+        table = np.array([(column == v) | (column == wildcard) for v in distinct], dtype=bool)
+        return table.reshape(len(distinct), len(column))[inverse.reshape(-1)]
+
+    def eligible(self, students) -> np.ndarray:
+        """Boolean matrix (students x courses) of rule-eligible courses."""
+        taken, reasons = self.evaluate(students)
+        return ~taken & (reasons == 0)
+
+
+_index_cache = {}
+
+
+def get_batch_index(catalog=None) -> BatchIndex:
+    catalog = catalog or get_catalog()
+    index = _index_cache.get(id(catalog))
+    if index is None or index.catalog is not catalog:
+        _index_cache.clear()
+        index = _index_cache[id(catalog)] = BatchIndex(catalog)
+    return index
+
+
+def normalize_student(student) -> dict:
+    """recommend_courses keyword arguments of a student mapping (extra keys dropped)."""
+    return {
+        'cgpa':     float(student['cgpa']),
+        'passed':   list(student.get('passed') or []),
+        'failed':   list(student.get('failed') or []),
+        'semester': student['semester'],
+        'track':    student['track'],
+    }
+
+
+def iter_chunks(students, size):
+    """Lists of up to size students from any iterable."""
+    chunk = []
+    for student in students:
+        chunk.append(student)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def recommend_courses_batch(students, chunk_size: int = 1024,
+                            return_exceptions: bool = False, selector: str = None):
+    """
+    Evaluate many students, yielding one (recommendations, explanations)
+    tuple per student in input order, identical to recommend_courses.
+
+    ``students`` is any iterable of mappings with keys cgpa, passed, failed,
+    semester and track; it is consumed lazily, chunk_size at a time.
+    With return_exceptions=True a student that cannot be advised (e.g. a
+    CGPA outside every policy band) yields the exception instead of
+    aborting the stream. ``selector`` is passed to the credit-cap stage
+    as in recommend_courses.
+    """
+    with pinned_state() as state:
+        index = get_batch_index(state.catalog)
+    for chunk in iter_chunks(students, chunk_size):
+        # The whole batch uses the catalog version it started with; the pin
+        # is only held while computing, never across a yield.
+        trace = metrics.trace('recommend_batch')
+        try:
+            with pinned_state(state):
+                results = _advise_chunk(index, chunk, return_exceptions,
+                                        selector, trace)
+        finally:
+            trace.finish()
+        yield from results
+
+
+def _advise_chunk(index, chunk, return_exceptions, selector, trace) -> list:
+    courses = index.catalog.courses
+    graph = index.catalog.graph
+    chunk = [normalize_student(s) for s in chunk]
+    profiles = []
+    for student in chunk:
+        try:
+            profiles.append(StudentProfile(index.catalog, **student))
+        except ValueError as exc:
+            if not return_exceptions:
+                raise
+            profiles.append(exc)
+    trace.mark('profile')
+    masks = [p.passed_mask if isinstance(p, StudentProfile) else graph.encode(s['passed'])
+             for s, p in zip(chunk, profiles)]
+    taken, reasons = index.evaluate(chunk, masks)
+    eligible = (~taken & (reasons == 0))[:, index.order]
+    rejected = ~taken & (reasons != 0)
+    # Nonzeros of the whole chunk at once, cut into per-student runs
+    elig_rows, elig_cols = np.nonzero(eligible)
+    elig_courses = index.order[elig_cols].tolist()
+    elig_at = np.searchsorted(elig_rows, np.arange(len(chunk) + 1)).tolist()
+    rej_rows, rej_cols = np.nonzero(rejected)
+    rej_bits = reasons[rej_rows, rej_cols].tolist()
+    rej_cols = rej_cols.tolist()
+    rej_at = np.searchsorted(rej_rows, np.arange(len(chunk) + 1)).tolist()
+    trace.mark('eligibility')
+    trace.count('students', len(chunk))
+    results = []
+    for k, profile in enumerate(profiles):
+        if not isinstance(profile, StudentProfile):
+            results.append(profile)
+            continue
+        lo, hi = rej_at[k], rej_at[k + 1]
+        rejections = dict(zip(rej_cols[lo:hi], rej_bits[lo:hi]))
+        eligibles = [
+            {
+                'course_code': course.code,
+                'credits':     course.credits,
+                'level':       course.level,
+                'reason':      eligibility_reason(course.code, course.prerequisites, profile.failed)
+            }
+            for course in (courses[i] for i in elig_courses[elig_at[k]:elig_at[k + 1]])
+        ]
+        try:
+            results.append(_finalize(eligibles, rejections, profile, selector,
+                                     catalog=index.catalog))
+        except ValueError as exc:
+            if not return_exceptions:
+                raise
+            results.append(exc)
+    trace.mark('finalize')
+    return results
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+bulk_advise.py
+
+Command-line runner that advises a whole student roster.
+
+The roster is a CSV or JSONL file with one student per record and the fields
+cgpa, passed, failed, semester and track (an optional student_id/id is carried
+through). In CSV, passed/failed are comma-separated codes, quoted like the
+Prerequisites column of courses.csv; in JSONL they may also be lists. Either
+may be gzip-compressed. Raw registrar exports should go through
+roster_import.py first, which validates them and writes this format.
+
+Records are read lazily, sent to a process pool in chunks and evaluated with
+recommend_courses_batch; results are written in input order as they arrive.
+
+Example:
+    python bulk_advise.py roster.csv -o advice.jsonl --workers 4 --chunk-size 500
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from multiprocessing import Pool
+
+from KnowledgeBase import split_codes
+from roster_import import read_records
+
+ID_FIELDS = ('student_id', 'id')
+CSV_FIELDS = ['row', 'student_id', 'status', 'recommended', 'total_credits',
+              'unavailable', 'error']
+
+
+def read_roster(path):
+    """
+    Yield raw roster records (dicts) from a CSV or JSONL file, gzip or not;
+    a malformed JSONL line is yielded as a roster_import.MalformedRecord.
+    """
+    return read_records(path, keep_malformed=True)
+
+
+def parse_student(record) -> dict:
+    """Turn a raw roster record into recommend_courses keyword arguments."""
+    def codes(value):
+        if isinstance(value, (list, tuple)):
+            return [str(c).strip() for c in value if str(c).strip()]
+        return list(split_codes(value or ''))
+
+    if isinstance(record, Exception):
+        raise record
+    if not isinstance(record, dict):
+        raise TypeError(f"record must be an object, not {type(record).__name__}")
+    missing = [k for k in ('cgpa', 'semester', 'track') if not record.get(k)]
+    if missing:
+        raise ValueError(f"missing field(s): {', '.join(missing)}")
+    return {
+        'cgpa':     float(record['cgpa']),
+        'passed':   codes(record.get('passed')),
+        'failed':   codes(record.get('failed')),
+        'semester': str(record['semester']).strip(),
+        'track':    str(record['track']).strip(),
+    }
+
+
+def record_student_id(record) -> str:
+    """The record's student_id/id ('' if none, or if it is not a record)."""
+    if not isinstance(record, dict):
+        return ''
+    for key in ID_FIELDS:
+        if record.get(key) not in (None, ''):
+            return str(record[key])
+    return ''
+
+
+def init_worker():
+    """Compile the catalog once per worker process."""
+    from batch_advisor import get_batch_index
+    get_batch_index()
+
+
+def advise_chunk(chunk, selector: str = None) -> list:
+    """
+    Worker entry point: chunk is a list of (row, record) pairs.
+    Returns one result dict per record, never raising for bad records.
+    """
+    from batch_advisor import recommend_courses_batch
+
+    results = []
+    parsed = []
+    for row, record in chunk:
+        result = {'row': row, 'student_id': ''}
+        try:
+            result['student_id'] = record_student_id(record)
+            parsed.append((result, parse_student(record)))
+        except (ValueError, TypeError, KeyError) as exc:
+            result.update(status='error', error=str(exc))
+        results.append(result)
+
+    outcomes = recommend_courses_batch(
+        (student for _, student in parsed),
+        chunk_size=max(len(parsed), 1),
+        return_exceptions=True,
+        selector=selector,
+    )
+    for (result, _), outcome in zip(parsed, outcomes):
+        if isinstance(outcome, Exception):
+            result.update(status='error', error=str(outcome))
+        else:
+            recs, notes = outcome
+            result.update(status='ok', recommendations=recs, explanations=list(notes))
+    return results
+
+
+class ResultWriter:
+    """Streams results to CSV or JSONL depending on the output extension."""
+
+    def __init__(self, f, fmt):
+        self.f = f
+        self.fmt = fmt
+        if fmt == 'csv':
+            self.csv = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+            self.csv.writeheader()
+
+    def write(self, result):
+        if self.fmt == 'jsonl':
+            self.f.write(json.dumps(result) + '\n')
+            return
+        recs = result.get('recommendations', [])
+        self.csv.writerow({
+            'row':           result['row'],
+            'student_id':    result['student_id'],
+            'status':        result['status'],
+            'recommended':   ','.join(r['course_code'] for r in recs),
+            'total_credits': sum(r['credits'] for r in recs) if recs else '',
+            'unavailable':   ' | '.join(result.get('explanations', [])),
+            'error':         result.get('error', ''),
+        })
+
+
+def run(args):
+    from batch_advisor import iter_chunks
+
+    out_fmt = args.format or ('csv' if args.output.endswith('.csv') else 'jsonl')
+    chunks = iter_chunks(enumerate(read_roster(args.roster), start=1), args.chunk_size)
+
+    done = errors = 0
+    start = time.perf_counter()
+    with open(args.output, 'w', newline='', encoding='utf-8') as f:
+        writer = ResultWriter(f, out_fmt)
+        if args.workers == 1:
+            init_worker()
+            results = map(advise_chunk, chunks)
+            pool = None
+        else:
+            pool = Pool(args.workers, initializer=init_worker)
+            results = pool.imap(advise_chunk, chunks)
+        try:
+            for batch in results:
+                for result in batch:
+                    writer.write(result)
+                    errors += result['status'] == 'error'
+                done += len(batch)
+                if not args.quiet:
+                    rate = done / max(time.perf_counter() - start, 1e-9)
+                    print(f"\r{done} students advised, {errors} errors "
+                          f"({rate:.0f}/s)", end='', file=sys.stderr)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+    if not args.quiet:
+        print(file=sys.stderr)
+    print(f"Wrote {done} results ({errors} errors) to {args.output}")
+    return 1 if errors and args.strict else 0
+
+
+def main():
+    p = argparse.ArgumentParser(description="Bulk course advising for a student roster")
+    p.add_argument('roster', help='Student roster (.csv or .jsonl)')
+    p.add_argument('-o', '--output', required=True, help='Output file (.csv or .jsonl)')
+    p.add_argument('--format', choices=['csv', 'jsonl'],
+                   help='Output format (default: from the output extension)')
+    p.add_argument('-w', '--workers', type=int, default=os.cpu_count() or 1,
+                   help='Worker processes (1 runs in-process)')
+    p.add_argument('--chunk-size', type=int, default=1000,
+                   help='Students per work unit')
+    p.add_argument('-q', '--quiet', action='store_true', help='No progress output')
+    p.add_argument('--strict', action='store_true',
+                   help='Exit non-zero if any record failed')
+    args = p.parse_args()
+    if args.workers < 1 or args.chunk_size < 1:
+        p.error('--workers and --chunk-size must be positive')
+    sys.exit(run(args))
+
+if __name__ == '__main__':
+    main()
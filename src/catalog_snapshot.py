@@ -0,0 +1,297 @@
+"""
+catalog_snapshot.py
+
+Compiled binary snapshot of courses.csv + policies.json.
+
+The CSV and JSON stay the editable source of truth; the snapshot is derived
+from them and rebuilt automatically when they change (size/mtime first, then
+a content hash, so a touched-but-identical file does not force a rebuild).
+It is memory-mapped read-only, so every process on a machine shares the same
+page-cache copy and starts without parsing CSV. The file is only ever
+replaced atomically, never written in place, since other processes may have
+it mapped; if the data dir is read-only the snapshot is compiled into
+anonymous memory instead.
+
+Layout (little-endian, sections 8-byte aligned):
+  header      HEADER (magic, counts, source stat + sha256, section offsets)
+  strings     u32 offsets[n_strings + 1] + UTF-8 blob (interned: codes,
+              names, semesters, tracks)
+  records     n_courses x RECORD (code, name, semester, track string ids;
+              credits, level)
+  prereqs     u32 offsets[n_courses + 1] + u32 course indices
+  coreqs      u32 offsets[n_courses + 1] + u32 course indices
+  policies    policies.json as UTF-8 JSON (every key, not just the ones
+              the advisor reads)
+Requirements naming a code missing from the catalog are stored as string
+ids with the high bit set, so the catalog compiler can still report them.
+"""
+
+import csv
+import hashlib
+import json
+import mmap
+import os
+import struct
+from array import array
+
+MAGIC = b'AIUCAT\x00\x01'
+VERSION = 2
+HEADER = struct.Struct('<8s8I4q32s8Q')
+STAT = struct.Struct('<4q')
+STAT_OFFSET = 8 + 8 * 4
+RECORD = struct.Struct('<IIIIHH')
+DANGLING = 0x80000000
+
+# CSV columns, in file order. Course records expose these as read-only keys.
+COLUMNS = (
+    'Course Code', 'Course Name', 'Prerequisites', 'Co-requisites',
+    'Credit Hours', 'Semester Offered', 'Track', 'Level',
+)
+
+
+def split_codes(value) -> tuple:
+    """Split a comma-separated course-code cell into a tuple of codes."""
+    return tuple(c.strip() for c in str(value).split(',') if c.strip())
+
+
+def _source_stat(csv_path, json_path) -> tuple:
+    a, b = os.stat(csv_path), os.stat(json_path)
+    return (a.st_mtime_ns, a.st_size, b.st_mtime_ns, b.st_size)
+
+
+def _source_hash(csv_path, json_path) -> bytes:
+    h = hashlib.sha256()
+    for path in (csv_path, json_path):
+        with open(path, 'rb') as f:
+            h.update(f.read())
+        h.update(b'\0')
+    return h.digest()
+
+
+def read_course_rows(csv_path) -> list:
+    """Rows of courses.csv as dicts keyed by COLUMNS (stdlib csv, no pandas)."""
+    with open(csv_path, newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        missing = [c for c in COLUMNS if c not in (reader.fieldnames or ())]
+        if missing:
+            raise ValueError(f"{csv_path} is missing column(s): {', '.join(missing)}")
+        return [
+            {k: (row.get(k) or '') for k in COLUMNS}
+            for row in reader
+            if (row.get('Course Code') or '').strip()
+        ]
+
+
+def _u16(value, csv_path, code, column) -> int:
+    """A CSV integer that must fit its u16 RECORD field, else ValueError."""
+    n = int(value)
+    if not 0 <= n <= 0xFFFF:
+        raise ValueError(f"{csv_path}: {code}: {column} {n} is out of range")
+    return n
+
+
+def compile_snapshot(csv_path, json_path) -> bytes:
+    """Compile the CSV/JSON sources into snapshot bytes."""
+    stat = _source_stat(csv_path, json_path)
+    digest = _source_hash(csv_path, json_path)
+    rows = read_course_rows(csv_path)
+    with open(json_path, encoding='utf-8') as f:
+        policies = json.load(f)
+
+    strings = {}
+
+    def sid(s):
+        s = str(s)
+        if s not in strings:
+            strings[s] = len(strings)
+        return strings[s]
+
+    codes = [row['Course Code'].strip() for row in rows]
+    index = {code: i for i, code in enumerate(codes)}
+    records = bytearray()
+    adjacency = {}
+    for key in ('Prerequisites', 'Co-requisites'):
+        offsets, targets = array('I', [0]), array('I')
+        for row in rows:
+            for code in split_codes(row[key]):
+                targets.append(index[code] if code in index else DANGLING | sid(code))
+            offsets.append(len(targets))
+        adjacency[key] = (offsets, targets)
+    for code, row in zip(codes, rows):
+        records += RECORD.pack(
+            sid(code), sid(row['Course Name']), sid(row['Semester Offered']),
+            sid(row['Track']),
+            _u16(row['Credit Hours'], csv_path, code, 'Credit Hours'),
+            _u16(row['Level'], csv_path, code, 'Level'))
+
+    blob = bytearray()
+    str_offsets = array('I', [0])
+    for s in strings:  # dicts keep insertion order == string id order
+        blob += s.encode('utf-8')
+        str_offsets.append(len(blob))
+    policy_json = json.dumps(policies, ensure_ascii=False).encode('utf-8')
+
+    sections = [
+        str_offsets.tobytes(), bytes(blob), bytes(records),
+        adjacency['Prerequisites'][0].tobytes(), adjacency['Prerequisites'][1].tobytes(),
+        adjacency['Co-requisites'][0].tobytes(), adjacency['Co-requisites'][1].tobytes(),
+        policy_json,
+    ]
+    offsets = []
+    pos = HEADER.size
+    for data in sections:
+        pos += -pos % 8
+        offsets.append(pos)
+        pos += len(data)
+
+    header = HEADER.pack(
+        MAGIC, VERSION, len(rows), len(strings),
+        len(adjacency['Prerequisites'][1]), len(adjacency['Co-requisites'][1]),
+        len(policy_json), 0, 0,
+        *stat, digest, *offsets)
+
+    out = bytearray(header)
+    for off, data in zip(offsets, sections):
+        out += b'\0' * (off - len(out))
+        out += data
+    return bytes(out)
+
+
+def _write_atomic(path, data) -> None:
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except OSError:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def build_snapshot(csv_path, json_path, out_path) -> None:
+    """Compile the CSV/JSON sources into out_path (atomically replaced)."""
+    _write_atomic(out_path, compile_snapshot(csv_path, json_path))
+
+
+class CatalogSnapshot:
+    """
+    Read-only, memory-mapped view of a snapshot file, or of snapshot bytes
+    (data) copied into an anonymous map when there is no file to share.
+    """
+
+    def __init__(self, path, data=None):
+        self.path = path
+        if data is None:
+            with open(path, 'rb') as f:
+                self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self._mm = mmap.mmap(-1, len(data))
+            self._mm.write(data)
+        fields = HEADER.unpack_from(self._mm, 0)
+        if fields[0] != MAGIC or fields[1] != VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a version {VERSION} catalog snapshot")
+        (_, _, self.n_courses, self.n_strings, n_pre, n_co,
+         self._n_policies, _, _) = fields[:9]
+        self.source_stat = tuple(fields[9:13])
+        self.source_hash = fields[13]
+        (o_stroff, o_str, self._o_records, o_preoff, o_pre,
+         o_cooff, o_co, self._o_policies) = fields[14:]
+
+        view = memoryview(self._mm)
+        self._str_offsets = view[o_stroff:o_stroff + 4 * (self.n_strings + 1)].cast('I')
+        self._str_data = view[o_str:]
+        self._pre = (view[o_preoff:o_preoff + 4 * (self.n_courses + 1)].cast('I'),
+                     view[o_pre:o_pre + 4 * n_pre].cast('I'))
+        self._co = (view[o_cooff:o_cooff + 4 * (self.n_courses + 1)].cast('I'),
+                    view[o_co:o_co + 4 * n_co].cast('I'))
+        self._strings = {}
+
+    def close(self):
+        for name in ('_str_offsets', '_str_data', '_pre', '_co'):
+            value = self.__dict__.pop(name, None)
+            for v in value if isinstance(value, tuple) else (value,):
+                if v is not None:
+                    v.release()
+        self._mm.close()
+
+    def string(self, sid) -> str:
+        s = self._strings.get(sid)
+        if s is None:
+            start, end = self._str_offsets[sid], self._str_offsets[sid + 1]
+            s = self._strings[sid] = bytes(self._str_data[start:end]).decode('utf-8')
+        return s
+
+    def _requirements(self, adjacency, i) -> tuple:
+        offsets, targets = adjacency
+        out = []
+        for t in targets[offsets[i]:offsets[i + 1]]:
+            if t & DANGLING:
+                out.append(self.string(t & ~DANGLING))
+            else:
+                out.append(self.code(t))
+        return tuple(out)
+
+    def code(self, i) -> str:
+        return self.string(RECORD.unpack_from(self._mm, self._o_records + i * RECORD.size)[0])
+
+    def course(self, i) -> tuple:
+        """(code, name, prerequisites, corequisites, credits, semester, track, level)"""
+        code, name, sem, track, credits, level = RECORD.unpack_from(
+            self._mm, self._o_records + i * RECORD.size)
+        return (self.string(code), self.string(name),
+                self._requirements(self._pre, i), self._requirements(self._co, i),
+                credits, self.string(sem), self.string(track), level)
+
+    def policies(self) -> dict:
+        """policies.json as it was compiled (a fresh dict on every call)."""
+        start = self._o_policies
+        return json.loads(self._mm[start:start + self._n_policies].decode('utf-8'))
+
+    def _refresh_stat(self, stat):
+        """
+        Record a new source stat after a content-identical touch, in a copy
+        that atomically replaces the file (the mapped one is left as is).
+        """
+        data = bytearray(self._mm)
+        STAT.pack_into(data, STAT_OFFSET, *stat)
+        _write_atomic(self.path, data)
+        self.source_stat = tuple(stat)
+
+
+def snapshot_path(csv_path) -> str:
+    return os.path.splitext(csv_path)[0] + '.snapshot'
+
+
+def open_snapshot(csv_path, json_path, path=None) -> CatalogSnapshot:
+    """
+    Memory-map the snapshot for csv_path/json_path, (re)building it first if
+    it is missing, corrupt or out of date with its sources. If it cannot be
+    written (read-only data dir) it is compiled in memory for this process.
+    """
+    path = path or snapshot_path(csv_path)
+    stat = _source_stat(csv_path, json_path)
+    try:
+        snap = CatalogSnapshot(path)
+    except (OSError, ValueError, struct.error):
+        snap = None
+    if snap is not None and snap.source_stat != stat:
+        if snap.source_hash == _source_hash(csv_path, json_path):
+            try:
+                snap._refresh_stat(stat)
+            except OSError:
+                pass  # read-only data dir: keep hashing on open
+        else:
+            snap.close()
+            snap = None
+    if snap is None:
+        data = compile_snapshot(csv_path, json_path)
+        try:
+            _write_atomic(path, data)
+        except OSError:
+            return CatalogSnapshot(path, data)  # read-only data dir
+        snap = CatalogSnapshot(path)
+    return snap
@@ -0,0 +1,252 @@
+"""
+catalog_validator.py
+
+Consistency checks for course rows, run before the KB is saved and by
+`KB_Editor.py validate`.
+
+The rows are indexed once (code -> position, requirement edges) and
+checked in a single pass each:
+  - fields:        missing/duplicate codes, non-integer credits or level,
+                   unknown Semester Offered values
+  - requirements:  prereq/coreq codes missing from the catalog, courses
+                   requiring themselves, prerequisites at a higher level
+                   than the course (co-requisites: warning)
+  - cycles:        requirement cycles (Tarjan's SCC, iterative)
+  - reachability:  courses no student can ever become eligible for under
+                   the advising rules (semester, track, requirements, level
+                   progression), with the reason
+Everything is O(courses + requirements) except reachability, which is that
+times the number of tracks and levels. Rows are checked as the stores hold
+them, so a whole bulk import or edit batch is validated once. A single-row
+SQLite edit passes only the edited course's neighbourhood (partial=True);
+reachability needs the whole catalog and is left to batch edits, imports
+and `KB_Editor.py validate`.
+"""
+
+import collections
+
+from catalog_snapshot import split_codes
+from kb_store import InvalidCatalog
+
+SEMESTERS = ('Fall', 'Spring', 'Both')
+
+Issue = collections.namedtuple('Issue', 'severity kind code detail')
+
+
+def _int(value):
+    try:
+        return int(str(value).strip())
+    except ValueError:
+        return None
+
+
+def _strongly_connected(nodes, edges) -> list:
+    """Tarjan's SCCs without recursion; requirements come before dependents."""
+    index = {}
+    low = {}
+    on_stack = set()
+    stack = []
+    out = []
+    counter = 0
+    for root in nodes:
+        if root in index:
+            continue
+        work = [(root, iter(edges[root]))]
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack.add(root)
+        while work:
+            node, it = work[-1]
+            for nxt in it:
+                if nxt not in index:
+                    index[nxt] = low[nxt] = counter
+                    counter += 1
+                    stack.append(nxt)
+                    on_stack.add(nxt)
+                    work.append((nxt, iter(edges[nxt])))
+                    break
+                if nxt in on_stack:
+                    low[node] = min(low[node], index[nxt])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    out.append(component)
+    return out
+
+
+def validate_rows(rows) -> list:
+    """All issues of a list of course rows (dicts keyed by CSV column)."""
+    issues = []
+    add = lambda severity, kind, code, detail: issues.append(Issue(severity, kind, code, detail))
+
+    # -- fields and index ----------------------------------------------
+    courses = {}
+    broken = set()  # courses with an error of their own that blocks them
+    for n, row in enumerate(rows, start=1):
+        code = str(row.get('Course Code') or '').strip()
+        if not code:
+            add('error', 'missing_code', f'row {n}', 'Course Code is empty')
+            continue
+        if code in courses:
+            add('error', 'duplicate_code', code, f'row {n} repeats the course')
+            continue
+        credits = _int(row.get('Credit Hours', ''))
+        level = _int(row.get('Level', ''))
+        semester = str(row.get('Semester Offered') or '').strip()
+        if credits is None or credits <= 0:
+            add('error', 'invalid_credits', code, f"Credit Hours {row.get('Credit Hours')!r}")
+        if level is None or level < 1:
+            add('error', 'invalid_level', code, f"Level {row.get('Level')!r}")
+        if semester not in SEMESTERS:
+            broken.add(code)
+            add('error', 'invalid_semester', code,
+                f"Semester Offered {semester!r}, expected one of {', '.join(SEMESTERS)}")
+        courses[code] = {
+            'level':    level or 0,
+            'semester': semester,
+            'track':    str(row.get('Track') or '').strip() or 'All',
+            'prereqs':  split_codes(row.get('Prerequisites') or ''),
+            'coreqs':   split_codes(row.get('Co-requisites') or ''),
+        }
+
+    # -- requirements --------------------------------------------------
+    edges = {}
+    for code, c in courses.items():
+        known = []
+        for kind, reqs in (('prerequisite', c['prereqs']), ('co-requisite', c['coreqs'])):
+            for req in reqs:
+                if req == code:
+                    broken.add(code)
+                    add('error', 'self_requirement', code, f"lists itself as a {kind}")
+                elif req not in courses:
+                    broken.add(code)
+                    add('error', 'unknown_requirement', code, f"{kind} {req} is not in the catalog")
+                else:
+                    known.append(req)
+                    req_level = courses[req]['level']
+                    if req_level > c['level'] and c['level']:
+                        add('error' if kind == 'prerequisite' else 'warning',
+                            f"{kind.replace('-', '')}_level", code,
+                            f"{kind} {req} is level {req_level}, above this level-{c['level']} course")
+        edges[code] = list(dict.fromkeys(known))
+
+    # -- cycles --------------------------------------------------------
+    components = _strongly_connected(list(courses), edges)
+    for component in components:
+        if len(component) > 1:
+            members = sorted(component)
+            broken.update(members)
+            add('error', 'cycle', members[0], 'requirement cycle: ' + ', '.join(members))
+
+    # -- reachability --------------------------------------------------
+    order = [code for component in components for code in component]
+    tracks = sorted({c['track'] for c in courses.values()} | {'All'})
+    reached = {}
+    for track in tracks:
+        reached[track] = _reachable(courses, edges, order, track, broken)
+    anyone = set().union(*reached.values())
+    for code in order:
+        if code in anyone or code in broken:
+            continue
+        c = courses[code]
+        seen = reached[c['track']] if c['track'] != 'All' else anyone
+        add('error', 'unreachable', code, _why_unreachable(code, courses, edges, seen, anyone))
+
+    issues.sort(key=lambda i: (i.severity != 'error', i.code, i.kind, i.detail))
+    return issues
+
+
+def _reachable(courses, edges, order, track, broken) -> set:
+    """
+    Courses a student of track can eventually pass, ignoring credit caps.
+    order lists requirements first, so one sweep per new level suffices.
+    """
+    passed = set()
+    top = 0
+    changed = True
+    while changed:
+        changed = False
+        for code in order:
+            c = courses[code]
+            if code in passed or code in broken:
+                continue
+            if c['track'] not in (track, 'All'):
+                continue
+            if c['level'] > top + 1 or not all(r in passed for r in edges[code]):
+                continue
+            passed.add(code)
+            if c['level'] > top:
+                top = c['level']
+                changed = True
+    return passed
+
+
+def _why_unreachable(code, courses, edges, seen, anyone) -> str:
+    c = courses[code]
+    other_track = [r for r in edges[code] if r in anyone and r not in seen]
+    if other_track:
+        return (f"requires {', '.join(other_track)}, only open to "
+                f"{', '.join(sorted({courses[r]['track'] for r in other_track}))}")
+    blocked = [r for r in edges[code] if r not in anyone]
+    if blocked:
+        return f"requires {', '.join(blocked)}, which is unreachable"
+    return (f"level {c['level']}, but the courses open to its track only "
+            f"reach level {max((courses[r]['level'] for r in seen), default=0)}")
+
+
+def errors(issues) -> list:
+    return [i for i in issues if i.severity == 'error']
+
+
+# Issues whose detail depends on row positions or on the rest of the
+# catalog; they are the same issue as long as kind and code match.
+_POSITIONAL = {'duplicate_code', 'cycle', 'unreachable'}
+
+
+def _issue_key(issue) -> tuple:
+    """Identity of an issue across edits (row numbers shift, details drift)."""
+    if issue.kind == 'missing_code':
+        return (issue.kind,)
+    if issue.kind in _POSITIONAL:
+        return (issue.kind, issue.code)
+    return (issue.kind, issue.code, issue.detail)
+
+
+def check_edit(before, after, partial=False):
+    """
+    Pre-save hook for the KB stores: raise InvalidCatalog if the edited rows
+    have errors the rows before the edit did not, so an edit can never make
+    the catalog worse (and an already broken one can still be repaired).
+    Errors are matched by _issue_key and counted, so e.g. a second empty
+    Course Code row is new but the same one moved up a row is not.
+    partial rows are a subset of the catalog, so reachability is not judged.
+    """
+    found = [i for i in errors(validate_rows(after))
+             if not (partial and i.kind == 'unreachable')]
+    if not found:
+        return
+    known = collections.Counter(_issue_key(i) for i in errors(validate_rows(before)))
+    new = []
+    for issue in found:
+        key = _issue_key(issue)
+        if known[key]:
+            known[key] -= 1
+        else:
+            new.append(issue)
+    if new:
+        raise InvalidCatalog(sorted(new, key=lambda i: (i.code, i.kind, i.detail)))
+
+
+def format_issue(issue) -> str:
+    return f"{issue.severity:<7} {issue.code}: {issue.kind} - {issue.detail}"
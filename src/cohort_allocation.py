@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+cohort_allocation.py
+
+Seat-capacity-aware recommendations for a whole cohort at once.
+
+recommend_courses advises each student on their own, so everyone in an
+intake gets the same level-1 courses and the sections overflow. Here the
+cohort is allocated together against the seat limits in capacities.csv
+(next to courses.csv; columns Course Code, Capacity; courses not listed
+are unlimited):
+
+  1. Eligibility for all students comes from the vectorized BatchIndex,
+     and each student's preference list is their recommend_courses
+     selection followed by the rest of their eligible courses in the
+     usual (level, -credits) order. Their CGPA credit cap still applies.
+  2. Seats are assigned by student-proposing deferred acceptance: students
+     propose down their list while they have credits left; each capped
+     course keeps its best proposals in a heap and bumps the worst when
+     full, and bumped students propose further down their list.
+  3. Course priority: retakes first (if policies.json prioritizes them),
+     then seniority (completed credit hours), then CGPA, then a seeded
+     lottery.
+Every proposal is one heap operation, so a full intake of thousands of
+students allocates in about a second. With no capacity limits the result
+is each student's recommend_courses selection.
+
+    python cohort_allocation.py roster.jsonl -o allocation.jsonl --capacities capacities.csv
+"""
+
+import argparse
+import csv
+import heapq
+import json
+import logging
+import os
+import random
+import sys
+import time
+from collections import deque
+
+from KnowledgeBase import CAPACITIES_PATH, get_catalog, pinned_state, retake_failed_first
+from batch_advisor import get_batch_index, iter_chunks, normalize_student
+from course_selection import select_courses
+from inference_engine import eligibility_reason
+from student_profile import StudentProfile
+
+logger = logging.getLogger(__name__)
+
+
+def load_capacities(path=None, catalog=None) -> dict:
+    """
+    {course code: seats} from a capacities CSV. Without a path the default
+    CAPACITIES_PATH is read, and no file there means no limits ({}); an
+    explicit path must exist (OSError). A course listed twice is a
+    ValueError rather than a silent override.
+    """
+    if path is None:
+        path = CAPACITIES_PATH
+        if not os.path.exists(path):
+            return {}
+    catalog = catalog or get_catalog()
+    capacities = {}
+    seen = {}  # code -> line it was first listed on
+    with open(path, newline='', encoding='utf-8') as f:
+        for n, row in enumerate(csv.DictReader(f), start=2):
+            code = (row.get('Course Code') or '').strip()
+            if code in seen:
+                raise ValueError(f"{path}:{n}: {code} is already listed on line {seen[code]}")
+            seen[code] = n
+            try:
+                seats = int(row.get('Capacity') or '')
+            except ValueError:
+                raise ValueError(f"{path}:{n}: Capacity must be an integer, "
+                                 f"got {row.get('Capacity')!r}") from None
+            if seats < 0:
+                raise ValueError(f"{path}:{n}: negative Capacity for {code}")
+            if code not in catalog:
+                logger.warning(f"{path}:{n}: {code!r} is not in the catalog; ignored")
+                continue
+            capacities[code] = seats
+    return capacities
+
+
+class CohortAllocator:
+
+    def __init__(self, capacities=None, selector: str = None,
+                 chunk_size: int = 1024, seed: int = 0):
+        self.capacities = capacities
+        self.selector = selector
+        self.chunk_size = chunk_size
+        self.seed = seed
+
+    # -- preferences ---------------------------------------------------
+
+    def _preferences(self, index, students) -> list:
+        """
+        Per student: (profile, eligible dicts with the recommend_courses
+        selection first, size of that selection), or the error.
+        """
+        courses = index.catalog.courses
+        out = []
+        for chunk in iter_chunks(students, self.chunk_size):
+            chunk = [normalize_student(s) for s in chunk]
+            taken, reasons = index.evaluate(chunk)
+            eligible = (~taken & (reasons == 0))[:, index.order]
+            for student, row in zip(chunk, eligible):
+                try:
+                    profile = StudentProfile(index.catalog, **student)
+                except ValueError as exc:
+                    out.append(exc)
+                    continue
+                eligibles = sorted((
+                    {
+                        'course_code': course.code,
+                        'credits':     course.credits,
+                        'level':       course.level,
+                        'reason':      eligibility_reason(course.code, course.prerequisites, profile.failed)
+                    }
+                    for course in (courses[i] for i in index.order[row])
+                ), key=lambda e: (e['level'], -e['credits']))
+                chosen = select_courses(eligibles, profile, index.catalog, self.selector)
+                picked = {e['course_code'] for e in chosen}
+                out.append((profile, chosen + [e for e in eligibles
+                                               if e['course_code'] not in picked], len(chosen)))
+        return out
+
+    # -- allocation ----------------------------------------------------
+
+    def allocate(self, students) -> dict:
+        """
+        Allocate seats to students (recommend_courses keyword mappings; an
+        optional student_id is carried through). Returns
+        {'students': [per-student result, input order], 'courses': {code:
+        seat usage for capped courses}}.
+        """
+        students = list(students)
+        with pinned_state() as state:
+            catalog = state.catalog
+            capacities = (self.capacities if self.capacities is not None
+                          else load_capacities(catalog=catalog))
+            index = get_batch_index(catalog)
+            prefs = self._preferences(index, students)
+            retake_first = retake_failed_first()
+
+        valid = [k for k, p in enumerate(prefs) if not isinstance(p, Exception)]
+        lottery = random.Random(self.seed)
+        draw = {k: lottery.random() for k in valid}
+        # rank 0 is the most senior student
+        ranked = sorted(valid, key=lambda k: (-prefs[k][0].completed_credits,
+                                              -prefs[k][0].cgpa, draw[k]))
+        rank = {k: r for r, k in enumerate(ranked)}
+
+        held = {k: {} for k in valid}          # student -> {code: course dict}
+        load = dict.fromkeys(valid, 0)
+        bumped = {k: set() for k in valid}
+        seats = {code: [] for code in capacities}  # heap of (-retake, -rank, student)
+        pending = deque(ranked)
+        proposals = 0
+        while pending:
+            k = pending.popleft()
+            profile, options, _ = prefs[k]
+            for e in options:
+                code = e['course_code']
+                if code in held[k] or code in bumped[k] or load[k] + e['credits'] > profile.cap:
+                    continue
+                proposals += 1
+                held[k][code] = e
+                load[k] += e['credits']
+                heap = seats.get(code)
+                if heap is None:
+                    continue
+                retake = retake_first and profile.is_retake(code)
+                heapq.heappush(heap, (-(not retake), -rank[k], k))
+                if len(heap) > capacities[code]:
+                    _, _, loser = heapq.heappop(heap)
+                    lost = held[loser].pop(code)
+                    load[loser] -= lost['credits']
+                    bumped[loser].add(code)
+                    if loser != k:
+                        pending.append(loser)
+
+        results = []
+        for k, (student, pref) in enumerate(zip(students, prefs)):
+            result = {'student_id': str(student.get('student_id', ''))}
+            if isinstance(pref, Exception):
+                result.update(status='error', error=str(pref))
+            else:
+                _, options, n_chosen = pref
+                recs = [e for e in options if e['course_code'] in held[k]]
+                result.update(
+                    status='ok',
+                    recommendations=[dict(e) for e in recs],
+                    total_credits=load[k],
+                    # individually recommended, but no seat left for this student
+                    full=[e['course_code'] for e in options[:n_chosen]
+                          if e['course_code'] in bumped[k]],
+                )
+            results.append(result)
+
+        demand = {code: 0 for code in capacities}
+        for k in valid:
+            for e in prefs[k][1][:prefs[k][2]]:
+                if e['course_code'] in demand:
+                    demand[e['course_code']] += 1
+        usage = {
+            code: {'capacity': capacities[code], 'allocated': len(seats[code]),
+                   'demand': demand[code]}
+            for code in capacities
+        }
+        return {'students': results, 'courses': usage, 'proposals': proposals}
+
+
+def allocate_cohort(students, capacities=None, selector: str = None, seed: int = 0) -> dict:
+    """Seat-capacity-aware recommendations for a cohort; see CohortAllocator.allocate."""
+    return CohortAllocator(capacities, selector, seed=seed).allocate(students)
+
+
+def main():
+    from bulk_advise import parse_student, read_roster, record_student_id
+
+    p = argparse.ArgumentParser(description="Allocate course seats across a student cohort")
+    p.add_argument('roster', help='Student roster (.csv or .jsonl, optionally .gz)')
+    p.add_argument('-o', '--output', required=True, help='Allocation per student (.jsonl)')
+    p.add_argument('--capacities', help=f'Seat limits CSV (default: {CAPACITIES_PATH})')
+    p.add_argument('--selector', choices=['greedy', 'optimal'])
+    p.add_argument('--seed', type=int, default=0, help='Lottery seed for ties')
+    args = p.parse_args()
+
+    start = time.perf_counter()
+    try:
+        capacities = load_capacities(args.capacities) if args.capacities else None
+    except (OSError, ValueError) as exc:
+        p.error(f"--capacities: {exc}")
+    students = []
+    for n, record in enumerate(read_roster(args.roster), start=1):
+        sid = record_student_id(record)
+        try:
+            students.append({'student_id': sid, **parse_student(record)})
+        except (ValueError, TypeError, KeyError) as exc:
+            print(f"Skipping record {n}{f' ({sid})' if sid else ''}: {exc}", file=sys.stderr)
+    result = allocate_cohort(students, capacities, args.selector, args.seed)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        for r in result['students']:
+            f.write(json.dumps(r) + '\n')
+    n_full = sum(bool(r.get('full')) for r in result['students'])
+    print(f"Allocated {len(students)} students in {time.perf_counter() - start:.1f}s "
+          f"({result['proposals']} proposals); {n_full} lost a recommended course to a full section")
+    over = sorted(((c, u) for c, u in result['courses'].items() if u['demand'] > u['capacity']),
+                  key=lambda item: item[1]['capacity'] - item[1]['demand'])
+    if over:
+        print(f"{'course':<10} {'seats':>6} {'demand':>7} {'filled':>7}")
+        for code, u in over:
+            print(f"{code:<10} {u['capacity']:>6} {u['demand']:>7} {u['allocated']:>7}")
+
+
+if __name__ == '__main__':
+    main()
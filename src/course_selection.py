@@ -0,0 +1,115 @@
+"""
+course_selection.py
+
+Selection stage: choose which eligible courses fit under the credit cap.
+
+Eligible courses arrive sorted by (level, -credits). A selector returns the
+chosen subset in that same order. Two selectors are built in:
+  - 'greedy':  first-fit in sorted order (the original behaviour)
+  - 'optimal': exact 0/1 knapsack over credit hours maximizing course_value
+More can be added with register_selector().
+"""
+
+import os
+
+from KnowledgeBase import retake_failed_first
+
+# Objective weights for the 'optimal' selector. Credit hours carry most of
+# the weight so the cap is used fully; retakes, lower levels and unlocking
+# value decide between fillings of similar size.
+DEFAULT_WEIGHTS = {
+    'credit': 10,   # per credit hour taken
+    'retake': 40,   # failed course being retaken (if policy prioritizes it)
+    'level':  4,    # per level below the highest catalog level
+    'unlock': 3,    # per downstream course that (transitively) requires it
+}
+
+
+def course_values(eligibles, profile, catalog, weights=None) -> list:
+    """Integer objective value of each eligible course for the optimal selector."""
+    w = weights or DEFAULT_WEIGHTS
+    graph = catalog.graph
+    top_level = max((c.level for c in catalog), default=0)
+    retake = retake_failed_first()
+    values = []
+    for e in eligibles:
+        i = graph.index[e['course_code']]
+        value = w['credit'] * e['credits'] + w['level'] * (top_level - e['level'])
+        value += w['unlock'] * bin(graph.reach[i]).count('1')
+        if retake and profile.is_retake(e['course_code']):
+            value += w['retake']
+        values.append(value)
+    return values
+
+
+def select_greedy(eligibles, cap, values=None) -> list:
+    """First-fit: take each course in order if it still fits under cap."""
+    chosen = []
+    total = 0
+    for e in eligibles:
+        if total + e['credits'] <= cap:
+            chosen.append(e)
+            total += e['credits']
+    return chosen
+
+
+def select_optimal(eligibles, cap, values) -> list:
+    """
+    Exact 0/1 knapsack over credit hours, O(len(eligibles) * cap).
+
+    best[i][c] is the best value using courses i.. with c credits left; ties
+    favour taking the earlier course, so equal-value solutions follow the
+    same (level, -credits) preference as the greedy path.
+    """
+    n = len(eligibles)
+    if cap <= 0 or not n:
+        return []
+    weights = [e['credits'] for e in eligibles]
+    best = [[0] * (cap + 1) for _ in range(n + 1)]
+    for i in range(n - 1, -1, -1):
+        row, nxt = best[i], best[i + 1]
+        w, v = weights[i], values[i]
+        for c in range(cap + 1):
+            skip = nxt[c]
+            if w <= c:
+                take = v + nxt[c - w]
+                row[c] = take if take >= skip else skip
+            else:
+                row[c] = skip
+
+    chosen = []
+    c = cap
+    for i in range(n):
+        w = weights[i]
+        if w <= c and best[i][c] == values[i] + best[i + 1][c - w]:
+            chosen.append(eligibles[i])
+            c -= w
+    return chosen
+
+
+SELECTORS = {
+    'greedy':  select_greedy,
+    'optimal': select_optimal,
+}
+DEFAULT_SELECTOR = os.environ.get('AIU_ADVISOR_SELECTOR', 'greedy')
+
+
+def register_selector(name, func):
+    """Add a selector: func(eligibles, cap, values) -> chosen subset in order."""
+    SELECTORS[name] = func
+
+
+def select_courses(eligibles, profile, catalog, selector=None) -> list:
+    """
+    Run the named selector (default DEFAULT_SELECTOR) on sorted eligibles,
+    capped at the student's credit limit (a student_profile.StudentProfile).
+    """
+    name = selector or DEFAULT_SELECTOR
+    try:
+        func = SELECTORS[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown selector {name!r}; expected one of {tuple(SELECTORS)}"
+        ) from None
+    values = None if func is select_greedy else course_values(eligibles, profile, catalog)
+    return func(eligibles, profile.cap, values)
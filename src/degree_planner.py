@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+degree_planner.py
+
+Multi-semester degree-path planner.
+
+Searches for the shortest Fall/Spring sequence that passes every catalog
+course of the student's track, using the same eligibility rules as
+CourseAdvisorEngine._evaluate (semester, track, prerequisites/corequisites,
+level progression) and the CGPA credit cap from policies.json.
+
+The search is a branch-and-bound A* over (passed-course bitset, term parity):
+  - visited states are memoized with the fewest terms that reached them
+  - the lower bound is max(remaining credits / cap, longest unmet chain), so
+    nodes that cannot beat the incumbent plan are pruned
+  - passing more courses never makes anything ineligible, so only maximal
+    course loads are expanded, and only a few per state (ordered by how
+    long a prerequisite chain each course heads), which keeps branching
+    bounded on full four-level catalogs
+A greedy dive provides the first incumbent, so a plan is returned even when
+the time budget runs out; 'optimal' is set when it meets the lower bound.
+"""
+
+import heapq
+import math
+import random
+import time
+
+from KnowledgeBase import get_catalog, max_credits_for_cgpa
+from prereq_graph import iter_bits
+
+TERMS = ('Fall', 'Spring')
+
+
+class DegreePlanner:
+
+    def __init__(self, cgpa: float, track: str, catalog=None,
+                 branching: int = 4, seed: int = 0):
+        self.catalog = catalog or get_catalog()
+        self.graph = self.catalog.graph
+        self.track = track
+        self.cap = max_credits_for_cgpa(cgpa)
+        self.branching = branching
+        self.rng = random.Random(seed)
+        courses = self.catalog.courses
+
+        self.target = 0
+        self.term_mask = {t: 0 for t in TERMS}
+        self.level_mask = {}
+        for c in courses:
+            if c.track not in (track, 'All'):
+                continue
+            self.target |= 1 << c.index
+            for t in TERMS:
+                if c.semester in (t, 'Both'):
+                    self.term_mask[t] |= 1 << c.index
+            self.level_mask[c.level] = self.level_mask.get(c.level, 0) | 1 << c.index
+
+        # height[i]: terms needed for i and the longest chain of target
+        # courses that depend on it
+        self.height = [0] * len(courses)
+        for i in reversed(self.graph.topo_order):
+            if self.target >> i & 1:
+                self.height[i] = 1 + max(
+                    (self.height[j] for j in self.graph.unlocks[i]), default=0)
+        self.credits = [c.credits for c in courses]
+        self.levels = [c.level for c in courses]
+
+    # -- rules ---------------------------------------------------------
+
+    def eligible(self, passed, term) -> list:
+        """Target courses the rules allow in this term, as indices."""
+        current = max((self.levels[i] for i in iter_bits(passed)), default=0)
+        allowed = 0
+        for lev, mask in self.level_mask.items():
+            if lev <= current + 1:
+                allowed |= mask
+        req = self.graph.req_mask
+        return [
+            i for i in iter_bits(self.term_mask[term] & allowed & ~passed)
+            if not req[i] & ~passed
+        ]
+
+    def lower_bound(self, passed) -> int:
+        remaining = self.target & ~passed
+        if not remaining:
+            return 0
+        credits = sum(self.credits[i] for i in iter_bits(remaining))
+        chain = max(self.height[i] for i in iter_bits(remaining))
+        return max(math.ceil(credits / self.cap), chain)
+
+    # -- successors ----------------------------------------------------
+
+    def _fill(self, order) -> int:
+        mask = total = 0
+        for i in order:
+            if total + self.credits[i] <= self.cap:
+                mask |= 1 << i
+                total += self.credits[i]
+        return mask
+
+    def loads(self, candidates) -> list:
+        """A few distinct maximal course loads, most promising first."""
+        if not candidates:
+            return []
+        height, levels, credits = self.height, self.levels, self.credits
+        orders = [
+            sorted(candidates, key=lambda i: (-height[i], levels[i], -credits[i])),
+            sorted(candidates, key=lambda i: (levels[i], -height[i], -credits[i])),
+            sorted(candidates, key=lambda i: (-height[i], credits[i])),
+        ]
+        loads = []
+        for order in orders:
+            mask = self._fill(order)
+            if mask not in loads:
+                loads.append(mask)
+        tries = 0
+        while len(loads) < self.branching and tries < 2 * self.branching:
+            tries += 1
+            order = sorted(candidates,
+                           key=lambda i: (-height[i] - self.rng.random() * 2))
+            mask = self._fill(order)
+            if mask not in loads:
+                loads.append(mask)
+        return loads[:self.branching]
+
+    # -- search --------------------------------------------------------
+
+    def _greedy(self, passed, parity, max_terms) -> list:
+        plan = []
+        while passed & self.target != self.target and len(plan) < max_terms:
+            loads = self.loads(self.eligible(passed, TERMS[parity]))
+            load = loads[0] if loads else 0
+            plan.append(load)
+            passed |= load
+            parity ^= 1
+        return plan if passed & self.target == self.target else None
+
+    def plan(self, passed=(), semester: str = 'Fall',
+             time_budget: float = 2.0, max_terms: int = 16) -> dict:
+        """
+        Shortest plan found within time_budget seconds. Returns
+        {'semesters', 'terms': [{'semester', 'courses', 'credits'}],
+         'optimal', 'lower_bound', 'expanded', 'complete'}.
+        """
+        deadline = time.monotonic() + time_budget
+        start = self.graph.encode(passed)
+        parity0 = TERMS.index(semester)
+        bound = self.lower_bound(start)
+
+        best = self._greedy(start, parity0, max_terms)
+        best_len = len(best) if best is not None else max_terms + 1
+
+        # A*: entries are (f, g, tie, passed, parity); parents rebuild the plan
+        seen = {(start, parity0): 0}
+        parents = {}
+        heap = [(bound, 0, 0, start, parity0)]
+        tie = expanded = 0
+        while heap:
+            f, g, _, passed_mask, parity = heapq.heappop(heap)
+            if f >= best_len:
+                break
+            if time.monotonic() > deadline:
+                break
+            if seen.get((passed_mask, parity), g) < g:
+                continue
+            expanded += 1
+            candidates = self.eligible(passed_mask, TERMS[parity])
+            for load in self.loads(candidates) or [0]:
+                nxt = (passed_mask | load, parity ^ 1)
+                ng = g + 1
+                if seen.get(nxt, max_terms + 1) <= ng:
+                    continue
+                seen[nxt] = ng
+                parents[nxt] = ((passed_mask, parity), load)
+                if nxt[0] & self.target == self.target:
+                    if ng < best_len:
+                        best_len, best = ng, self._rebuild(parents, nxt, start, parity0)
+                    continue
+                nf = ng + self.lower_bound(nxt[0])
+                if nf < best_len and ng < max_terms:
+                    tie += 1
+                    heapq.heappush(heap, (nf, ng, tie, nxt[0], nxt[1]))
+
+        terms = []
+        parity = parity0
+        for load in best or []:
+            courses = [self.catalog.codes[i] for i in iter_bits(load)]
+            terms.append({
+                'semester': TERMS[parity],
+                'courses':  courses,
+                'credits':  sum(self.credits[i] for i in iter_bits(load)),
+            })
+            parity ^= 1
+        return {
+            'semesters':   len(terms),
+            'terms':       terms,
+            'complete':    best is not None,
+            'optimal':     best is not None and len(best) == bound,
+            'lower_bound': bound,
+            'expanded':    expanded,
+        }
+
+    @staticmethod
+    def _rebuild(parents, state, start, parity0) -> list:
+        loads = []
+        while state != (start, parity0):
+            state, load = parents[state]
+            loads.append(load)
+        return loads[::-1]
+
+
+def plan_degree(cgpa: float, passed=(), semester: str = 'Fall',
+                track: str = 'All', time_budget: float = 2.0,
+                max_terms: int = 16) -> dict:
+    """Minimum-semester graduation plan; see DegreePlanner.plan."""
+    return DegreePlanner(cgpa, track).plan(passed, semester, time_budget, max_terms)
+
+
+if __name__ == "__main__":
+    result = plan_degree(cgpa=3.2, passed=['CSE014', 'MAT111'],
+                         semester='Fall', track='Artificial Intelligence Science')
+    status = 'optimal' if result['optimal'] else f"lower bound {result['lower_bound']}"
+    print(f"Graduation in {result['semesters']} semesters ({status}):")
+    for n, term in enumerate(result['terms'], start=1):
+        print(f"- Term {n} ({term['semester']}, {term['credits']} cr): "
+              f"{', '.join(term['courses'])}")
@@ -0,0 +1,185 @@
+"""
+experta_engine.py
+
+Experta (Rete) implementation of the course-eligibility rules. Imported
+lazily by inference_engine, so only the 'experta' and 'parity' evaluators
+pay for experta and its compatibility patch.
+"""
+
+import collections
+import collections.abc
+import logging
+# Compatibility patch for frozendict dependency
+collections.Mapping = collections.abc.Mapping
+
+from experta import KnowledgeEngine, Fact, Field, DefFacts, Rule, MATCH
+from KnowledgeBase import get_catalog, max_credits_for_cgpa
+from advisor_metrics import NULL_TRACE
+from explanations import LEVEL_GAP, UNMET_COREQ, UNMET_PREREQ, WRONG_SEMESTER, WRONG_TRACK
+from inference_engine import eligibility_reason
+
+# Experta's watchers log every fact and activation at INFO. The advisor's
+# traces (advisor_metrics) cover that, so keep them off the hot path unless
+# the application configured them explicitly.
+_watchers = logging.getLogger('experta.watchers')
+if _watchers.level == logging.NOTSET:
+    _watchers.setLevel(logging.WARNING)
+
+
+class CourseFact(Fact):
+    course_code      = Field(str,  mandatory=True)
+    course_name      = Field(str,  mandatory=True)
+    prerequisites    = Field(list, default=[])
+    corequisites     = Field(list, default=[])
+    credits          = Field(int,  mandatory=True)
+    semester_offered = Field(str,  mandatory=True)
+    track            = Field(str,  default='All')
+    level            = Field(int,  mandatory=True)
+
+
+class Student(Fact):
+    cgpa           = Field(float, mandatory=True)
+    passed_courses = Field(list,  default=[])
+    failed_courses = Field(list,  default=[])
+    semester       = Field(str,  mandatory=True)
+    track          = Field(str,  mandatory=True)
+
+
+class EligibleCourse(Fact):
+    course_code = Field(str, mandatory=True)
+    credits     = Field(int, mandatory=True)
+    level       = Field(int, mandatory=True)
+    reason      = Field(str)
+
+
+class CourseAdvisorEngine(KnowledgeEngine):
+    trace = NULL_TRACE  # advisor_metrics trace of the current run
+
+    def reset(self, **kwargs):
+        """Start a run with empty rejection records (see explanations)."""
+        self.rejections = {}
+        self.passed = frozenset()
+        self.level = 0
+        super().reset(**kwargs)
+
+    @DefFacts()
+    def _load_courses(self):
+        """Load all courses into working memory."""
+        for course in get_catalog():
+            yield CourseFact(
+                course_code      = course.code,
+                course_name      = course.name,
+                prerequisites    = list(course.prerequisites),
+                corequisites     = list(course.corequisites),
+                credits          = course.credits,
+                semester_offered = course.semester,
+                track            = course.track,
+                level            = course.level
+            )
+
+    @Rule(Student(cgpa=MATCH.cgpa, passed_courses=MATCH.passed))
+    def _set_credit_limit(self, cgpa, passed):
+        """
+        Declare max_credits fact based on CGPA band. Also index the Student's
+        passed courses once (a set, and the current level as StudentProfile
+        computes it) for _evaluate, which needs max_credits and so always
+        fires after this rule.
+        """
+        catalog = get_catalog()
+        self.passed = frozenset(passed)
+        self.level = max((catalog.get(c).level for c in self.passed if c in catalog),
+                         default=0)
+        limit = max_credits_for_cgpa(cgpa)
+        self.declare(Fact(max_credits=limit))
+        self.trace.count('activations')
+        self.trace.note('credit_limit', limit)
+
+    @Rule(
+        Student(failed_courses=MATCH.failed,
+                semester=MATCH.sem,
+                track=MATCH.strack),
+        Fact(max_credits=MATCH.max_credits),
+        CourseFact(course_code=MATCH.code,
+                   prerequisites=MATCH.prereqs,
+                   corequisites=MATCH.coreqs,
+                   credits=MATCH.credits,
+                   semester_offered=MATCH.sem_offered,
+                   track=MATCH.ctrack,
+                   level=MATCH.lev)
+    )
+    def _evaluate(self, failed, sem, strack,
+                  max_credits, code, prereqs, coreqs,
+                  credits, sem_offered, ctrack, lev):
+        self.trace.count('activations')
+        passed = self.passed
+        current = self.level
+        # 0) Exclude already-completed courses
+        if code in passed:
+            return
+
+        # Every failing rule is recorded (see explanations), not just the first
+        reasons = 0
+        # 1) Semester filter
+        if sem_offered not in (sem, 'Both'):
+            reasons |= WRONG_SEMESTER
+        # 2) Track filter
+        if ctrack not in (strack, 'All'):
+            reasons |= WRONG_TRACK
+        # 3) Prerequisites check
+        unmet_pr = [p for p in prereqs if p not in passed]
+        if unmet_pr:
+            reasons |= UNMET_PREREQ
+        # 4) Corequisites check
+        unmet_cr = [c for c in coreqs if c not in passed]
+        if unmet_cr:
+            reasons |= UNMET_COREQ
+        # 5) Level progression: at most one above the current level
+        if lev > current + 1:
+            reasons |= LEVEL_GAP
+        if reasons:
+            self.rejections[get_catalog().get(code).index] = reasons
+            return
+
+        # 6) Build explanation (reason) and declare eligible course
+        self.declare(EligibleCourse(
+            course_code=code,
+            credits=credits,
+            level=lev,
+            reason=eligibility_reason(code, prereqs, failed)
+        ))
+
+
+
+def eligible_experta(profile, trace=NULL_TRACE) -> tuple:
+    """
+    Run the Rete engine; returns the EligibleCourse facts in declaration
+    order and the rejection records of the other courses.
+    """
+    engine = CourseAdvisorEngine()
+    engine.trace = trace
+    trace.mark('engine_init')
+    engine.reset()
+    trace.mark('deffacts')
+    engine.declare(Student(
+        cgpa=profile.cgpa,
+        passed_courses=sorted(profile.passed),
+        failed_courses=sorted(profile.failed),
+        semester=profile.semester,
+        track=profile.track
+    ))
+    trace.mark('rete_match')
+    engine.run()
+    trace.mark('fire')
+    trace.count('facts_declared', len(engine.facts))
+    eligibles = [
+        {
+            'course_code': f['course_code'],
+            'credits':     f['credits'],
+            'level':       f['level'],
+            'reason':      f['reason']
+        }
+        for f in engine.facts.values()
+        if isinstance(f, EligibleCourse)
+    ]
+    trace.mark('collect')
+    return eligibles, engine.rejections
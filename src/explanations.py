@@ -0,0 +1,148 @@
+"""
+explanations.py
+
+Why a course was not recommended, recorded while eligibility is evaluated.
+
+Every evaluator (fast filter, Experta rules, NumPy batch, AdvisorSession)
+stores one small bitmask per rejected course instead of a sentence:
+
+    WRONG_SEMESTER  not offered in the student's semester
+    WRONG_TRACK     restricted to another track
+    UNMET_PREREQ    at least one prerequisite not passed
+    UNMET_COREQ     at least one co-requisite not passed
+    LEVEL_GAP       more than one level above the student's current level
+    CREDIT_CAP      eligible, but left out to stay within the credit limit
+
+All applicable bits are set, not just the first failing rule. Explanations
+wraps those records for one student and only renders text when it is read,
+naming every unmet requirement (and the rest of the chain behind them).
+"""
+
+from collections.abc import Sequence
+
+WRONG_SEMESTER = 1
+WRONG_TRACK = 2
+UNMET_PREREQ = 4
+UNMET_COREQ = 8
+LEVEL_GAP = 16
+CREDIT_CAP = 32
+
+REASONS = {
+    WRONG_SEMESTER: 'wrong_semester',
+    WRONG_TRACK:    'wrong_track',
+    UNMET_PREREQ:   'unmet_prerequisite',
+    UNMET_COREQ:    'unmet_corequisite',
+    LEVEL_GAP:      'level_gap',
+    CREDIT_CAP:     'credit_cap',
+}
+
+
+def rejection_mask(course, graph, passed_mask, semester, track, level) -> int:
+    """Reason bits for one course (0 if the rules allow it)."""
+    i = course.index
+    mask = 0
+    if course.semester not in (semester, 'Both'):
+        mask |= WRONG_SEMESTER
+    if course.track not in (track, 'All'):
+        mask |= WRONG_TRACK
+    if graph.prereq_mask[i] & ~passed_mask:
+        mask |= UNMET_PREREQ
+    if graph.coreq_mask[i] & ~passed_mask:
+        mask |= UNMET_COREQ
+    if course.level > level + 1:
+        mask |= LEVEL_GAP
+    return mask
+
+
+def rejection_masks(catalog, profile) -> dict:
+    """{catalog index: reason bits} for every not-passed course the rules reject."""
+    graph = catalog.graph
+    passed_mask = profile.passed_mask
+    out = {}
+    for course in catalog.courses:
+        if passed_mask >> course.index & 1:
+            continue
+        mask = rejection_mask(course, graph, passed_mask, profile.semester,
+                              profile.track, profile.level)
+        if mask:
+            out[course.index] = mask
+    return out
+
+
+def reason_names(mask) -> list:
+    return [name for bit, name in REASONS.items() if mask & bit]
+
+
+class Explanations(Sequence):
+    """
+    Read-only sequence of explanation strings, rendered on first access.
+
+    ``records`` maps catalog index -> reason bits for every course that is
+    neither passed nor recommended; ``reasons(code)`` gives the names.
+    """
+
+    def __init__(self, catalog, records, profile):
+        self.catalog = catalog
+        self.records = records
+        self.profile = profile
+        self._order = sorted(records, key=catalog.codes.__getitem__)
+        self._lines = None
+
+    def reasons(self, code) -> list:
+        i = self.catalog.graph.index.get(code)
+        return reason_names(self.records.get(i, 0))
+
+    def _render(self, i) -> str:
+        course = self.catalog.courses[i]
+        graph = self.catalog.graph
+        mask = self.records[i]
+        parts = []
+        if mask & UNMET_PREREQ:
+            missing = graph.prereq_mask[i] & ~self.profile.passed_mask
+            part = _listing('unmet prerequisite', graph.decode(missing))
+            chain = graph.unmet_chain(i, self.profile.passed_mask) & ~graph.req_mask[i]
+            if chain:
+                part += f" (still needed before those: {', '.join(graph.decode(chain))})"
+            parts.append(part)
+        if mask & UNMET_COREQ:
+            missing = graph.coreq_mask[i] & ~self.profile.passed_mask
+            parts.append(_listing('unmet co-requisite', graph.decode(missing)))
+        if mask & WRONG_SEMESTER:
+            parts.append(f"offered only in {course.semester}")
+        if mask & WRONG_TRACK:
+            parts.append(f"only for the {course.track} track")
+        if mask & LEVEL_GAP:
+            parts.append(f"level {course.level} course, but your current "
+                         f"level is {self.profile.level}")
+        if mask & CREDIT_CAP:
+            parts.append(f"eligible, but left out to stay within your "
+                         f"{self.profile.cap}-credit limit")
+        return f"{course.code} is unavailable: {'; '.join(parts)}."
+
+    @property
+    def lines(self) -> list:
+        if self._lines is None:
+            self._lines = [self._render(i) for i in self._order]
+        return self._lines
+
+    def __len__(self):
+        return len(self._order)
+
+    def __getitem__(self, k):
+        return self.lines[k]
+
+    def __iter__(self):
+        return iter(self.lines)
+
+    def __eq__(self, other):
+        if isinstance(other, (Explanations, list, tuple)):
+            return self.lines == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return f"Explanations({self.lines!r})"
+
+
+def _listing(label, codes) -> str:
+    plural = 's' if len(codes) > 1 else ''
+    return f"{label}{plural} {', '.join(codes)}"
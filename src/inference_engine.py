@@ -2,204 +2,261 @@
 """
 inference_engine.py
 
-Recommends courses using Experta based on student CGPA, passed/failed courses,
-semester, track, and level progression. Returns both:
+Recommends courses based on student CGPA, passed/failed courses, semester,
+track, and level progression, using either the Experta rule engine
+(experta_engine) or the equivalent engine-free filter. Returns both:
   - A list of recommended courses with explanations.
   - A list of unavailable-course explanations.
 """
 
+import os
 import logging
-import collections
-import collections.abc
-# Compatibility patch for frozendict dependency
-collections.Mapping = collections.abc.Mapping
 
-from experta import KnowledgeEngine, Fact, Field, DefFacts, Rule, MATCH
-from KnowledgeBase import list_all_courses, get_course, max_credits_for_cgpa, retake_failed_first
+from KnowledgeBase import get_catalog, pinned_state, retake_failed_first
+from advisor_metrics import NULL_TRACE, metrics
+from course_selection import DEFAULT_SELECTOR, select_courses
+from explanations import CREDIT_CAP, Explanations, rejection_mask
+from recommendation_cache import RecommendationCache, profile_key
+from student_profile import StudentProfile
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Eligibility evaluators accepted by recommend_courses(evaluator=...)
+EVALUATORS = ('experta', 'fast', 'parity')
+DEFAULT_EVALUATOR = os.environ.get('AIU_ADVISOR_EVALUATOR', 'fast')
 
-class CourseFact(Fact):
-    course_code      = Field(str,  mandatory=True)
-    course_name      = Field(str,  mandatory=True)
-    prerequisites    = Field(list, default=[])
-    corequisites     = Field(list, default=[])
-    credits          = Field(int,  mandatory=True)
-    semester_offered = Field(str,  mandatory=True)
-    track            = Field(str,  default='All')
-    level            = Field(int,  mandatory=True)
-
-
-class Student(Fact):
-    cgpa           = Field(float, mandatory=True)
-    passed_courses = Field(list,  default=[])
-    failed_courses = Field(list,  default=[])
-    semester       = Field(str,  mandatory=True)
-    track          = Field(str,  mandatory=True)
-
-
-class EligibleCourse(Fact):
-    course_code = Field(str, mandatory=True)
-    credits     = Field(int, mandatory=True)
-    level       = Field(int, mandatory=True)
-    reason      = Field(str)
-
-
-class CourseAdvisorEngine(KnowledgeEngine):
-    @DefFacts()
-    def _load_courses(self):
-        """Load all courses into working memory."""
-        for course in list_all_courses():
-            prereqs = [c.strip() for c in course['Prerequisites'].split(',') if c.strip()]
-            coreqs = [c.strip() for c in course['Co-requisites'].split(',') if c.strip()]
-            yield CourseFact(
-                course_code      = course['Course Code'],
-                course_name      = course['Course Name'],
-                prerequisites    = prereqs,
-                corequisites     = coreqs,
-                credits          = int(course['Credit Hours']),
-                semester_offered = course['Semester Offered'],
-                track            = course['Track'],
-                level            = int(course['Level'])
-            )
+# Shared memo of recommend_courses results (size 0 disables it)
+recommendation_cache = RecommendationCache(
+    maxsize=int(os.environ.get('AIU_ADVISOR_CACHE_SIZE', 4096))
+)
+metrics.register_gauges('recommend_cache', recommendation_cache.stats)
+
+
+def eligibility_reason(code, prereqs, failed) -> str:
+    """Explanation attached to an eligible course (shared by both evaluators)."""
+    if code in failed and retake_failed_first():
+        return f"{code} is prioritized because you failed it previously."
+    if prereqs:
+        return f"{code} is recommended because you passed {prereqs[0]}, its prerequisite."
+    return f"{code} is recommended."
+
+
+def _eligible_experta(profile, trace=NULL_TRACE) -> tuple:
+    """Run the Rete engine (imported on first use, see experta_engine)."""
+    from experta_engine import eligible_experta
+    return eligible_experta(profile, trace)
+
+
+def __getattr__(name):
+    # The Experta fact and engine classes live in experta_engine so that
+    # importing this module does not pull in experta; keep the old names.
+    if name in ('CourseFact', 'Student', 'EligibleCourse', 'CourseAdvisorEngine'):
+        import experta_engine
+        return getattr(experta_engine, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _eligible_fast(profile) -> tuple:
+    """
+    Engine-free equivalent of CourseAdvisorEngine._evaluate. Returns
+    (eligibles, rejections): rejections maps the catalog index of every
+    other not-passed course to its reason bits (see explanations).
+
+    The engine fires activations newest-first, so EligibleCourse facts come out
+    in reverse catalog order; walking the catalog backwards keeps the stable
+    (level, -credits) sort in recommend_courses tie-for-tie identical.
+    """
+    catalog = get_catalog()
+    graph = catalog.graph
+    passed_mask = profile.passed_mask
+    semester, track, level = profile.semester, profile.track, profile.level
+    failed = profile.failed
+    eligibles = []
+    rejections = {}
+    for course in reversed(catalog.courses):
+        if passed_mask >> course.index & 1:
+            continue
+        # Semester, track, prerequisites/corequisites (bitwise subset test)
+        # and level progression, recording every rule that fails
+        reasons = rejection_mask(course, graph, passed_mask, semester, track, level)
+        if reasons:
+            rejections[course.index] = reasons
+            continue
+        eligibles.append({
+            'course_code': course.code,
+            'credits':     course.credits,
+            'level':       course.level,
+            'reason':      eligibility_reason(course.code, course.prerequisites, failed)
+        })
+    return eligibles, rejections
+
+
+def _finalize(eligibles, rejections, profile, selector=None,
+              trace=NULL_TRACE, catalog=None) -> tuple:
+    """
+    Apply the credit cap and wrap the rejection records of the evaluator in
+    lazily rendered Explanations (eligible courses the cap leaves out are
+    added as CREDIT_CAP). ``rejections`` is updated in place. ``catalog``
+    is the one the records index into (default: the live catalog).
+    """
+    catalog = catalog or get_catalog()
+
+    # 1) Sort by level, then by descending credits
+    eligibles = sorted(eligibles, key=lambda f: (f['level'], -f['credits']))
+    trace.mark('sort')
+
+    # 2) Enforce credit cap (see course_selection for the selectors)
+    recommendations = select_courses(eligibles, profile, catalog, selector)
+    trace.mark('cap')
+    trace.count('eligible', len(eligibles))
+    trace.count('recommended', len(recommendations))
+
+    # 3) Unavailable courses: rule rejections plus what the cap dropped
+    if len(recommendations) < len(eligibles):
+        index = catalog.graph.index
+        rec_codes = {r['course_code'] for r in recommendations}
+        for e in eligibles:
+            if e['course_code'] not in rec_codes:
+                rejections[index[e['course_code']]] = CREDIT_CAP
+    explanations = Explanations(catalog, rejections, profile)
+    trace.mark('explain')
+
+    return recommendations, explanations
+
+
+def compare_evaluators(cgpa: float, passed: list, failed: list,
+                       semester: str, track: str) -> list:
+    """
+    Run both evaluators on the same student and return a list of
+    human-readable differences (empty when they agree).
+    """
+    with pinned_state():
+        profile = StudentProfile(get_catalog(), cgpa, passed, failed, semester, track)
+        ref = _finalize(*_eligible_experta(profile), profile)
+        fast = _finalize(*_eligible_fast(profile), profile)
+    return _diff_results(ref, fast)
 
-    @Rule(Student(cgpa=MATCH.cgpa))
-    def _set_credit_limit(self, cgpa):
-        """Declare max_credits fact based on CGPA band."""
-        limit = max_credits_for_cgpa(cgpa)
-        self.declare(Fact(max_credits=limit))
-        logger.info(f"Credit limit set to {limit}")
-
-    @Rule(
-        Student(passed_courses=MATCH.passed,
-                failed_courses=MATCH.failed,
-                semester=MATCH.sem,
-                track=MATCH.strack),
-        Fact(max_credits=MATCH.max_credits),
-        CourseFact(course_code=MATCH.code,
-                   prerequisites=MATCH.prereqs,
-                   corequisites=MATCH.coreqs,
-                   credits=MATCH.credits,
-                   semester_offered=MATCH.sem_offered,
-                   track=MATCH.ctrack,
-                   level=MATCH.lev)
-    )
-    def _evaluate(self, passed, failed, sem, strack,
-                  max_credits, code, prereqs, coreqs,
-                  credits, sem_offered, ctrack, lev):
-        # 0) Exclude already-completed courses
-        if code in passed:
-            return
-
-        # 1) Semester filter
-        if sem_offered not in (sem, 'Both'):
-            return
-        # 2) Track filter
-        if ctrack not in (strack, 'All'):
-            return
-        # 3) Prerequisites check
-        unmet_pr = [p for p in prereqs if p not in passed]
-        if unmet_pr:
-            return
-        # 4) Corequisites check
-        unmet_cr = [c for c in coreqs if c not in passed]
-        if unmet_cr:
-            return
-        # 5) Level progression: at most one above current max level
-        levels = [
-            int(get_course(pc)['Level'])
-            for pc in passed
-            if get_course(pc)
-        ]
-        current = max(levels) if levels else 0
-        if lev > current + 1:
-            return
-
-        # 6) Build explanation (reason)
-        if code in failed and retake_failed_first():
-            reason = f"{code} is prioritized because you failed it previously."
-        elif prereqs:
-            reason = f"{code} is recommended because you passed {prereqs[0]}, its prerequisite."
-        else:
-            reason = f"{code} is recommended."
-
-        # Declare eligible course
-        self.declare(EligibleCourse(
-            course_code=code,
-            credits=credits,
-            level=lev,
-            reason=reason
-        ))
+
+def _diff_results(ref, fast) -> list:
+    diffs = []
+    (ref_recs, ref_notes), (fast_recs, fast_notes) = ref, fast
+    if ref_recs != fast_recs:
+        diffs.append(
+            "recommendations differ: experta=%s fast=%s" % (
+                [r['course_code'] for r in ref_recs],
+                [r['course_code'] for r in fast_recs])
+        )
+        for a, b in zip(ref_recs, fast_recs):
+            if a != b:
+                diffs.append(f"  first mismatch: experta={a} fast={b}")
+                break
+    for note in ref_notes:
+        if note not in fast_notes:
+            diffs.append(f"explanation only from experta: {note}")
+    for note in fast_notes:
+        if note not in ref_notes:
+            diffs.append(f"explanation only from fast: {note}")
+    if not diffs and ref_notes != fast_notes:
+        diffs.append("explanations differ in order")
+    return diffs
 
 
 def recommend_courses(cgpa: float, passed: list, failed: list,
-                      semester: str, track: str) -> tuple:
+                      semester: str, track: str, evaluator: str = None,
+                      use_cache: bool = True, selector: str = None) -> tuple:
     """
     Runs the engine and returns:
       - List of recommended course dicts: {
             'course_code', 'credits', 'level', 'reason'
         }
-      - List of unavailable-course explanation strings
+      - Unavailable-course explanation strings, one per course neither
+        passed nor recommended (an explanations.Explanations sequence,
+        rendered on first access; .reasons(code) gives the rule names)
+
+    ``evaluator`` selects how eligibility is computed:
+      - 'experta': the Rete engine (CourseAdvisorEngine)
+      - 'fast':    the engine-free filter in _eligible_fast
+      - 'parity':  run both, log any differences, return the experta result
+    When omitted, DEFAULT_EVALUATOR (env AIU_ADVISOR_EVALUATOR) is used.
+
+    ``selector`` picks how courses are fitted under the credit cap
+    ('greedy' or 'optimal', see course_selection); default
+    DEFAULT_SELECTOR (env AIU_ADVISOR_SELECTOR).
+
+    Results are memoized in ``recommendation_cache`` (see cache_stats());
+    parity runs and use_cache=False always evaluate.
     """
-    engine = CourseAdvisorEngine()
-    engine.reset()
-    engine.declare(Student(
-        cgpa=cgpa,
-        passed_courses=passed,
-        failed_courses=failed,
-        semester=semester,
-        track=track
-    ))
-    engine.run()
-
-    # 1) Gather all EligibleCourse facts
-    eligibles = [
-        f for f in engine.facts.values()
-        if isinstance(f, EligibleCourse)
-    ]
-    # 2) Sort by level, then by descending credits
-    eligibles.sort(key=lambda f: (f['level'], -f['credits']))
-
-    # 3) Enforce credit cap
-    cap = max_credits_for_cgpa(cgpa)
-    recommendations = []
-    total = 0
-    for f in eligibles:
-        if total + f['credits'] <= cap:
-            recommendations.append({
-                'course_code': f['course_code'],
-                'credits':     f['credits'],
-                'level':       f['level'],
-                'reason':      f['reason']
-            })
-            total += f['credits']
-
-    # 4) Build unavailable-course explanations
-    explanations = []
-    all_codes = {c['Course Code'] for c in list_all_courses()}
-    rec_codes = {r['course_code'] for r in recommendations}
-    for code in sorted(all_codes - rec_codes - set(passed)):
-        course = get_course(code)
-        # unmet prereq?
-        prereqs = [p for p in course['Prerequisites'].split(',') if p.strip()]
-        unmet = next((p for p in prereqs if p not in passed), None)
-        if unmet:
-            explanations.append(
-                f"{code} is unavailable due to an unmet prerequisite, {unmet}."
+    evaluator = evaluator or DEFAULT_EVALUATOR
+    if evaluator not in EVALUATORS:
+        raise ValueError(
+            f"Unknown evaluator {evaluator!r}; expected one of {EVALUATORS}"
+        )
+    # One catalog/policy version for the whole call, even across a hot reload
+    with pinned_state():
+        return _recommend(cgpa, passed, failed, semester, track,
+                          evaluator, use_cache, selector)
+
+
+def _recommend(cgpa, passed, failed, semester, track,
+               evaluator, use_cache, selector) -> tuple:
+    trace = metrics.trace('recommend')
+    trace.note('evaluator', evaluator)
+    try:
+        key = None
+        if use_cache and evaluator != 'parity' and recommendation_cache.maxsize:
+            key = profile_key(cgpa, passed, failed, semester, track) + (
+                selector or DEFAULT_SELECTOR,
             )
-        elif code in failed and retake_failed_first():
-            # already prioritized and recommended if eligible
-            continue
-        else:
-            explanations.append(f"{code} is unavailable.")
+            cached = recommendation_cache.get(key)
+            trace.mark('cache_lookup')
+            if cached is not None:
+                trace.count('cache_hits')
+                return _copy_result(cached)
+            trace.count('cache_misses')
+
+        result = _evaluate_uncached(cgpa, passed, failed, semester, track,
+                                    evaluator, selector, trace)
+        if key is not None:
+            recommendation_cache.put(key, _copy_result(result))
+            trace.mark('cache_store')
+        return result
+    except Exception as exc:
+        trace.note('error', type(exc).__name__)
+        raise
+    finally:
+        trace.finish()
+
+
+def cache_stats() -> dict:
+    """Hit/miss/eviction counters of the recommend_courses cache."""
+    return recommendation_cache.stats()
 
-    return recommendations, explanations
+
+def _copy_result(result) -> tuple:
+    recs, notes = result
+    return [dict(r) for r in recs], notes  # Explanations are read-only
+
+
+def _evaluate_uncached(cgpa, passed, failed, semester, track,
+                       evaluator, selector=None, trace=NULL_TRACE) -> tuple:
+    profile = StudentProfile(get_catalog(), cgpa, passed, failed, semester, track)
+    trace.mark('profile')
+    if evaluator == 'fast':
+        eligibles, rejections = _eligible_fast(profile)
+        trace.mark('eligibility')
+        return _finalize(eligibles, rejections, profile, selector, trace)
+
+    result = _finalize(*_eligible_experta(profile, trace), profile, selector, trace)
+    if evaluator == 'parity':
+        fast = _finalize(*_eligible_fast(profile), profile, selector)
+        for diff in _diff_results(result, fast):
+            logger.warning(f"Evaluator parity mismatch: {diff}")
+    return result
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
     # Demo run
     recs, notes = recommend_courses(
         cgpa=3.2,
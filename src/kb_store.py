@@ -0,0 +1,464 @@
+"""
+kb_store.py
+
+Storage backends for the editable course knowledge base.
+
+Both backends expose the same small API used by KnowledgeBase, KB_Editor
+and the App.py admin tabs:
+    list_rows(), get(code), add(row), update(code, changes), delete(code),
+    apply(edits), version(), import_csv(path), export_csv(path)
+apply() makes a batch of add/edit/delete edits in one write. A store's
+validator(before_rows, after_rows, partial=False), when set, runs inside the
+write before anything is saved and rejects the edit by raising (see
+catalog_validator). With partial=True the rows are only the neighbourhood
+of the edited courses, not the whole catalog.
+
+  - CsvKBStore keeps courses.csv as the store. Writers hold an exclusive
+    lock file and replace the CSV atomically (temp file + os.replace), so
+    concurrent editors cannot interleave and readers never see a partial
+    file. Each edit is still a full rewrite.
+  - SqliteKBStore keeps the courses in SQLite (WAL mode): every edit is a
+    single-row transaction, readers are never blocked by writers, and a
+    version counter bumped in the same transaction lets readers detect
+    changes with one primary-key lookup. An indexed requirements table
+    (course -> required code) lets a single-row edit be validated on its
+    graph neighbourhood: the course, everything it requires (transitively)
+    and the courses that require it. The database is seeded from
+    courses.csv the first time it is opened.
+
+open_store() picks the backend from AIU_ADVISOR_KB_BACKEND ('csv' or 'sqlite').
+"""
+
+import contextlib
+import csv
+import os
+import sqlite3
+import threading
+
+from catalog_snapshot import COLUMNS, split_codes
+
+# Columns the editors may write; Description is optional in the CSV.
+FIELDS = COLUMNS + ('Description',)
+
+
+class KBStoreError(Exception):
+    """Base class for knowledge-base edit errors."""
+
+
+class DuplicateCourse(KBStoreError):
+    def __init__(self, code):
+        super().__init__(f"Course {code} already exists.")
+        self.code = code
+
+
+class CourseNotFound(KBStoreError):
+    def __init__(self, code):
+        super().__init__(f"Course {code} not found.")
+        self.code = code
+
+
+class InvalidCatalog(KBStoreError):
+    """The edit would introduce catalog errors; .issues lists them."""
+
+    def __init__(self, issues):
+        self.issues = list(issues)
+        shown = '; '.join(f"{i.code}: {i.detail}" for i in self.issues[:5])
+        more = f" (and {len(self.issues) - 5} more)" if len(self.issues) > 5 else ''
+        super().__init__(f"Edit rejected, it would introduce {len(self.issues)} "
+                         f"catalog error(s): {shown}{more}")
+
+
+def _clean(row) -> dict:
+    row = {k: '' if v is None else str(v) for k, v in row.items()}
+    row['Course Code'] = row.get('Course Code', '').strip()
+    if not row['Course Code']:
+        raise KBStoreError("Course Code is required.")
+    return row
+
+
+def apply_edits(rows, edits) -> list:
+    """
+    New row list with edits applied in order. Each edit is a dict with
+    'op' ('add', 'edit' or 'delete'), 'Course Code' and, for add/edit, the
+    fields to set. One index lookup per edit.
+    """
+    rows = list(rows)
+    index = {r['Course Code']: i for i, r in enumerate(rows)}
+    for edit in edits:
+        edit = dict(edit)
+        op = str(edit.pop('op', '')).strip().lower()
+        code = str(edit.get('Course Code', '')).strip()
+        unknown = [f for f in edit if f not in FIELDS]
+        if unknown:
+            raise KBStoreError(f"Unknown field(s): {', '.join(unknown)}")
+        if op == 'add':
+            row = _clean(edit)
+            if code in index:
+                raise DuplicateCourse(code)
+            index[code] = len(rows)
+            rows.append(row)
+        elif op in ('edit', 'delete'):
+            i = index.get(code)
+            if i is None:
+                raise CourseNotFound(code)
+            if op == 'delete':
+                rows[i] = None
+                del index[code]
+            else:
+                edit.pop('Course Code', None)
+                rows[i] = {**rows[i], **{f: '' if v is None else str(v) for f, v in edit.items()}}
+        else:
+            raise KBStoreError(f"Unknown edit op {op!r} for {code or 'course'}; "
+                               "expected add, edit or delete")
+    return [r for r in rows if r is not None]
+
+
+@contextlib.contextmanager
+def file_lock(path):
+    """Exclusive advisory lock on path (created if missing)."""
+    with open(path, 'a+b') as f:
+        try:
+            import fcntl
+        except ImportError:  # Windows
+            import msvcrt
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def read_csv_rows(path) -> tuple:
+    """(fieldnames, rows) of a course CSV; rows are dicts of strings."""
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        rows = [{k: v or '' for k, v in row.items() if k is not None}
+                for row in reader]
+        return list(reader.fieldnames or COLUMNS), rows
+
+
+def write_csv_rows(path, fieldnames, rows):
+    """Write rows to path atomically."""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames, lineterminator='\n',
+                                extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(rows)
+    os.replace(tmp, path)
+
+
+class CsvKBStore:
+    """courses.csv with locked, atomic whole-file rewrites."""
+
+    def __init__(self, path, validator=None):
+        self.path = path
+        self.lock_path = path + '.lock'
+        self.validator = validator
+
+    def list_rows(self) -> list:
+        return read_csv_rows(self.path)[1]
+
+    def get(self, code):
+        return next((r for r in self.list_rows() if r['Course Code'] == code), None)
+
+    def version(self) -> tuple:
+        st = os.stat(self.path)
+        return (st.st_mtime_ns, st.st_size)
+
+    @contextlib.contextmanager
+    def _editing(self):
+        with file_lock(self.lock_path):
+            fieldnames, rows = read_csv_rows(self.path)
+            before = list(rows)
+            yield fieldnames, rows
+            if self.validator is not None:
+                self.validator(before, rows)
+            write_csv_rows(self.path, fieldnames, rows)
+
+    @staticmethod
+    def _find(rows, code):
+        return next((i for i, r in enumerate(rows) if r['Course Code'] == code), None)
+
+    def add(self, row):
+        row = _clean(row)
+        with self._editing() as (fieldnames, rows):
+            if self._find(rows, row['Course Code']) is not None:
+                raise DuplicateCourse(row['Course Code'])
+            fieldnames.extend(k for k in row if k not in fieldnames)
+            rows.append(row)
+
+    def update(self, code, changes):
+        unknown = [f for f in changes if f not in FIELDS]
+        if unknown:
+            raise KBStoreError(f"Unknown field(s): {', '.join(unknown)}")
+        with self._editing() as (fieldnames, rows):
+            i = self._find(rows, code)
+            if i is None:
+                raise CourseNotFound(code)
+            row = dict(rows[i])
+            for field, val in changes.items():
+                if field not in fieldnames:
+                    fieldnames.append(field)
+                row[field] = '' if val is None else str(val)
+            rows[i] = row
+
+    def delete(self, code):
+        with self._editing() as (fieldnames, rows):
+            i = self._find(rows, code)
+            if i is None:
+                raise CourseNotFound(code)
+            del rows[i]
+
+    def apply(self, edits):
+        with self._editing() as (fieldnames, rows):
+            rows[:] = apply_edits(rows, edits)
+            fieldnames.extend(k for r in rows for k in r if k not in fieldnames)
+
+    def import_csv(self, path):
+        fieldnames, rows = read_csv_rows(path)
+        rows = [_clean(r) for r in rows]
+        with file_lock(self.lock_path):
+            if self.validator is not None:
+                self.validator(read_csv_rows(self.path)[1], rows)
+            write_csv_rows(self.path, fieldnames, rows)
+
+    def export_csv(self, path):
+        with file_lock(self.lock_path):
+            fieldnames, rows = read_csv_rows(self.path)
+        write_csv_rows(path, fieldnames, rows)
+
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS courses (
+    position    INTEGER NOT NULL,
+    code        TEXT PRIMARY KEY,
+    name        TEXT NOT NULL DEFAULT '',
+    prereqs     TEXT NOT NULL DEFAULT '',
+    coreqs      TEXT NOT NULL DEFAULT '',
+    credits     TEXT NOT NULL DEFAULT '',
+    semester    TEXT NOT NULL DEFAULT '',
+    track       TEXT NOT NULL DEFAULT '',
+    level       TEXT NOT NULL DEFAULT '',
+    description TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS courses_position ON courses(position);
+CREATE TABLE IF NOT EXISTS requirements (course TEXT NOT NULL, requires TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS requirements_course ON requirements(course);
+CREATE INDEX IF NOT EXISTS requirements_requires ON requirements(requires);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+INSERT OR IGNORE INTO meta VALUES ('version', 0);
+'''
+# CSV column -> SQL column
+_SQL = dict(zip(FIELDS, ('code', 'name', 'prereqs', 'coreqs', 'credits',
+                         'semester', 'track', 'level', 'description')))
+
+
+class SqliteKBStore:
+    """
+    Courses in a WAL-mode SQLite database; O(1) transactional edits.
+
+    Reads (list_rows, get, version, which CatalogHolder polls) go through one
+    cached connection per thread; each write opens its own.
+    """
+
+    def __init__(self, path, seed_csv=None, timeout: float = 30.0, validator=None):
+        self.path = path
+        self.timeout = timeout
+        self.validator = None  # the seed import is not an edit
+        self._local = threading.local()
+        with self._connect() as db:
+            db.execute('PRAGMA journal_mode=WAL')  # persistent in the file
+            db.executescript(_SCHEMA)
+            empty = db.execute('SELECT COUNT(*) FROM courses').fetchone()[0] == 0
+            if db.execute("SELECT 1 FROM meta WHERE key = 'requirements'").fetchone() is None:
+                self._index_requirements(db)  # databases from before the table
+        if empty and seed_csv and os.path.exists(seed_csv):
+            self.import_csv(seed_csv)
+        self.validator = validator
+
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+        db.execute('PRAGMA synchronous=NORMAL')
+        return contextlib.closing(db)
+
+    def _reader(self):
+        """This thread's read connection (reopened after a fork)."""
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid():
+            local.db = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            local.pid = os.getpid()
+        return local.db
+
+    @contextlib.contextmanager
+    def _write(self, codes=()):
+        """
+        Serialized write transaction that bumps the version counter. The
+        validator sees the neighbourhood of codes when the write only
+        changes those courses, else every row.
+        """
+        with self._connect() as db:
+            db.execute('BEGIN IMMEDIATE')
+            try:
+                codes = set(codes)
+                if self.validator is None:
+                    pass
+                elif codes:
+                    near = self._neighbourhood(db, codes)
+                    before = self._rows(db, codes)
+                else:
+                    before = self._rows(db)
+                yield db
+                if self.validator is None:
+                    pass
+                elif codes:
+                    context = self._rows(db, (near | self._neighbourhood(db, codes)) - codes)
+                    self.validator(context + before, context + self._rows(db, codes),
+                                   partial=True)
+                else:
+                    self.validator(before, self._rows(db))
+                db.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+                db.execute('COMMIT')
+            except BaseException:
+                db.execute('ROLLBACK')
+                raise
+
+    @staticmethod
+    def _row(values) -> dict:
+        return dict(zip(FIELDS, values))
+
+    def _rows(self, db, codes=None) -> list:
+        """All rows, or those of codes, in catalog order."""
+        cols = ', '.join(_SQL[f] for f in FIELDS)
+        if codes is None:
+            return [self._row(r) for r in
+                    db.execute(f'SELECT {cols} FROM courses ORDER BY position')]
+        codes = list(codes)
+        if not codes:
+            return []
+        marks = ', '.join('?' * len(codes))
+        return [self._row(r) for r in db.execute(
+            f'SELECT {cols} FROM courses WHERE code IN ({marks}) ORDER BY position', codes)]
+
+    @staticmethod
+    def _neighbourhood(db, codes) -> set:
+        """codes, the courses requiring them and everything they require."""
+        near = set(codes)
+        for code in codes:
+            near.update(c for (c,) in db.execute(
+                'SELECT course FROM requirements WHERE requires = ?', (code,)))
+            near.update(c for (c,) in db.execute(
+                'WITH RECURSIVE up(code) AS (SELECT ? UNION SELECT r.requires'
+                ' FROM requirements r JOIN up ON r.course = up.code) SELECT code FROM up',
+                (code,)))
+        return near
+
+    @staticmethod
+    def _set_requirements(db, code):
+        db.execute('DELETE FROM requirements WHERE course = ?', (code,))
+        r = db.execute('SELECT prereqs, coreqs FROM courses WHERE code = ?', (code,)).fetchone()
+        if r is not None:
+            db.executemany('INSERT INTO requirements VALUES (?, ?)',
+                           [(code, req) for req in dict.fromkeys(split_codes(r[0]) + split_codes(r[1]))])
+
+    def _index_requirements(self, db):
+        db.execute('BEGIN IMMEDIATE')
+        db.execute('DELETE FROM requirements')
+        for (code,) in db.execute('SELECT code FROM courses').fetchall():
+            self._set_requirements(db, code)
+        db.execute("INSERT OR REPLACE INTO meta VALUES ('requirements', 1)")
+        db.execute('COMMIT')
+
+    def list_rows(self) -> list:
+        return self._rows(self._reader())
+
+    def get(self, code):
+        cols = ', '.join(_SQL[f] for f in FIELDS)
+        r = self._reader().execute(f'SELECT {cols} FROM courses WHERE code = ?', (code,)).fetchone()
+        return self._row(r) if r else None
+
+    def version(self) -> int:
+        return self._reader().execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+
+    @staticmethod
+    def _insert(db, row):
+        row = _clean(row)
+        db.execute(
+            'INSERT INTO courses (position, code, name, prereqs, coreqs, credits,'
+            ' semester, track, level, description) VALUES ('
+            '(SELECT COALESCE(MAX(position), -1) + 1 FROM courses),'
+            ' ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            tuple(row.get(f, '') for f in FIELDS))
+        SqliteKBStore._set_requirements(db, row['Course Code'])
+
+    def add(self, row):
+        with self._write([_clean(row)['Course Code']]) as db:
+            try:
+                self._insert(db, row)
+            except sqlite3.IntegrityError:
+                raise DuplicateCourse(_clean(row)['Course Code']) from None
+
+    def update(self, code, changes):
+        unknown = [f for f in changes if f not in _SQL]
+        if unknown:
+            raise KBStoreError(f"Unknown field(s): {', '.join(unknown)}")
+        if not changes:
+            return
+        sets = ', '.join(f'{_SQL[f]} = ?' for f in changes)
+        values = ['' if v is None else str(v) for v in changes.values()]
+        new_code = dict(zip(changes, values)).get('Course Code', code)
+        with self._write({code, new_code}) as db:
+            if db.execute(f'UPDATE courses SET {sets} WHERE code = ?',
+                          (*values, code)).rowcount == 0:
+                raise CourseNotFound(code)
+            if new_code != code:
+                db.execute('DELETE FROM requirements WHERE course = ?', (code,))
+            self._set_requirements(db, new_code)
+
+    def delete(self, code):
+        with self._write([code]) as db:
+            if db.execute('DELETE FROM courses WHERE code = ?', (code,)).rowcount == 0:
+                raise CourseNotFound(code)
+            db.execute('DELETE FROM requirements WHERE course = ?', (code,))
+
+    def apply(self, edits):
+        """All edits in one transaction (rows are rewritten in order)."""
+        with self._write() as db:
+            rows = apply_edits(self._rows(db), edits)
+            db.execute('DELETE FROM courses')
+            db.execute('DELETE FROM requirements')
+            for row in rows:
+                self._insert(db, row)
+
+    def import_csv(self, path):
+        """Replace all courses with the rows of a CSV file in one transaction."""
+        _, rows = read_csv_rows(path)
+        with self._write() as db:
+            db.execute('DELETE FROM courses')
+            db.execute('DELETE FROM requirements')
+            for row in rows:
+                self._insert(db, row)
+
+    def export_csv(self, path):
+        rows = self.list_rows()
+        has_description = any(r['Description'] for r in rows)
+        write_csv_rows(path, list(FIELDS if has_description else COLUMNS), rows)
+
+
+def open_store(courses_path, backend=None, validator=None):
+    """Store for courses_path; backend defaults to AIU_ADVISOR_KB_BACKEND or 'csv'."""
+    backend = backend or os.environ.get('AIU_ADVISOR_KB_BACKEND', 'csv')
+    if backend == 'csv':
+        return CsvKBStore(courses_path, validator)
+    if backend == 'sqlite':
+        return SqliteKBStore(os.path.splitext(courses_path)[0] + '.db',
+                             seed_csv=courses_path, validator=validator)
+    raise ValueError(f"Unknown KB backend {backend!r}; expected 'csv' or 'sqlite'")
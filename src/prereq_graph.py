@@ -0,0 +1,135 @@
+"""
+prereq_graph.py
+
+Prerequisite/corequisite graph compiled from a Catalog.
+
+Course sets are Python ints used as bitsets (bit i == catalog index i), so
+"are all requirements passed?" is a single ``req & ~passed == 0`` test and the
+transitive closure of every course is precomputed once in topological order.
+"""
+
+import heapq
+
+
+class CatalogError(ValueError):
+    """The catalog cannot be compiled (dangling codes, requirement cycles)."""
+
+
+def iter_bits(mask):
+    """Yield the indices of set bits in mask, lowest first."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class PrereqGraph:
+    """
+    Compiled requirement graph.
+
+    Attributes (all indexed by catalog index):
+      prereq_mask / coreq_mask / req_mask  direct requirements as bitsets
+      closure                              all transitive requirements
+      reach                                all transitive dependents
+      unlocks                              direct dependents ("passing X unlocks")
+      topo_order                           course indices, requirements first
+    """
+    __slots__ = ('codes', 'index', 'prereq_mask', 'coreq_mask', 'req_mask',
+                 'closure', 'reach', 'unlocks', 'topo_order', 'topo_rank')
+
+    def __init__(self, catalog):
+        self.codes = catalog.codes
+        self.index = {code: i for i, code in enumerate(self.codes)}
+        n = len(self.codes)
+
+        dangling = [
+            f"{c.code} -> {r}"
+            for c in catalog
+            for r in c.prerequisites + c.corequisites
+            if r not in self.index
+        ]
+        if dangling:
+            raise CatalogError(
+                "Unknown course codes in requirements: " + ", ".join(dangling)
+            )
+
+        self.prereq_mask = [self.encode(c.prerequisites) for c in catalog]
+        self.coreq_mask = [self.encode(c.corequisites) for c in catalog]
+        self.req_mask = [p | c for p, c in zip(self.prereq_mask, self.coreq_mask)]
+
+        unlocks = [[] for _ in range(n)]
+        for i, mask in enumerate(self.req_mask):
+            for j in iter_bits(mask):
+                unlocks[j].append(i)
+        self.unlocks = tuple(tuple(u) for u in unlocks)
+
+        # Kahn's algorithm, lowest catalog index first so the order is stable;
+        # anything left over sits on a cycle
+        indegree = [bin(m).count('1') for m in self.req_mask]
+        ready = [i for i in range(n) if indegree[i] == 0]
+        heapq.heapify(ready)
+        order = []
+        while ready:
+            j = heapq.heappop(ready)
+            order.append(j)
+            for i in self.unlocks[j]:
+                indegree[i] -= 1
+                if indegree[i] == 0:
+                    heapq.heappush(ready, i)
+        if len(order) != n:
+            stuck = sorted(self.codes[i] for i in range(n) if indegree[i])
+            raise CatalogError(
+                "Requirement cycle; courses on or behind it: " + ", ".join(stuck)
+            )
+        self.topo_order = tuple(order)
+        rank = [0] * n
+        for r, i in enumerate(order):
+            rank[i] = r
+        self.topo_rank = tuple(rank)
+
+        closure = [0] * n
+        for i in order:
+            mask = self.req_mask[i]
+            acc = mask
+            for j in iter_bits(mask):
+                acc |= closure[j]
+            closure[i] = acc
+        self.closure = tuple(closure)
+
+        reach = [0] * n
+        for j in reversed(order):
+            acc = 0
+            for i in self.unlocks[j]:
+                acc |= 1 << i | reach[i]
+            reach[j] = acc
+        self.reach = tuple(reach)
+
+    def encode(self, codes) -> int:
+        """Bitset of the catalog courses among codes (unknown codes ignored)."""
+        mask = 0
+        index = self.index
+        for code in codes:
+            i = index.get(code)
+            if i is not None:
+                mask |= 1 << i
+        return mask
+
+    def decode(self, mask) -> list:
+        """Course codes in mask, in topological order."""
+        return [self.codes[i]
+                for i in sorted(iter_bits(mask), key=self.topo_rank.__getitem__)]
+
+    def requirements_met(self, i, passed_mask) -> bool:
+        return not (self.req_mask[i] & ~passed_mask)
+
+    def unmet_chain(self, i, passed_mask) -> int:
+        """Bitset of every transitive requirement of course i not yet passed."""
+        return self.closure[i] & ~passed_mask
+
+    def dependents(self, code) -> tuple:
+        """Codes that list code as a direct prerequisite or corequisite."""
+        return tuple(self.codes[i] for i in self.unlocks[self.index[code]])
+
+    def descendants(self, i) -> int:
+        """Bitset of every course that transitively requires course i."""
+        return self.reach[i]
@@ -0,0 +1,97 @@
+"""
+recommendation_cache.py
+
+LRU/TTL memoization for recommend_courses.
+
+Results only depend on the passed and failed sets, semester, track and the
+CGPA credit band, so the cache key uses exactly those (a 3.10 and a 3.85 CGPA
+share an entry). Entries are dropped wholesale whenever a new catalog or
+policy version is loaded (see KnowledgeBase.CatalogHolder).
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from KnowledgeBase import catalog_version, credit_band
+
+
+def profile_key(cgpa, passed, failed, semester, track) -> tuple:
+    """
+    Canonical cache key for a student profile. The catalog version is part
+    of the key so a result computed just before a reload is never served
+    after it.
+    """
+    return (frozenset(passed), frozenset(failed), semester, track,
+            credit_band(cgpa), catalog_version())
+
+
+class RecommendationCache:
+    """
+    Thread-safe LRU cache with optional TTL and hit/miss/eviction counters.
+
+    maxsize=0 disables caching. Entries belong to one catalog version
+    (KnowledgeBase.catalog_version, itself polled cheaply) and are dropped
+    when it changes.
+    """
+
+    def __init__(self, maxsize: int = 4096, ttl: float = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = None
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def _check_data(self):
+        version = catalog_version()
+        if version != self._version:
+            if self._version is not None:
+                self._entries.clear()
+                self.invalidations += 1
+            self._version = version
+
+    def get(self, key):
+        """Return the cached value or None."""
+        now = time.monotonic()
+        with self._lock:
+            self._check_data()
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, stored_at = entry
+                if self.ttl is None or now - stored_at <= self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self.evictions += 1
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size':          len(self._entries),
+                'maxsize':       self.maxsize,
+                'hits':          self.hits,
+                'misses':        self.misses,
+                'evictions':     self.evictions,
+                'invalidations': self.invalidations,
+                'hit_rate':      self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+"""
+roster_import.py
+
+Streaming import and validation of registrar exports.
+
+Two layouts are read from CSV or JSONL, optionally gzip-compressed:
+  - roster:     one row per student with passed/failed code lists (the
+                bulk_advise format)
+  - transcript: one row per course attempt (student_id, course_code,
+                grade or status, optional term/credits/cgpa/track), with
+                each student's rows contiguous, as registrar exports are
+The layout is detected from the header (the first record's keys) unless
+given; JSONL records may each carry a different set of optional keys.
+
+Every student is normalized against the catalog index and checked:
+  - course codes are matched case/space/dash-insensitively; codes not in
+    the catalog are dropped and reported
+  - a course both passed and failed is reported and kept as passed
+    (in transcripts the latest attempt decides)
+  - a student id seen again (a duplicate row, or transcript rows that are
+    not contiguous) is an error; only the first occurrence is yielded
+  - semester defaults to the term after the student's latest one, track to
+    the track of their track-specific passed courses, CGPA to the credit
+    weighted grade average
+Valid students are yielded one at a time as recommend_courses keyword
+arguments plus student_id, so memory stays bounded by one student (and
+the set of student ids seen, to catch split or duplicated students).
+
+    python roster_import.py export.csv.gz -o students.jsonl --issues issues.jsonl
+    python bulk_advise.py students.jsonl -o advice.csv
+"""
+
+import argparse
+import collections
+import csv
+import gzip
+import itertools
+import json
+import re
+import sys
+import time
+
+from KnowledgeBase import get_catalog, split_codes
+
+SEMESTERS = ('Fall', 'Spring')
+GRADE_POINTS = {
+    'A+': 4.0, 'A': 4.0, 'A-': 3.7, 'B+': 3.3, 'B': 3.0, 'B-': 2.7,
+    'C+': 2.3, 'C': 2.0, 'C-': 1.7, 'D+': 1.3, 'D': 1.0, 'F': 0.0,
+}
+# Pass/fail grades (outside the CGPA): pass, satisfactory, credit, transfer
+PASS_GRADES = {'P', 'S', 'CR', 'TR'}
+FAIL_GRADES = {'NP', 'U', 'NC'}
+PASS_STATUS = {'passed', 'pass', 'p', 'completed'}
+FAIL_STATUS = {'failed', 'fail', 'f'}
+SKIP_STATUS = {'w', 'withdrawn', 'i', 'incomplete', 'ip', 'in progress', ''}
+
+# Accepted header spellings -> canonical field
+ALIASES = {
+    'student_id': ('student_id', 'id', 'student', 'student_number'),
+    'cgpa':       ('cgpa', 'gpa'),
+    'passed':     ('passed', 'passed_courses'),
+    'failed':     ('failed', 'failed_courses'),
+    'semester':   ('semester', 'next_semester'),
+    'track':      ('track', 'major', 'program'),
+    'course':     ('course_code', 'course', 'code'),
+    'grade':      ('grade', 'letter_grade'),
+    'status':     ('status', 'result'),
+    'term':       ('term', 'term_taken', 'semester_taken'),
+}
+_TERM = re.compile(r'(fall|spring|summer)\D*(\d{4})|(\d{4})\D*(fall|spring|summer)', re.I)
+_SEASON_ORDER = {'spring': 0, 'summer': 1, 'fall': 2}
+
+
+def normalize_code(code) -> str:
+    """'cse 014', 'CSE-014' -> 'CSE014'."""
+    return re.sub(r'[\s\-_./]', '', str(code)).upper()
+
+
+def split_list(value) -> list:
+    """Codes of a list or a ',', ';' or '|' separated cell."""
+    if isinstance(value, (list, tuple)):
+        return [str(c) for c in value]
+    return list(split_codes(re.sub(r'[;|]', ',', '' if value is None else str(value))))
+
+
+def open_text(path):
+    """Text handle for path; gzip is detected from the magic bytes."""
+    with open(path, 'rb') as f:
+        compressed = f.read(2) == b'\x1f\x8b'
+    opener = gzip.open if compressed else open
+    return opener(path, 'rt', encoding='utf-8-sig', newline='')
+
+
+class MalformedRecord(ValueError):
+    """A JSONL line that is not valid JSON."""
+
+
+def read_records(path, keep_malformed=False):
+    """
+    Yield raw rows (dicts) of a CSV or JSONL file, gzip or not. A line that
+    is not valid JSON raises MalformedRecord, or with keep_malformed is
+    yielded as one in its place so the caller can report it and go on.
+    """
+    name = path[:-3] if path.endswith('.gz') else path
+    with open_text(path) as f:
+        if name.endswith(('.jsonl', '.ndjson', '.json')):
+            for n, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError as exc:
+                    error = MalformedRecord(f"line {n}: invalid JSON ({exc})")
+                    if not keep_malformed:
+                        raise error from None
+                    yield error
+        else:
+            yield from csv.DictReader(f)
+
+
+def _field_map(keys) -> dict:
+    """Canonical field -> the header it appears under."""
+    lowered = {re.sub(r'\s+', '_', k.strip().lower()): k for k in keys if k}
+    found = {}
+    for field, names in ALIASES.items():
+        for name in names:
+            if name in lowered:
+                found[field] = lowered[name]
+                break
+    return found
+
+
+def _term_key(term):
+    """('Fall', 2024) -> sortable (2024, 2), or None."""
+    m = _TERM.search(str(term or ''))
+    if not m:
+        return None
+    season = (m.group(1) or m.group(4)).lower()
+    year = int(m.group(2) or m.group(3))
+    return (year, _SEASON_ORDER[season])
+
+
+class RosterImporter:
+    """
+    Validating reader for one export. Iterate students() for valid records;
+    issues go to on_issue (default: counted, and the first max_issues kept
+    in .issues). .stats has row/student/issue counts.
+    """
+
+    def __init__(self, catalog=None, layout=None, default_semester=None,
+                 default_track=None, on_issue=None, max_issues=1000):
+        self.catalog = catalog or get_catalog()
+        self.layout = layout
+        self.default_semester = default_semester
+        self.default_track = default_track
+        self.on_issue = on_issue
+        self.max_issues = max_issues
+        self.issues = []
+        self.stats = collections.Counter()
+        self.unknown_codes = collections.Counter()
+
+        self.codes = {normalize_code(c): c for c in self.catalog.codes}
+        self.tracks = {c.track for c in self.catalog} - {'All'}
+        self._track_of = {c.code: c.track for c in self.catalog if c.track != 'All'}
+        self._seen = set()
+
+    # -- issues --------------------------------------------------------
+
+    def _issue(self, row, student_id, kind, detail, severity='warning'):
+        issue = {'row': row, 'student_id': student_id, 'kind': kind,
+                 'detail': detail, 'severity': severity}
+        self.stats[f'{severity}s'] += 1
+        self.stats[kind] += 1
+        if self.on_issue is not None:
+            self.on_issue(issue)
+        elif len(self.issues) < self.max_issues:
+            self.issues.append(issue)
+
+    # -- normalization -------------------------------------------------
+
+    def _codes(self, raw, row, sid) -> list:
+        out = []
+        for code in raw:
+            canonical = self.codes.get(normalize_code(code))
+            if canonical is None:
+                self.unknown_codes[code.strip()] += 1
+                self._issue(row, sid, 'unknown_code', code.strip())
+            elif canonical not in out:
+                out.append(canonical)
+        return out
+
+    def _derive_track(self, passed):
+        votes = collections.Counter(self._track_of[c] for c in passed if c in self._track_of)
+        if votes:
+            return votes.most_common(1)[0][0]
+        return self.default_track or 'All'
+
+    def _finish(self, row, sid, cgpa, passed, failed, semester, track, last_term):
+        """Validate one assembled student; returns the record or None."""
+        for code in set(passed) & set(failed):
+            self._issue(row, sid, 'passed_failed_conflict', code)
+        failed = [c for c in failed if c not in passed]
+
+        if sid:
+            if sid in self._seen:
+                self._issue(row, sid, 'duplicate_student', 'student appears more than once '
+                            '(rows not contiguous?); only the first is kept', 'error')
+                return None
+            self._seen.add(sid)
+
+        if cgpa is None or not 0.0 <= cgpa <= 4.0:
+            self._issue(row, sid, 'invalid_cgpa', cgpa, 'error')
+            return None
+
+        if semester not in (None, ''):
+            semester = str(semester).strip().capitalize()
+        elif last_term is not None:
+            semester = 'Spring' if last_term[1] == _SEASON_ORDER['fall'] else 'Fall'
+        else:
+            semester = self.default_semester
+        if semester not in SEMESTERS:
+            self._issue(row, sid, 'invalid_semester', semester, 'error')
+            return None
+
+        track = ('' if track is None else str(track)).strip() or self._derive_track(passed)
+        if track != 'All' and track not in self.tracks:
+            self._issue(row, sid, 'unknown_track', track)
+
+        self.stats['students'] += 1
+        return {'student_id': sid, 'cgpa': round(cgpa, 2), 'passed': passed,
+                'failed': failed, 'semester': semester, 'track': track}
+
+    # -- layouts -------------------------------------------------------
+
+    def _roster(self, rows):
+        get = dict.get
+        for n, r in rows:
+            sid = str(get(r, 'student_id') or '').strip()
+            try:
+                cgpa = float(get(r, 'cgpa'))
+            except (TypeError, ValueError):
+                cgpa = None
+            record = self._finish(
+                n, sid, cgpa,
+                self._codes(split_list(get(r, 'passed')), n, sid),
+                self._codes(split_list(get(r, 'failed')), n, sid),
+                get(r, 'semester'), get(r, 'track'), None)
+            if record is not None:
+                yield record
+
+    def _transcript(self, rows):
+        get = dict.get
+        credits = {c.code: c.credits for c in self.catalog}
+        key = lambda item: str(get(item[1], 'student_id') or '').strip()
+        for sid, group in itertools.groupby(rows, key=key):
+            outcome = {}   # code -> (term key, passed?)
+            cgpa = semester = track = last_term = None
+            points = hours = 0.0
+            first = None
+            for n, r in group:
+                first = first or n
+                cgpa = get(r, 'cgpa') or cgpa
+                semester = get(r, 'semester') or semester
+                track = get(r, 'track') or track
+                term = _term_key(get(r, 'term'))
+                if term is not None and (last_term is None or term > last_term):
+                    last_term = term
+
+                grade = str(get(r, 'grade') or '').strip().upper()
+                status = str(get(r, 'status') or '').strip().lower()
+                if grade in GRADE_POINTS:
+                    ok = grade != 'F'
+                elif grade in PASS_GRADES | FAIL_GRADES:
+                    ok = grade in PASS_GRADES
+                elif status in PASS_STATUS | FAIL_STATUS:
+                    ok = status in PASS_STATUS
+                elif grade.lower() in SKIP_STATUS and status in SKIP_STATUS:
+                    continue
+                else:
+                    self._issue(n, sid, 'invalid_grade', grade or status)
+                    continue
+                codes = self._codes([str(get(r, 'course') or '')], n, sid)
+                if not codes:
+                    continue
+                code = codes[0]
+                if grade in GRADE_POINTS:
+                    points += GRADE_POINTS[grade] * credits[code]
+                    hours += credits[code]
+                # latest attempt wins; rows without a term count in file order
+                when = term if term is not None else (0, 0)
+                prev = outcome.get(code)
+                if prev is None or when >= prev[0]:
+                    outcome[code] = (when, ok)
+
+            try:
+                cgpa = float(cgpa) if cgpa not in (None, '') else (
+                    points / hours if hours else None)
+            except (TypeError, ValueError):
+                cgpa = None
+            passed = [c for c, (_, ok) in outcome.items() if ok]
+            failed = [c for c, (_, ok) in outcome.items() if not ok]
+            record = self._finish(first, sid, cgpa, passed, failed,
+                                  semester, track, last_term)
+            if record is not None:
+                yield record
+
+    def students(self, records):
+        """Validate an iterable of raw rows; yields valid student records."""
+        field_maps = {}  # one per distinct key set
+
+        def numbered():
+            """(row number, the row keyed by canonical field); bad rows reported"""
+            for n, r in enumerate(records, start=1):
+                self.stats['rows'] += 1
+                if not isinstance(r, dict):
+                    detail = str(r) if isinstance(r, Exception) else (
+                        f"record must be an object, not {type(r).__name__}")
+                    self._issue(n, '', 'invalid_record', detail, 'error')
+                    continue
+                keys = tuple(r.keys())
+                found = field_maps.get(keys)
+                if found is None:
+                    found = field_maps[keys] = _field_map(keys)
+                yield n, {field: r[key] for field, key in found.items()}
+
+        rows = numbered()
+        first = next(rows, None)
+        if first is None:
+            return
+        fields = first[1]
+        layout = self.layout or ('transcript' if 'course' in fields else 'roster')
+        rows = itertools.chain([first], rows)
+        if layout == 'transcript':
+            if 'course' not in fields or 'student_id' not in fields:
+                raise ValueError("transcript layout needs student_id and course_code columns")
+            yield from self._transcript(rows)
+        else:
+            yield from self._roster(rows)
+
+    def import_file(self, path):
+        """students() over a CSV/JSONL(.gz) file; malformed lines are issues."""
+        return self.students(read_records(path, keep_malformed=True))
+
+
+def import_roster(path, **options):
+    """
+    Yield (student_id, recommend_courses kwargs) for the valid students of
+    an export; options go to RosterImporter.
+
+        for sid, student in import_roster('export.csv.gz', default_semester='Fall'):
+            recs, notes = recommend_courses(**student)
+    """
+    for record in RosterImporter(**options).import_file(path):
+        yield record.pop('student_id'), record
+
+
+def main():
+    p = argparse.ArgumentParser(description="Validate a registrar export into a student roster")
+    p.add_argument('export', help='CSV or JSONL export, optionally .gz')
+    p.add_argument('-o', '--output', required=True, help='Validated roster (.jsonl)')
+    p.add_argument('--layout', choices=['roster', 'transcript'],
+                   help='Row layout (default: detect from the header)')
+    p.add_argument('--semester', choices=SEMESTERS,
+                   help='Semester to advise for when it cannot be derived')
+    p.add_argument('--track', help='Track for students with no track-specific courses')
+    p.add_argument('--issues', help='Write every issue to this .jsonl file')
+    args = p.parse_args()
+
+    issues_file = open(args.issues, 'w', encoding='utf-8') if args.issues else None
+    on_issue = (lambda i: issues_file.write(json.dumps(i) + '\n')) if issues_file else None
+    importer = RosterImporter(layout=args.layout, default_semester=args.semester,
+                              default_track=args.track, on_issue=on_issue, max_issues=20)
+    start = time.perf_counter()
+    try:
+        with open(args.output, 'w', encoding='utf-8') as out:
+            for student in importer.import_file(args.export):
+                out.write(json.dumps(student) + '\n')
+    finally:
+        if issues_file:
+            issues_file.close()
+
+    s = importer.stats
+    print(f"{s['rows']} rows -> {s['students']} students in "
+          f"{time.perf_counter() - start:.1f}s; {s['errors']} errors, {s['warnings']} warnings")
+    for kind in ('invalid_record', 'unknown_code', 'passed_failed_conflict', 'duplicate_student',
+                 'invalid_grade', 'unknown_track', 'invalid_cgpa', 'invalid_semester'):
+        if s[kind]:
+            print(f"  {kind}: {s[kind]}")
+    if importer.unknown_codes:
+        top = ', '.join(f"{c} ({n})" for c, n in importer.unknown_codes.most_common(10))
+        print(f"  most frequent unknown codes: {top}")
+    for issue in importer.issues:
+        print(f"  row {issue['row']} [{issue['student_id']}] {issue['kind']}: {issue['detail']}",
+              file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+student_profile.py
+
+Per-request summary of a student's record, computed once and shared by the
+eligibility rules, the credit-cap selectors and the explanations.
+
+Building it is one pass over the passed courses; after that every rule
+check is O(1) (bitset or frozenset lookups, a precomputed current level),
+so evaluating a student is linear in catalog size however long their
+transcript is.
+"""
+
+from KnowledgeBase import max_credits_for_cgpa
+from prereq_graph import iter_bits
+
+
+class StudentProfile:
+    """
+    Immutable view of one student against one catalog.
+
+      passed / failed            frozensets of the codes as given (unknown
+                                 codes included, as the rules compare codes)
+      passed_mask / failed_mask  the same as catalog bitsets
+      level                      highest level among passed catalog courses
+      credits_by_level           {level: completed credit hours}
+      completed_credits          total completed credit hours
+      cap                        CGPA credit limit (ValueError if out of range)
+    """
+    __slots__ = ('cgpa', 'semester', 'track', 'passed', 'failed',
+                 'passed_mask', 'failed_mask', 'level', 'credits_by_level',
+                 'completed_credits', 'cap')
+
+    def __init__(self, catalog, cgpa, passed, failed, semester, track):
+        setter = object.__setattr__
+        setter(self, 'cap', max_credits_for_cgpa(cgpa))
+        setter(self, 'cgpa', cgpa)
+        setter(self, 'semester', semester)
+        setter(self, 'track', track)
+        passed = frozenset(passed)
+        setter(self, 'passed', passed)
+        setter(self, 'failed', frozenset(failed))
+        graph = catalog.graph
+        passed_mask = graph.encode(passed)
+        setter(self, 'passed_mask', passed_mask)
+        setter(self, 'failed_mask', graph.encode(self.failed))
+
+        courses = catalog.courses
+        credits_by_level = {}
+        for i in iter_bits(passed_mask):
+            c = courses[i]
+            credits_by_level[c.level] = credits_by_level.get(c.level, 0) + c.credits
+        setter(self, 'credits_by_level', credits_by_level)
+        setter(self, 'completed_credits', sum(credits_by_level.values()))
+        setter(self, 'level', max(credits_by_level, default=0))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("StudentProfile is immutable")
+
+    def has_passed(self, code) -> bool:
+        return code in self.passed
+
+    def is_retake(self, code) -> bool:
+        return code in self.failed
+
+    def __repr__(self):
+        return (f"StudentProfile(cgpa={self.cgpa}, semester={self.semester!r}, "
+                f"track={self.track!r}, level={self.level}, "
+                f"passed={len(self.passed)}, failed={len(self.failed)})")
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+what_if.py
+
+What-if analysis: "if the student passes X and Y but fails Z this term,
+what opens up next semester?" for every such outcome at once.
+
+The outcomes range over a set of courses (by default this term's
+recommendations), some of which may be fixed as passed or failed (a fixed
+course is added to the set if it is not already in it). Every
+combination of the rest is enumerated, weighted by a per-course pass
+probability, or, when there are more than max_scenarios, a seeded sample
+is drawn instead. Next-semester eligibility under the rules of
+CourseAdvisorEngine._evaluate is then computed for all scenarios in one
+NumPy evaluation sharing the base state:
+  - only courses that could become eligible are considered: offered next
+    semester, open to the track, not yet passed, and with every unmet
+    requirement among the outcome courses
+  - a scenario satisfies a course's requirements when it fails none of
+    the outcome courses it needs (one scenarios x outcomes x candidates
+    matrix product)
+  - the level gate uses the highest level passed in each scenario
+CGPA (and so the credit cap) is kept as it is; scenario() gives one
+outcome's full hypothetical student for recommend_courses.
+"""
+
+import numpy as np
+
+from KnowledgeBase import get_catalog, pinned_state
+from inference_engine import recommend_courses
+from student_profile import StudentProfile
+
+NEXT_TERM = {'Fall': 'Spring', 'Spring': 'Fall'}
+
+
+class WhatIf:
+    """
+    Outcome scenarios for one student and their next-semester eligibility.
+
+      courses     outcome course codes (columns of outcomes)
+      outcomes    bool matrix scenarios x courses, True = passed
+      weights     probability of each scenario (sums to 1)
+      candidates  codes that are eligible in at least one scenario
+      eligible    bool matrix scenarios x candidates
+      sampled     True when scenarios are a sample rather than all of them
+    """
+
+    def __init__(self, profile, courses, catalog=None, fixed=None,
+                 pass_rate=0.5, max_scenarios: int = 4096,
+                 samples: int = 2048, seed: int = 0):
+        self.catalog = catalog or get_catalog()
+        self.profile = profile
+        self.semester = NEXT_TERM[profile.semester]
+        graph = self.catalog.graph
+        fixed = dict(fixed or {})
+
+        # fixed outcomes are part of the scenario even if not in courses
+        courses = list(dict.fromkeys([*courses, *fixed]))
+        unknown = [c for c in courses if c not in graph.index]
+        if unknown:
+            raise ValueError(f"Unknown course code(s): {', '.join(unknown)}")
+        done = [c for c in fixed if profile.has_passed(c)]
+        if done:
+            raise ValueError(f"Cannot fix the outcome of already passed course(s): {', '.join(done)}")
+        courses = [c for c in courses if not profile.has_passed(c)]
+        self.courses = courses
+        self.fixed = {c: bool(fixed[c]) for c in courses if c in fixed}
+        rates = np.array([pass_rate.get(c, 0.5) if isinstance(pass_rate, dict)
+                          else pass_rate for c in courses], dtype=float)
+        self.outcomes, self.weights, self.sampled = self._scenarios(
+            rates, max_scenarios, samples, seed)
+        self._evaluate()
+
+    # -- scenarios -----------------------------------------------------
+
+    def _scenarios(self, rates, max_scenarios, samples, seed) -> tuple:
+        k = len(self.courses)
+        free = [j for j, c in enumerate(self.courses) if c not in self.fixed]
+        if 2 ** len(free) <= max_scenarios:
+            n = 2 ** len(free)
+            bits = (np.arange(n)[:, None] >> np.arange(len(free))) & 1
+            outcomes = np.zeros((n, k), dtype=bool)
+            outcomes[:, free] = bits.astype(bool)
+            p = np.where(outcomes[:, free], rates[free], 1.0 - rates[free])
+            weights = p.prod(axis=1)
+            sampled = False
+        else:
+            rng = np.random.default_rng(seed)
+            draws = np.zeros((samples, k), dtype=bool)
+            draws[:, free] = rng.random((samples, len(free))) < rates[free]
+            outcomes, counts = np.unique(draws, axis=0, return_counts=True)
+            weights = counts.astype(float)
+            sampled = True
+        for j, c in enumerate(self.courses):
+            if c in self.fixed:
+                outcomes[:, j] = self.fixed[c]
+        total = weights.sum()
+        return outcomes, weights / total if total else weights, sampled
+
+    # -- evaluation ----------------------------------------------------
+
+    def _evaluate(self):
+        profile, graph = self.profile, self.catalog.graph
+        courses = self.catalog.courses
+        outcome_index = [graph.index[c] for c in self.courses]
+        outcome_mask = graph.encode(self.courses)
+        outcome_levels = np.array([courses[i].level for i in outcome_index], dtype=np.int16)
+        top_level = max(profile.level, *outcome_levels.tolist(), 0)
+        passed_mask = profile.passed_mask
+
+        cand = []
+        for c in courses:
+            if passed_mask >> c.index & 1:
+                continue
+            if c.semester not in (self.semester, 'Both') or c.track not in (profile.track, 'All'):
+                continue
+            if graph.req_mask[c.index] & ~passed_mask & ~outcome_mask or c.level > top_level + 1:
+                continue
+            cand.append(c)
+
+        # needs[j, c]: candidate c needs outcome course j passed
+        needs = np.array([[graph.req_mask[c.index] >> i & 1 for c in cand]
+                          for i in outcome_index], dtype=np.int32).reshape(len(outcome_index), len(cand))
+        failed = (~self.outcomes).astype(np.int32)
+        eligible = (failed @ needs) == 0
+
+        level = np.full(len(self.outcomes), profile.level, dtype=np.int16)
+        if len(outcome_index):
+            level = np.maximum(level, np.where(self.outcomes, outcome_levels, 0).max(axis=1))
+        cand_levels = np.array([c.level for c in cand], dtype=np.int16)
+        eligible &= cand_levels[None, :] <= level[:, None] + 1
+
+        # an outcome course passed in a scenario is not offered again
+        column = {c.index: col for col, c in enumerate(cand)}
+        for j, i in enumerate(outcome_index):
+            if i in column:
+                eligible[:, column[i]] &= ~self.outcomes[:, j]
+
+        keep = eligible.any(axis=0)
+        self.candidates = [c.code for c, k in zip(cand, keep) if k]
+        self.eligible = eligible[:, keep]
+
+    # -- results -------------------------------------------------------
+
+    def scenario(self, n) -> dict:
+        """Scenario n as recommend_courses keyword arguments for next semester."""
+        row = self.outcomes[n]
+        newly = [c for c, ok in zip(self.courses, row) if ok]
+        failed = [c for c, ok in zip(self.courses, row) if not ok]
+        return {
+            'cgpa':     self.profile.cgpa,
+            'passed':   sorted(self.profile.passed | set(newly)),
+            'failed':   sorted((self.profile.failed | set(failed)) - set(newly)),
+            'semester': self.semester,
+            'track':    self.profile.track,
+        }
+
+    def eligible_in(self, n) -> list:
+        return [c for c, ok in zip(self.candidates, self.eligible[n]) if ok]
+
+    def find(self, passed=(), failed=()) -> list:
+        """Indices of the scenarios consistent with the given outcomes."""
+        mask = np.ones(len(self.outcomes), dtype=bool)
+        for j, c in enumerate(self.courses):
+            if c in passed:
+                mask &= self.outcomes[:, j]
+            elif c in failed:
+                mask &= ~self.outcomes[:, j]
+        return np.flatnonzero(mask).tolist()
+
+    def summary(self) -> dict:
+        """
+        Per candidate: probability of becoming eligible, and the outcome
+        courses it needs passed / failed (in every scenario where it is
+        eligible). Per outcome course: what passing it opens up.
+        """
+        eligible_by = {}
+        unlocks = {c: [] for c in self.courses}
+        for col, code in enumerate(self.candidates):
+            rows = self.eligible[:, col]
+            sub = self.outcomes[rows]
+            need_pass = [c for c, v in zip(self.courses, sub.all(axis=0)) if v and c not in self.fixed]
+            need_fail = [c for c, v in zip(self.courses, (~sub).all(axis=0)) if v and c not in self.fixed]
+            eligible_by[code] = {
+                'probability':      round(float(self.weights[rows].sum()), 4),
+                'requires_passing': need_pass,
+                'requires_failing': need_fail,
+            }
+            for c in need_pass:
+                unlocks[c].append(code)
+        distinct = len({row.tobytes() for row in self.eligible})
+        return {
+            'semester':  self.semester,
+            'courses':   self.courses,
+            'fixed':     self.fixed,
+            'scenarios': len(self.outcomes),
+            'sampled':   self.sampled,
+            'distinct_outcomes': distinct,
+            'eligible':  eligible_by,
+            'unlocks':   unlocks,
+        }
+
+
+def what_if(cgpa: float, passed, failed, semester: str, track: str,
+            courses=None, fixed=None, pass_rate=0.5,
+            max_scenarios: int = 4096, samples: int = 2048, seed: int = 0) -> WhatIf:
+    """
+    What-if analysis over courses (default: this term's recommendations).
+    fixed maps codes to a known outcome (True = passed); pass_rate is a
+    probability for every course or a {code: probability} dict.
+    """
+    with pinned_state():
+        catalog = get_catalog()
+        if courses is None:
+            recs, _ = recommend_courses(cgpa, passed, failed, semester, track)
+            courses = [r['course_code'] for r in recs]
+        profile = StudentProfile(catalog, cgpa, passed, failed, semester, track)
+        return WhatIf(profile, courses, catalog, fixed, pass_rate,
+                      max_scenarios, samples, seed)
+
+
+if __name__ == "__main__":
+    result = what_if(cgpa=3.2, passed=['CSE014', 'MAT111', 'UC1'], failed=[],
+                     semester='Fall', track='Artificial Intelligence Science')
+    s = result.summary()
+    print(f"{s['scenarios']} outcomes of {', '.join(s['courses'])} "
+          f"-> {s['distinct_outcomes']} distinct {s['semester']} course sets")
+    for code, info in s['eligible'].items():
+        cond = [f"pass {', '.join(info['requires_passing'])}"] if info['requires_passing'] else []
+        cond += [f"fail {', '.join(info['requires_failing'])}"] if info['requires_failing'] else []
+        print(f"- {code}: {info['probability']:.0%}" + (f" (if you {' and '.join(cond)})" if cond else ''))
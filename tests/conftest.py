@@ -0,0 +1,43 @@
+"""
+Shared fixtures: the advisor modules live in src/ and load their data from
+AIU_ADVISOR_DATA_DIR, so every test gets its own copy of data/ and a fresh
+catalog holder polling it on every call.
+"""
+
+import os
+import shutil
+import sys
+
+import pytest
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+sys.path.insert(0, SRC)
+
+import KnowledgeBase  # noqa: E402
+import inference_engine  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def data_dir(tmp_path, monkeypatch):
+    """A private copy of courses.csv/policies.json, used by the KB for this test."""
+    path = tmp_path / 'data'
+    path.mkdir()
+    for name in ('courses.csv', 'policies.json'):
+        shutil.copy(os.path.join(DATA, name), path / name)
+    monkeypatch.delenv('AIU_ADVISOR_KB_BACKEND', raising=False)
+    monkeypatch.setattr(KnowledgeBase, 'DATA_DIR', str(path))
+    monkeypatch.setattr(KnowledgeBase, 'COURSES_PATH', str(path / 'courses.csv'))
+    monkeypatch.setattr(KnowledgeBase, 'POLICIES_PATH', str(path / 'policies.json'))
+    monkeypatch.setattr(KnowledgeBase, 'CAPACITIES_PATH', str(path / 'capacities.csv'))
+    monkeypatch.setattr(KnowledgeBase, '_store', None)
+    monkeypatch.setattr(KnowledgeBase, '_holder', KnowledgeBase.CatalogHolder(poll_interval=0))
+    inference_engine.recommendation_cache.clear()
+    return path
+
+
+@pytest.fixture
+def sqlite_backend(monkeypatch):
+    """Switch the KB to the SQLite store (seeded from the test's courses.csv)."""
+    monkeypatch.setenv('AIU_ADVISOR_KB_BACKEND', 'sqlite')
+    monkeypatch.setattr(KnowledgeBase, '_store', None)
@@ -0,0 +1,64 @@
+"""AdvisorService request handling (thread pool, no sockets)."""
+
+import asyncio
+import threading
+
+import pytest
+
+import KnowledgeBase
+from advisor_service import AdvisorService, HTTPError
+
+
+@pytest.fixture
+def service():
+    service = AdvisorService(workers=2, pool='thread')
+    yield service
+    service.close()
+
+
+@pytest.fixture
+def catalog_off_loop(monkeypatch):
+    """Fail if the catalog is read on the event loop (the main thread)."""
+    current_state = KnowledgeBase.current_state
+
+    def guarded():
+        assert threading.current_thread() is not threading.main_thread(), \
+            'catalog read on the event loop'
+        return current_state()
+    monkeypatch.setattr(KnowledgeBase, 'current_state', guarded)
+
+
+def _route(service, method, path, body=None):
+    return asyncio.run(service.route(method, path, body))
+
+
+def test_catalog_is_only_read_in_the_pool(service, catalog_off_loop):
+    body = b'{"cgpa": 3.2, "passed": ["CSE014"], "semester": "Fall", "track": "All"}'
+    assert _route(service, 'POST', '/recommend', body)['recommendations']
+    assert _route(service, 'GET', '/health')['courses'] == 48
+    assert _route(service, 'GET', '/courses/CSE014')['Course Code'] == 'CSE014'
+    with pytest.raises(HTTPError) as exc:
+        _route(service, 'GET', '/courses/NOPE')
+    assert exc.value.status == 404
+
+
+@pytest.mark.parametrize('selector', ['["greedy"]', '{"a": 1}', '"nope"', '3'])
+def test_bad_selector_is_422(service, selector):
+    for path, body in (('/recommend', '{"cgpa": 3.2, "passed": [], "semester": "Fall", '
+                                      '"track": "All", "selector": %s}' % selector),
+                       ('/recommend/batch', '{"students": [], "selector": %s}' % selector)):
+        with pytest.raises(HTTPError) as exc:
+            _route(service, 'POST', path, body.encode())
+        assert exc.value.status == 422
+
+
+@pytest.mark.parametrize('length', [b'abc', b'-5'])
+def test_malformed_content_length_is_400(service, length):
+    async def read():
+        reader = asyncio.StreamReader()
+        reader.feed_data(b'POST /recommend HTTP/1.1\r\nContent-Length: ' + length + b'\r\n\r\n')
+        reader.feed_eof()
+        return await service._read_request(reader)
+    with pytest.raises(HTTPError) as exc:
+        asyncio.run(read())
+    assert exc.value.status == 400
@@ -0,0 +1,50 @@
+"""AdvisorSession on its own catalog and across incremental edits."""
+
+from KnowledgeBase import Catalog
+from advisor_session import AdvisorSession
+
+
+def _row(code, prereqs='', credits=3, semester='Fall', level=1):
+    return {'Course Code': code, 'Course Name': code, 'Prerequisites': prereqs,
+            'Co-requisites': '', 'Credit Hours': credits, 'Semester Offered': semester,
+            'Track': 'All', 'Level': level}
+
+
+def test_session_uses_its_own_catalog():
+    catalog = Catalog.from_records([_row('X1'), _row('X2', prereqs='X1')])
+    session = AdvisorSession(3.5, catalog=catalog)
+    recs, notes = session.recommend()
+    assert [r['course_code'] for r in recs] == ['X1']
+    assert list(notes) == ['X2 is unavailable: unmet prerequisite X1.']
+
+
+def test_credit_cap_is_applied_against_the_session_catalog():
+    catalog = Catalog.from_records([_row('X1', credits=8), _row('X2', credits=7)])
+    session = AdvisorSession(1.5, catalog=catalog)  # 12-credit limit
+    recs, notes = session.recommend()
+    assert [r['course_code'] for r in recs] == ['X1']
+    assert notes.reasons('X2') == ['credit_cap']
+
+
+def test_edits_only_recheck_affected_courses(monkeypatch):
+    import advisor_session
+    from inference_engine import recommend_courses
+
+    student = {'cgpa': 3.2, 'passed': ['CSE014', 'MAT111', 'UC1'], 'failed': [],
+               'semester': 'Fall', 'track': 'All'}
+    session = AdvisorSession(**student)
+    session.recommend()
+    calls = []
+    rejection_mask = advisor_session.rejection_mask
+    monkeypatch.setattr(advisor_session, 'rejection_mask',
+                        lambda *args: calls.append(args[0].code) or rejection_mask(*args))
+
+    assert session.recommend() == recommend_courses(**student, use_cache=False)
+    assert calls == []  # recommend() re-checks nothing
+
+    session.add_passed('CSE015')
+    assert calls and len(calls) <= session.recomputed < len(session.catalog)
+    student['passed'] = student['passed'] + ['CSE015']
+    assert session.recommend() == recommend_courses(**student, use_cache=False)
+    session.add_failed('PHY211')
+    assert session.profile().failed == {'PHY211'}
@@ -0,0 +1,34 @@
+"""bulk_advise: one output row per roster record, even for bad records."""
+
+import argparse
+import json
+
+from bulk_advise import run
+
+
+def _run(tmp_path, lines, workers=1):
+    roster = tmp_path / 'roster.jsonl'
+    roster.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    out = tmp_path / 'advice.jsonl'
+    args = argparse.Namespace(roster=str(roster), output=str(out), format=None,
+                              workers=workers, chunk_size=2, quiet=True, strict=False)
+    assert run(args) == 0
+    return [json.loads(line) for line in out.read_text(encoding='utf-8').splitlines()]
+
+
+def test_bad_records_become_error_rows(tmp_path):
+    good = {'student_id': 's1', 'cgpa': 3.2, 'passed': ['CSE014'], 'semester': 'Fall', 'track': 'All'}
+    results = _run(tmp_path, [
+        json.dumps(good),
+        '{"student_id": "s2", "cgpa": 3.2,',   # not valid JSON
+        '[1, 2]',                              # not an object
+        json.dumps({'student_id': 's4', 'cgpa': 3.0}),
+        json.dumps(dict(good, student_id='s5')),
+    ])
+    assert [r['row'] for r in results] == [1, 2, 3, 4, 5]
+    assert [r['status'] for r in results] == ['ok', 'error', 'error', 'error', 'ok']
+    assert 'line 2: invalid JSON' in results[1]['error']
+    assert 'must be an object' in results[2]['error']
+    assert results[3]['student_id'] == 's4'
+    assert 'missing field(s): semester, track' in results[3]['error']
+    assert results[4]['student_id'] == 's5' and results[4]['recommendations']
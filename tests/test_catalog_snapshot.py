@@ -0,0 +1,44 @@
+"""The compiled catalog snapshot against its CSV/JSON sources."""
+
+import json
+
+import pytest
+
+import KnowledgeBase
+from catalog_snapshot import compile_snapshot, open_snapshot
+
+
+def _add_policy(data_dir, **extra):
+    path = data_dir / 'policies.json'
+    policies = json.loads(path.read_text(encoding='utf-8'))
+    policies.update(extra)
+    path.write_text(json.dumps(policies), encoding='utf-8')
+    return policies
+
+
+def test_snapshot_keeps_every_policy_key(data_dir):
+    policies = _add_policy(data_dir, max_retakes=2, probation={'min_cgpa': 2.0})
+    snapshot = open_snapshot(str(data_dir / 'courses.csv'), str(data_dir / 'policies.json'))
+    try:
+        assert snapshot.policies() == policies
+    finally:
+        snapshot.close()
+
+
+@pytest.mark.parametrize('backend', ['csv', 'sqlite'])
+def test_backends_load_the_same_policies(data_dir, monkeypatch, backend):
+    monkeypatch.setenv('AIU_ADVISOR_KB_BACKEND', backend)
+    policies = _add_policy(data_dir, max_retakes=2)
+    assert KnowledgeBase.current_state().policies == policies
+
+
+def test_old_snapshot_version_is_rebuilt(data_dir):
+    csv_path, json_path = str(data_dir / 'courses.csv'), str(data_dir / 'policies.json')
+    old = bytearray(compile_snapshot(csv_path, json_path))
+    old[8:12] = (1).to_bytes(4, 'little')
+    (data_dir / 'courses.snapshot').write_bytes(old)
+    snapshot = open_snapshot(csv_path, json_path)
+    try:
+        assert snapshot.policies() == json.loads(open(json_path, encoding='utf-8').read())
+    finally:
+        snapshot.close()
@@ -0,0 +1,54 @@
+"""Seat capacities and cohort allocation."""
+
+import json
+import sys
+
+import pytest
+
+import cohort_allocation
+from cohort_allocation import allocate_cohort, load_capacities
+
+
+def test_missing_default_capacities_mean_no_limits(tmp_path, monkeypatch):
+    monkeypatch.setattr(cohort_allocation, 'CAPACITIES_PATH', str(tmp_path / 'none.csv'))
+    assert load_capacities() == {}
+
+
+def test_explicit_missing_capacities_file_is_an_error(tmp_path):
+    with pytest.raises(OSError):
+        load_capacities(str(tmp_path / 'typo.csv'))
+
+
+def test_duplicate_capacity_row_is_an_error(tmp_path):
+    path = tmp_path / 'capacities.csv'
+    path.write_text('Course Code,Capacity\nCSE014,10\nMAT111,5\nCSE014,20\n', encoding='utf-8')
+    with pytest.raises(ValueError, match='already listed on line 2'):
+        load_capacities(str(path))
+
+
+def test_capacity_is_never_exceeded():
+    student = {'cgpa': 3.5, 'passed': [], 'failed': [], 'semester': 'Fall', 'track': 'All'}
+    students = [dict(student, student_id=str(k)) for k in range(10)]
+    result = allocate_cohort(students, capacities={'MAT111': 3})
+    assert result['courses']['MAT111'] == {'capacity': 3, 'allocated': 3, 'demand': 10}
+    holders = [r for r in result['students']
+               if 'MAT111' in [e['course_code'] for e in r['recommendations']]]
+    assert len(holders) == 3
+    assert sum(r['full'] == ['MAT111'] for r in result['students']) == 7
+
+
+def test_cli_skips_bad_records_and_rejects_a_missing_capacities_file(tmp_path, monkeypatch, capsys):
+    roster = tmp_path / 'roster.jsonl'
+    roster.write_text('[1, 2]\n{"student_id": "s1", "cgpa": 3, "semester": "Fall", "track": "All"}\n',
+                      encoding='utf-8')
+    out = tmp_path / 'out.jsonl'
+    monkeypatch.setattr(sys, 'argv', ['cohort_allocation.py', str(roster), '-o', str(out)])
+    cohort_allocation.main()
+    assert 'Skipping record 1' in capsys.readouterr().err
+    assert [json.loads(l)['student_id'] for l in out.read_text().splitlines()] == ['s1']
+
+    monkeypatch.setattr(sys, 'argv', ['cohort_allocation.py', str(roster), '-o', str(out),
+                                      '--capacities', str(tmp_path / 'typo.csv')])
+    with pytest.raises(SystemExit) as exc:
+        cohort_allocation.main()
+    assert exc.value.code == 2
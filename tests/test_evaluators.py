@@ -0,0 +1,54 @@
+"""Every evaluator must give recommend_courses' answer for the same student."""
+
+import random
+
+import pytest
+
+pytest.importorskip('experta_engine')  # applies experta's compatibility patch
+
+from KnowledgeBase import get_catalog
+from advisor_session import AdvisorSession
+from batch_advisor import recommend_courses_batch
+from inference_engine import compare_evaluators, recommend_courses
+
+TRACKS = ('All', 'Artificial Intelligence Science')
+
+
+def _students(n, seed=1):
+    codes = get_catalog().codes
+    rng = random.Random(seed)
+    out = []
+    for _ in range(n):
+        passed = rng.sample(codes, rng.randint(0, 25))
+        failed = rng.sample([c for c in codes if c not in passed], rng.randint(0, 3))
+        out.append({'cgpa': rng.choice([1.5, 2.5, 3.5]), 'passed': passed, 'failed': failed,
+                    'semester': rng.choice(['Fall', 'Spring']), 'track': rng.choice(TRACKS)})
+    return out
+
+
+def test_fast_matches_experta():
+    for student in _students(40):
+        assert compare_evaluators(**student) == []
+
+
+def test_experta_evaluator_returns_fast_result():
+    student = {'cgpa': 3.2, 'passed': ['CSE014', 'MAT111', 'UC1'], 'failed': ['PHY211'],
+               'semester': 'Fall', 'track': 'All'}
+    experta = recommend_courses(**student, evaluator='experta', use_cache=False)
+    fast = recommend_courses(**student, evaluator='fast', use_cache=False)
+    assert experta[0] == fast[0]
+    assert list(experta[1]) == list(fast[1])
+
+
+def test_batch_matches_per_call():
+    students = _students(100, seed=2)
+    expected = [recommend_courses(**s, use_cache=False) for s in students]
+    assert list(recommend_courses_batch(students)) == expected
+
+
+def test_session_matches_per_call():
+    students = _students(60, seed=3)
+    session = AdvisorSession(**students[0])
+    for student in students:
+        session.update(**student)
+        assert session.recommend() == recommend_courses(**student, use_cache=False)
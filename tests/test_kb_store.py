@@ -0,0 +1,126 @@
+"""KB stores with the catalog_validator pre-save hook."""
+
+import argparse
+import sqlite3
+
+import pytest
+
+import KB_Editor
+import KnowledgeBase
+from catalog_validator import check_edit, validate_rows
+from kb_store import InvalidCatalog, KBStoreError, open_store
+
+BACKENDS = ('csv', 'sqlite')
+
+
+@pytest.fixture(params=BACKENDS)
+def store(request, data_dir):
+    return open_store(str(data_dir / 'courses.csv'), request.param, validator=check_edit)
+
+
+def _codes(store):
+    return [r['Course Code'] for r in store.list_rows()]
+
+
+def test_shipped_catalog_has_no_errors(store):
+    assert [i for i in validate_rows(store.list_rows()) if i.severity == 'error'] == []
+
+
+def test_cycle_is_rejected_and_nothing_is_saved(store):
+    version = store.version()
+    with pytest.raises(InvalidCatalog) as exc:
+        store.update('CSE014', {'Prerequisites': 'CSE015'})
+    assert 'cycle' in {i.kind for i in exc.value.issues}
+    assert store.get('CSE014')['Prerequisites'] == ''
+    assert store.version() == version
+
+
+def test_unknown_requirement_is_rejected(store):
+    with pytest.raises(InvalidCatalog):
+        store.add({'Course Code': 'NEW100', 'Course Name': 'New', 'Prerequisites': 'NOPE1',
+                   'Credit Hours': '3', 'Semester Offered': 'Fall', 'Track': 'All', 'Level': '1'})
+    assert 'NEW100' not in _codes(store)
+
+
+def test_deleting_a_required_course_is_rejected(store):
+    with pytest.raises(InvalidCatalog):
+        store.delete('CSE014')
+    assert 'CSE014' in _codes(store)
+
+
+def test_renaming_a_required_course_is_rejected(store):
+    with pytest.raises(InvalidCatalog):
+        store.update('CSE014', {'Course Code': 'CSE014X'})
+    assert 'CSE014' in _codes(store)
+
+
+def test_unknown_fields_are_rejected(store):
+    with pytest.raises(KBStoreError, match='Unknown field'):
+        store.update('CSE014', {'Credits': '4'})
+    assert 'Credits' not in store.get('CSE014')
+
+
+def test_sqlite_edit_validates_the_neighbourhood_only(data_dir):
+    seen = []
+
+    def validator(before, after, partial=False):
+        seen.append(({r['Course Code'] for r in after}, partial))
+        check_edit(before, after, partial)
+
+    store = open_store(str(data_dir / 'courses.csv'), 'sqlite', validator=validator)
+    store.update('CSE014', {'Course Name': 'Renamed'})
+    codes, partial = seen[-1]
+    dependents = {r['Course Code'] for r in store.list_rows()
+                  if 'CSE014' in r['Prerequisites'] + r['Co-requisites']}
+    assert partial and dependents and {'CSE014'} | dependents <= codes
+    assert len(codes) < len(store.list_rows())
+
+
+def test_sqlite_requirement_index_is_built_for_old_databases(data_dir):
+    path = str(data_dir / 'courses.csv')
+    open_store(path, 'sqlite')
+    db = sqlite3.connect(str(data_dir / 'courses.db'))
+    db.execute('DELETE FROM requirements')
+    db.execute("DELETE FROM meta WHERE key = 'requirements'")
+    db.commit()
+    db.close()
+    store = open_store(path, 'sqlite', validator=check_edit)
+    with pytest.raises(InvalidCatalog):
+        store.update('CSE014', {'Prerequisites': 'CSE015'})
+
+
+def test_kb_editor_import_reports_store_errors(data_dir, capsys):
+    bad = data_dir / 'bad.csv'
+    bad.write_text('Course Code,Course Name\n,Nameless\n', encoding='utf-8')
+    with pytest.raises(SystemExit) as exc:
+        KB_Editor.import_courses(argparse.Namespace(path=str(bad)))
+    assert exc.value.code == 1
+    assert 'Course Code is required' in capsys.readouterr().err
+
+
+def test_valid_edits_are_saved(store):
+    store.apply([
+        {'op': 'add', 'Course Code': 'NEW100', 'Course Name': 'New', 'Prerequisites': 'CSE014',
+         'Credit Hours': '3', 'Semester Offered': 'Fall', 'Track': 'All', 'Level': '2'},
+        {'op': 'edit', 'Course Code': 'NEW100', 'Credit Hours': '2'},
+    ])
+    assert store.get('NEW100')['Credit Hours'] == '2'
+
+
+def test_existing_errors_do_not_block_unrelated_edits():
+    rows = [
+        {'Course Code': 'A1', 'Credit Hours': '3', 'Semester Offered': 'Both', 'Track': 'All', 'Level': '1'},
+        {'Course Code': 'A2', 'Credit Hours': '3', 'Semester Offered': 'Both', 'Track': 'All', 'Level': '1'},
+        {'Course Code': 'A3', 'Credit Hours': '3', 'Semester Offered': 'Both', 'Track': 'All', 'Level': '1'},
+        {'Course Code': '', 'Credit Hours': '3', 'Semester Offered': 'Both', 'Track': 'All', 'Level': '1'},
+    ]
+    check_edit(rows, rows[1:])  # the empty code moves from row 4 to row 3
+    with pytest.raises(InvalidCatalog):
+        check_edit(rows, rows + [dict(rows[3])])  # a second empty code is new
+
+
+def test_invalid_edit_keeps_the_live_catalog():
+    catalog = KnowledgeBase.get_catalog()
+    with pytest.raises(KBStoreError):
+        KnowledgeBase.update_course('CSE014', {'Prerequisites': 'CSE015'})
+    assert KnowledgeBase.get_catalog() is catalog
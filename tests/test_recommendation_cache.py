@@ -0,0 +1,43 @@
+"""Cache keys and invalidation when the catalog is reloaded."""
+
+import KnowledgeBase
+from inference_engine import cache_stats, recommend_courses
+from recommendation_cache import RecommendationCache, profile_key
+
+STUDENT = {'passed': ['CSE014', 'MAT111', 'UC1'], 'failed': [],
+           'semester': 'Fall', 'track': 'All'}
+
+
+def test_key_depends_on_credit_band_not_cgpa():
+    assert profile_key(3.1, ['A', 'B'], [], 'Fall', 'All') == profile_key(3.85, ['B', 'A'], [], 'Fall', 'All')
+    assert profile_key(2.5, ['A'], [], 'Fall', 'All') != profile_key(3.5, ['A'], [], 'Fall', 'All')
+    assert profile_key(3.5, ['A'], [], 'Fall', 'All') != profile_key(3.5, ['A'], [], 'Spring', 'All')
+
+
+def test_repeated_profile_is_a_hit():
+    first = recommend_courses(3.2, **STUDENT)
+    hits = cache_stats()['hits']
+    assert recommend_courses(3.9, **STUDENT) == first
+    assert cache_stats()['hits'] == hits + 1
+
+
+def test_reload_invalidates_entries():
+    recs, _ = recommend_courses(3.2, **STUDENT)
+    version = KnowledgeBase.catalog_version()
+    code = recs[0]['course_code']
+    KnowledgeBase.update_course(code, {'Semester Offered': 'Spring'})
+
+    assert KnowledgeBase.catalog_version() == version + 1
+    recs_after, notes = recommend_courses(3.2, **STUDENT)
+    assert code not in [r['course_code'] for r in recs_after]
+    assert 'wrong_semester' in notes.reasons(code)
+
+
+def test_cache_drops_entries_of_an_old_version():
+    cache = RecommendationCache(maxsize=10)
+    cache.get('warm')  # records the current version
+    cache.put('key', 'value')
+    assert cache.get('key') == 'value'
+    KnowledgeBase.update_course('CSE014', {'Course Name': 'Renamed'})
+    assert cache.get('key') is None
+    assert cache.stats()['invalidations'] == 1
@@ -0,0 +1,80 @@
+"""roster_import: validation of registrar exports."""
+
+import gzip
+import json
+import warnings
+
+from roster_import import RosterImporter, open_text
+
+ROW = {'student_id': 's1', 'cgpa': 3.1, 'passed': 'CSE014, mat-111',
+       'failed': '', 'semester': 'Fall', 'track': 'All'}
+
+
+def _import(records, **options):
+    importer = RosterImporter(**options)
+    return list(importer.students(records)), importer
+
+
+def test_roster_codes_are_normalized():
+    students, importer = _import([dict(ROW, passed='CSE014, mat-111, XYZ9')])
+    assert students[0]['passed'] == ['CSE014', 'MAT111']
+    assert importer.unknown_codes == {'XYZ9': 1}
+
+
+def test_jsonl_records_with_different_optional_keys():
+    students, _ = _import([
+        {'student_id': 's1', 'course_code': 'CSE014', 'grade': 'A'},
+        {'student_id': 's1', 'course_code': 'MAT111', 'grade': 'B', 'term': 'Fall 2024'},
+        {'student_id': 's1', 'course_code': 'UC1', 'status': 'passed', 'track': 'Artificial Intelligence Science'},
+    ])
+    assert students[0]['semester'] == 'Spring'
+    assert students[0]['track'] == 'Artificial Intelligence Science'
+    assert students[0]['passed'] == ['CSE014', 'MAT111', 'UC1']
+
+
+def test_pass_fail_grades():
+    students, importer = _import([
+        {'student_id': 's1', 'course_code': 'CSE014', 'grade': 'P', 'cgpa': '3'},
+        {'student_id': 's1', 'course_code': 'MAT111', 'grade': 'NC'},
+    ], default_semester='Fall')
+    assert (students[0]['passed'], students[0]['failed']) == (['CSE014'], ['MAT111'])
+    assert importer.stats['invalid_grade'] == 0
+
+
+def test_non_string_values_are_reported_not_raised():
+    students, importer = _import([
+        dict(ROW, semester=1),
+        dict(ROW, student_id='s2', track=7, passed=5),
+        [1, 2],
+        dict(ROW, student_id='s3'),
+    ])
+    assert [s['student_id'] for s in students] == ['s2', 's3']
+    assert students[0]['track'] == '7'
+    assert importer.stats['invalid_semester'] == 1
+    assert importer.stats['invalid_record'] == 1
+
+
+def test_duplicate_student_is_yielded_once():
+    students, importer = _import([
+        {'student_id': 's1', 'course_code': 'CSE014', 'grade': 'A', 'semester': 'Fall', 'cgpa': 3},
+        {'student_id': 's2', 'course_code': 'CSE014', 'grade': 'A', 'semester': 'Fall', 'cgpa': 3},
+        {'student_id': 's1', 'course_code': 'MAT111', 'grade': 'A', 'semester': 'Spring', 'cgpa': 3},
+    ])
+    assert [s['student_id'] for s in students] == ['s1', 's2']
+    assert students[0]['semester'] == 'Fall'
+    assert importer.stats['duplicate_student'] == 1
+
+
+def test_gzip_export_and_malformed_lines(tmp_path):
+    path = tmp_path / 'export.jsonl.gz'
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        f.write(json.dumps(ROW) + '\n{"student_id": \n' + json.dumps(dict(ROW, student_id='s2')) + '\n')
+    with warnings.catch_warnings():
+        warnings.simplefilter('error', ResourceWarning)
+        with open_text(str(path)) as f:
+            assert f.readline().startswith('{')
+        importer = RosterImporter()
+        students = list(importer.import_file(str(path)))
+    assert [s['student_id'] for s in students] == ['s1', 's2']
+    assert importer.issues[0]['kind'] == 'invalid_record'
+    assert 'line 2: invalid JSON' in importer.issues[0]['detail']
@@ -0,0 +1,32 @@
+"""What-if scenarios against recommend_courses for the same outcomes."""
+
+import pytest
+
+from inference_engine import recommend_courses
+from what_if import what_if
+
+STUDENT = {'cgpa': 3.2, 'passed': ['CSE014', 'MAT111', 'UC1'], 'failed': [],
+           'semester': 'Fall', 'track': 'All'}
+
+
+def test_scenarios_match_recommend_courses():
+    result = what_if(**STUDENT)
+    assert len(result.outcomes) == 2 ** len(result.courses)
+    for n in range(len(result.outcomes)):
+        recs, _ = recommend_courses(**result.scenario(n), use_cache=False)
+        assert {r['course_code'] for r in recs} <= set(result.eligible_in(n))
+
+
+def test_fixed_course_outside_courses_is_added():
+    result = what_if(**STUDENT, courses=[], fixed={'CSE015': True})
+    assert result.courses == ['CSE015']
+    assert result.outcomes.tolist() == [[True]]
+    assert 'CSE015' in result.scenario(0)['passed']
+
+    failed = what_if(**STUDENT, courses=[], fixed={'CSE015': False})
+    assert set(failed.eligible_in(0)) != set(result.eligible_in(0))
+
+
+def test_fixing_an_already_passed_course_is_an_error():
+    with pytest.raises(ValueError, match='already passed'):
+        what_if(**STUDENT, courses=[], fixed={'CSE014': False})